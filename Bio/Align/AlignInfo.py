@@ -20,12 +20,98 @@ from Bio.Alphabet import IUPAC
 from Bio.Seq import Seq
 from Bio.SubsMat import FreqTable
 
+try:
+    import numpy
+except ImportError:
+    # Only needed for the vectorized calculations, otherwise
+    # the alignment is processed column by column in Python
+    numpy = None
+
 
 # Expected random distributions for 20-letter protein, and
 # for 4-letter nucleotide alphabets
 Protein20Random = 0.05
 Nucleotide4Random = 0.25
 
+# Approximate number of letters to count at once in _count_columns
+_CHUNK_SIZE = 2 ** 22
+
+
+def _count_columns(array, weights=None, table=None):
+    """Count the letters in each column of a 2D array of letters (PRIVATE).
+
+    Arguments:
+     - array - 2D NumPy array of letters (uint8), one row per sequence.
+     - weights - Optional array of weights, one for each row.
+     - table - Optional 256 entry array mapping each letter to a code
+       (less than 256) to count instead.
+
+    Returns an array of shape (columns, 256), where counts[i, c] is the
+    number (or the total weight) of the rows with letter c in column i.
+    The columns are counted in chunks with one bincount call each, and the
+    weights for each letter are added up in row order (as in the loops over
+    the records in the pure Python code, giving identical sums).
+    """
+    rows, columns = array.shape
+    if weights is None:
+        counts = numpy.zeros((columns, 256), numpy.intp)
+    else:
+        counts = numpy.zeros((columns, 256))
+    step = max(1, _CHUNK_SIZE // max(rows, 1))
+    for start in range(0, columns, step):
+        block = array[:, start:start + step]
+        width = block.shape[1]
+        if table is not None:
+            block = table[block]
+        index = block + numpy.arange(0, 256 * width, 256)
+        if weights is None:
+            chunk_weights = None
+        else:
+            chunk_weights = numpy.repeat(weights, width)
+        counts[start:start + width] = numpy.bincount(
+            index.ravel(), chunk_weights, 256 * width).reshape(width, 256)
+    return counts
+
+
+def _find_letters(array, letters):
+    """Find the first of the given letters, going column by column (PRIVATE).
+
+    Arguments:
+     - array - 2D NumPy array of letters (uint8), one row per sequence.
+     - letters - list of letters (single character strings).
+
+    Returns the column number and the letter found (i.e. the first in that
+    column), or None if none of the letters are in the array.
+    """
+    table = numpy.zeros(256, numpy.uint8)
+    for letter in letters:
+        table[ord(letter)] = 1
+    found = numpy.flatnonzero(_count_columns(array, table=table)[:, 1])
+    if not len(found):
+        return None
+    column = array[:, found[0]]
+    row = numpy.flatnonzero(table[column])[0]
+    return found[0], chr(column[row])
+
+
+def _consensus_from_counts(counts, threshold, ambiguous, require_multiple):
+    """Return a consensus string from letter counts for each column (PRIVATE).
+
+    This follows the rules in SummaryInfo.dumb_consensus, given an array
+    of shape (columns, 256) of the counts of each letter in each column.
+    """
+    num_atoms = counts.sum(axis=1)
+    max_size = counts.max(axis=1)
+    best = counts.argmax(axis=1)
+    unique = (counts == max_size[:, None]).sum(axis=1) == 1
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        ratio = max_size / num_atoms.astype(float)
+    use_best = unique & (num_atoms > 0) & (ratio >= threshold)
+    if require_multiple:
+        use_best &= num_atoms != 1
+    return "".join(chr(letter) if ok else ambiguous for letter, ok in
+                   zip(best.tolist(), use_best.tolist()))
+
 
 class SummaryInfo(object):
     """Calculate summary info about the alignment.
@@ -74,41 +160,49 @@ class SummaryInfo(object):
         # find the length of the consensus we are creating
         con_len = self.alignment.get_alignment_length()
 
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] != '-' and record.seq[n] != '.':
-                        if record.seq[n] not in atom_dict:
-                            atom_dict[record.seq[n]] = 1
-                        else:
-                            atom_dict[record.seq[n]] += 1
-
-                        num_atoms = num_atoms + 1
-
-            max_atoms = []
-            max_size = 0
-
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
-
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and ((float(max_size) /
-                                             float(num_atoms)) >= threshold):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
+        array = self._get_letters_array()
+        if array is not None:
+            # count all the columns at once, ignoring gaps
+            counts = _count_columns(array)
+            counts[:, [ord('-'), ord('.')]] = 0
+            consensus = _consensus_from_counts(counts, threshold, ambiguous,
+                                               require_multiple)
+        else:
+            # go through each seq item
+            for n in range(con_len):
+                # keep track of the counts of the different atoms we get
+                atom_dict = {}
+                num_atoms = 0
+
+                for record in self.alignment:
+                    # make sure we haven't run past the end of any sequences
+                    # if they are of different lengths
+                    if n < len(record.seq):
+                        if record.seq[n] != '-' and record.seq[n] != '.':
+                            if record.seq[n] not in atom_dict:
+                                atom_dict[record.seq[n]] = 1
+                            else:
+                                atom_dict[record.seq[n]] += 1
+
+                            num_atoms = num_atoms + 1
+
+                max_atoms = []
+                max_size = 0
+
+                for atom in atom_dict:
+                    if atom_dict[atom] > max_size:
+                        max_atoms = [atom]
+                        max_size = atom_dict[atom]
+                    elif atom_dict[atom] == max_size:
+                        max_atoms.append(atom)
+
+                if require_multiple and num_atoms == 1:
+                    consensus += ambiguous
+                elif (len(max_atoms) == 1) and \
+                        (float(max_size) / float(num_atoms)) >= threshold:
+                    consensus += max_atoms[0]
+                else:
+                    consensus += ambiguous
 
         # we need to guess a consensus alphabet if one isn't specified
         if consensus_alpha is None:
@@ -132,40 +226,47 @@ class SummaryInfo(object):
         # find the length of the consensus we are creating
         con_len = self.alignment.get_alignment_length()
 
-        # go through each seq item
-        for n in range(con_len):
-            # keep track of the counts of the different atoms we get
-            atom_dict = {}
-            num_atoms = 0
-
-            for record in self.alignment:
-                # make sure we haven't run past the end of any sequences
-                # if they are of different lengths
-                if n < len(record.seq):
-                    if record.seq[n] not in atom_dict:
-                        atom_dict[record.seq[n]] = 1
-                    else:
-                        atom_dict[record.seq[n]] += 1
+        array = self._get_letters_array()
+        if array is not None:
+            # count all the columns at once
+            consensus = _consensus_from_counts(_count_columns(array),
+                                               threshold, ambiguous,
+                                               require_multiple)
+        else:
+            # go through each seq item
+            for n in range(con_len):
+                # keep track of the counts of the different atoms we get
+                atom_dict = {}
+                num_atoms = 0
+
+                for record in self.alignment:
+                    # make sure we haven't run past the end of any sequences
+                    # if they are of different lengths
+                    if n < len(record.seq):
+                        if record.seq[n] not in atom_dict:
+                            atom_dict[record.seq[n]] = 1
+                        else:
+                            atom_dict[record.seq[n]] += 1
 
-                    num_atoms += 1
+                        num_atoms += 1
 
-            max_atoms = []
-            max_size = 0
+                max_atoms = []
+                max_size = 0
 
-            for atom in atom_dict:
-                if atom_dict[atom] > max_size:
-                    max_atoms = [atom]
-                    max_size = atom_dict[atom]
-                elif atom_dict[atom] == max_size:
-                    max_atoms.append(atom)
+                for atom in atom_dict:
+                    if atom_dict[atom] > max_size:
+                        max_atoms = [atom]
+                        max_size = atom_dict[atom]
+                    elif atom_dict[atom] == max_size:
+                        max_atoms.append(atom)
 
-            if require_multiple and num_atoms == 1:
-                consensus += ambiguous
-            elif (len(max_atoms) == 1) and ((float(max_size) /
-                                             float(num_atoms)) >= threshold):
-                consensus += max_atoms[0]
-            else:
-                consensus += ambiguous
+                if require_multiple and num_atoms == 1:
+                    consensus += ambiguous
+                elif (len(max_atoms) == 1) and \
+                        (float(max_size) / float(num_atoms)) >= threshold:
+                    consensus += max_atoms[0]
+                else:
+                    consensus += ambiguous
 
         # we need to guess a consensus alphabet if one isn't specified
         if consensus_alpha is None:
@@ -174,6 +275,48 @@ class SummaryInfo(object):
 
         return Seq(consensus, consensus_alpha)
 
+    def _get_letters_array(self):
+        """Return the letters of the alignment as a 2D NumPy array (PRIVATE).
+
+        This uses the array kept by the alignment if its as_array method has
+        been called, otherwise a temporary array is made (so any later changes
+        to the records are still seen). Returns None if NumPy is missing or
+        the sequences are not all the same length, in which case the
+        calculations are done column by column in Python.
+        """
+        if numpy is None:
+            return None
+        array = getattr(self.alignment, "_array", None)
+        if array is not None:
+            return array
+        records = list(self.alignment)
+        lengths = set(len(record.seq) for record in records)
+        if len(lengths) > 1:
+            return None
+        data = "".join(str(record.seq) for record in records)
+        if not isinstance(data, bytes):
+            # Python 3 unicode string
+            try:
+                data = data.encode("latin-1")
+            except UnicodeEncodeError:
+                return None
+        length = lengths.pop() if lengths else 0
+        return numpy.frombuffer(data, numpy.uint8).reshape(len(records),
+                                                           length)
+
+    def _get_weights_array(self):
+        """Return an array of the weights, or None if all are 1.0 (PRIVATE).
+
+        Integer weights (even if all 1) give an array, as the scores in the
+        PSSM then depend on which are integers.
+        """
+        weights = [record.annotations.get('weight', 1.0)
+                   for record in self.alignment]
+        if all(isinstance(weight, float) and weight == 1.0
+               for weight in weights):
+            return None
+        return numpy.array(weights, float)
+
     def _guess_consensus_alphabet(self, ambiguous):
         """Pick an (ungapped) alphabet for an alignment consesus sequence.
 
@@ -322,6 +465,15 @@ class SummaryInfo(object):
             # We are dealing with a generic alphabet class where the
             # letters are not defined!  We must build a list of the
             # letters used...
+            array = self._get_letters_array()
+            if array is not None:
+                rows, columns = array.shape
+                step = max(1, _CHUNK_SIZE // max(columns, 1))
+                counts = numpy.zeros(256, numpy.intp)
+                for start in range(0, rows, step):
+                    counts += numpy.bincount(
+                        array[start:start + step].ravel(), minlength=256)
+                return "".join(chr(c) for c in numpy.flatnonzero(counts))
             set_letters = set()
             for record in self.alignment:
                 # Note the built in set does not have a union_update
@@ -409,6 +561,39 @@ class SummaryInfo(object):
             left_seq = self.dumb_consensus()
 
         pssm_info = []
+        array = self._get_letters_array()
+        if array is not None:
+            # count the letters in all the columns at once
+            counts = _count_columns(array)
+            letters = list(self._get_base_letters(all_letters))
+            unknown = [chr(c) for c in numpy.flatnonzero(counts.sum(axis=0))
+                       if chr(c) not in letters and
+                       chr(c) not in chars_to_ignore]
+            if unknown:
+                raise ValueError("Residue %s not found in alphabet %s"
+                                 % (_find_letters(array, unknown)[1],
+                                    self.alignment._alphabet))
+            codes = [ord(letter) for letter in letters]
+            counts = counts[:, codes]
+            weights = self._get_weights_array()
+            if weights is None:
+                totals = counts.astype(float).astype(object)
+            else:
+                totals = _count_columns(array, weights)[:, codes]
+                totals = totals.astype(object)
+                # As in Python, the sum of integer weights is an integer
+                is_float = numpy.array([
+                    not isinstance(record.annotations.get('weight', 1.0), int)
+                    for record in self.alignment], float)
+                is_int = _count_columns(array, is_float)[:, codes] == 0
+                totals[is_int] = totals[is_int].astype(int)
+            # letters not seen keep the initial (integer) zero
+            totals[counts == 0] = 0
+            for residue_num, score_row in enumerate(totals.tolist()):
+                score_dict = dict(zip(letters, score_row))
+                pssm_info.append((left_seq[residue_num], score_dict))
+            return PSSM(pssm_info)
+
         # now start looping through all of the sequences and getting info
         for residue_num in range(len(left_seq)):
             score_dict = self._get_base_letters(all_letters)
@@ -514,6 +699,14 @@ class SummaryInfo(object):
         for char in chars_to_ignore:
             all_letters = all_letters.replace(char, '')
 
+        array = self._get_letters_array()
+        if array is not None:
+            column_scores = self._get_info_content_array(
+                array[:, start:end], all_letters, chars_to_ignore,
+                pseudo_count, e_freq_table, random_expected, log_base)
+            self.ic_vector = column_scores
+            return sum(column_scores)
+
         info_content = {}
         for residue_num in range(start, end):
             freq_dict = self._get_letter_freqs(residue_num,
@@ -538,6 +731,98 @@ class SummaryInfo(object):
             self.ic_vector.append(info_content[i + start])
         return total_info
 
+    def _get_info_content_array(self, array, letters, to_ignore, pseudo_count,
+                                e_freq_table, random_expected, log_base):
+        """Calculate the information content of each column (PRIVATE).
+
+        Arguments:
+            - array - The 2D array of letters for the columns to use.
+            - The remaining arguments are as for _get_letter_freqs and
+              _get_column_info_content.
+
+        Returns a list of the information content for each column, which is
+        identical to calling _get_letter_freqs and _get_column_info_content
+        on each column in turn. The letters in all the columns are counted
+        at once, and the frequencies and information content calculated
+        from these counts with array operations.
+        """
+        if not array.shape[1]:
+            return []
+        if pseudo_count < 0:
+            raise ValueError("Positive value required for "
+                             "pseudo_count, %s provided" % (pseudo_count))
+        gap_char = self._get_gap_char()
+        letters = list(self._get_base_letters(letters))
+        counts = _count_columns(array)
+        unknown = [chr(c) for c in numpy.flatnonzero(counts.sum(axis=0))
+                   if chr(c) not in letters and chr(c) not in to_ignore]
+        found = _find_letters(array, unknown) if unknown else None
+        # Report any problems in the same order as the column by column code
+        if found is not None and found[0] == 0:
+            raise ValueError("Residue %s not found in alphabet %s"
+                             % (found[1], self.alignment._alphabet))
+        if e_freq_table:
+            self._check_e_freq_table(letters, e_freq_table, gap_char)
+        if found is not None:
+            raise ValueError("Residue %s not found in alphabet %s"
+                             % (found[1], self.alignment._alphabet))
+
+        codes = [ord(letter) for letter in letters]
+        weights = self._get_weights_array()
+        if weights is None:
+            letter_counts = counts[:, codes].astype(float)
+            total_count = counts[:, codes].sum(axis=1)
+        else:
+            letter_counts = _count_columns(array, weights)[:, codes]
+            # Add up the weights in row order, as the records are looped
+            # over in _get_letter_freqs
+            table = numpy.ones(256, numpy.uint8)
+            table[codes] = 0
+            total_count = _count_columns(array, weights, table)[:, 0]
+        if not letters:
+            return [0.0] * array.shape[1]
+        counted = total_count != 0
+        if pseudo_count and (random_expected or e_freq_table) \
+                and counted.any():
+            if e_freq_table:
+                ajust_freq = numpy.array([e_freq_table[letter]
+                                          for letter in letters])
+            else:
+                ajust_freq = random_expected
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                obs_freq = ((letter_counts + ajust_freq * pseudo_count) /
+                            (total_count + pseudo_count)[:, None])
+        else:
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                obs_freq = letter_counts / total_count[:, None]
+        obs_freq[~counted] = 0
+
+        # gap characters do not have expected frequencies
+        expected = numpy.array([numpy.nan if letter == gap_char else
+                                e_freq_table[letter] if e_freq_table else
+                                random_expected for letter in letters])
+        inner_log = obs_freq / expected
+        inner_log[:, numpy.isnan(expected)] = 0.0
+        # Use math.log (rather than numpy.log, which may differ in the last
+        # bit) on the relatively few letter frequencies, and cumsum to add up
+        # the letters in order, so the results are exactly as before
+        positive = inner_log > 0
+        logs = numpy.array([math.log(value) for value in
+                            inner_log[positive].tolist()])
+        letter_info = numpy.zeros(inner_log.shape)
+        letter_info[positive] = obs_freq[positive] * logs / math.log(log_base)
+        return numpy.cumsum(letter_info, axis=1)[:, -1].tolist()
+
+    def _check_e_freq_table(self, letters, e_freq_table, gap_char):
+        """Check the letters are in the expected frequency table (PRIVATE)."""
+        for key in letters:
+            if (key != gap_char and key not in e_freq_table):
+                raise ValueError("letters in current column %s "
+                                 "and not in expected frequency table %s"
+                                 % ([letter for letter in letters
+                                     if letter != gap_char],
+                                    list(e_freq_table)))
+
     def _get_letter_freqs(self, residue_num, all_records, letters, to_ignore,
                           pseudo_count=0, e_freq_table=None, random_expected=None):
         """Determine the frequency of specific letters in the alignment.
@@ -589,12 +874,7 @@ class SummaryInfo(object):
                 raise ValueError("e_freq_table should be a FreqTable object")
 
             # check if all the residus in freq_info are in e_freq_table
-            for key in freq_info:
-                if (key != gap_char and key not in e_freq_table):
-                    raise ValueError("letters in current column %s "
-                                     "and not in expected frequency table %s"
-                                     % (list(freq_info) - [gap_char],
-                                        list(e_freq_table)))
+            self._check_e_freq_table(list(freq_info), e_freq_table, gap_char)
 
         if total_count == 0:
             # This column must be entirely ignored characters
@@ -643,7 +923,8 @@ class SummaryInfo(object):
                     raise ValueError("Expected frequency letters %s "
                                      "do not match observed %s"
                                      % (list(e_freq_table),
-                                        list(obs_freq) - [gap_char]))
+                                        [letter for letter in obs_freq
+                                         if letter != gap_char]))
 
         total_info = 0.0
 
@@ -14,6 +14,13 @@ from __future__ import print_function
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio import Alphabet
+from Bio import MissingPythonDependencyError
+
+try:
+    import numpy
+except ImportError:
+    # Only needed for the array based columnar storage
+    numpy = None
 
 
 class MultipleSeqAlignment(object):
@@ -165,6 +172,8 @@ class MultipleSeqAlignment(object):
             self._alphabet = Alphabet.single_letter_alphabet
 
         self._records = []
+        # Cached 2D array of the letters, see the as_array method
+        self._array = None
         if records:
             self.extend(records)
             if alphabet is None:
@@ -341,8 +350,31 @@ class MultipleSeqAlignment(object):
         This is easy to remember if you think of the alignment as being like a
         list of SeqRecord objects.
         """
+        if self._lazy_rows is not None:
+            return len(self._lazy_rows[0])
         return len(self._records)
 
+    @property
+    def _records(self):
+        """List of the rows as SeqRecord objects (PRIVATE).
+
+        Sub-alignments taken using the array (see the as_array method) just
+        note the original SeqRecord objects and which columns to take, and
+        only slice the SeqRecord objects when the rows are first needed.
+        """
+        if self._lazy_rows is not None:
+            records, col_indices = self._lazy_rows
+            for col_index in col_indices:
+                records = [rec[col_index] for rec in records]
+            self._lazy_rows = None
+            self._record_list = records
+        return self._record_list
+
+    @_records.setter
+    def _records(self, records):
+        self._lazy_rows = None
+        self._record_list = records
+
     def get_alignment_length(self):
         """Return the maximum length of the alignment.
 
@@ -366,6 +398,9 @@ class MultipleSeqAlignment(object):
         3
 
         """
+        if self._array is not None:
+            return self._array.shape[1]
+
         max_length = 0
 
         for record in self._records:
@@ -374,6 +409,64 @@ class MultipleSeqAlignment(object):
 
         return max_length
 
+    def as_array(self):
+        """Return the alignment as a 2D NumPy array of letters (uint8).
+
+        The array has one row per sequence and one column per alignment
+        column, holding the ASCII code of each letter. For example, with
+        three rows "AAAACGT", "AAA-CGT" and "AAAAGGT" the array has shape
+        (3, 7), and column 3 holds the letters of "A-A".
+
+        The array is read only, and is kept by the alignment, which then
+        uses it to extract columns and sub-alignments, and when sorting.
+        Sub-alignments share (a view of) the same array, so slicing the
+        rows or columns of a large alignment does not copy the letters,
+        and their SeqRecord rows are only sliced when first used.
+        The array is discarded if you add rows to the alignment using its
+        append, extend or add_sequence methods, but not if you replace the
+        sequence of one of the SeqRecord objects directly. This requires
+        NumPy.
+        """
+        if self._array is None:
+            if numpy is None:
+                raise MissingPythonDependencyError(
+                    "Install NumPy if you want to use the alignment as an "
+                    "array.")
+            length = self.get_alignment_length()
+            data = "".join(str(record.seq) for record in self._records)
+            if not isinstance(data, bytes):
+                # Python 3 unicode string
+                data = data.encode("latin-1")
+            array = numpy.frombuffer(data, numpy.uint8)
+            self._array = array.reshape(len(self._records), length)
+        return self._array
+
+    def _set_array(self, array):
+        """Store an array of the letters as read only (PRIVATE)."""
+        if not len(array):
+            # No rows, so the number of columns is meaningless (an empty
+            # alignment has length zero)
+            self._array = None
+            return
+        array.flags.writeable = False
+        self._array = array
+
+    def _sub_alignment(self, row_index, col_index=None):
+        """Return a sub-alignment using a view of the array (PRIVATE)."""
+        if self._lazy_rows is not None:
+            records, col_indices = self._lazy_rows
+        else:
+            records, col_indices = self._records, []
+        if col_index is None:
+            array = self._array[row_index]
+        else:
+            array = self._array[row_index, col_index]
+            col_indices = col_indices + [col_index]
+        sub_align = MultipleSeqAlignment([], self._alphabet)
+        sub_align._set_array(array)
+        sub_align._lazy_rows = (records[row_index], col_indices)
+        return sub_align
+
     def add_sequence(self, descriptor, sequence, start=None, end=None,
                      weight=1.0):
         """Add a sequence to the alignment.
@@ -426,6 +519,7 @@ class MultipleSeqAlignment(object):
         new_record.annotations['weight'] = weight
 
         self._records.append(new_record)
+        self._array = None
 
     def extend(self, records):
         """Add more SeqRecord objects to the alignment as rows.
@@ -553,6 +647,7 @@ class MultipleSeqAlignment(object):
         if not Alphabet._check_type_compatible([self._alphabet, record.seq.alphabet]):
             raise ValueError("New sequence's alphabet is incompatible")
         self._records.append(record)
+        self._array = None
 
     def __add__(self, other):
         """Combines two alignments with the same number of rows by adding them.
@@ -633,7 +728,10 @@ class MultipleSeqAlignment(object):
         for k, v in self.annotations.items():
             if k in other.annotations and other.annotations[k] == v:
                 annotations[k] = v
-        return MultipleSeqAlignment(merged, alpha, annotations)
+        combined = MultipleSeqAlignment(merged, alpha, annotations)
+        if self._array is not None and other._array is not None:
+            combined._set_array(numpy.hstack([self._array, other._array]))
+        return combined
 
     def __getitem__(self, index):
         """Access part of the alignment.
@@ -746,13 +844,21 @@ class MultipleSeqAlignment(object):
 
         This should all seem familiar to anyone who has used the NumPy
         array or matrix objects.
+
+        If the alignment has been converted to an array using the as_array
+        method, columns are taken from the array, and sub-alignments share
+        a view of the array (with their rows only sliced when needed), which
+        is much faster for large alignments.
         """
+        array = self._array
         if isinstance(index, int):
             # e.g. result = align[x]
             # Return a SeqRecord
             return self._records[index]
         elif isinstance(index, slice):
             # e.g. sub_align = align[i:j:k]
+            if array is not None:
+                return self._sub_alignment(index)
             return MultipleSeqAlignment(self._records[index], self._alphabet)
         elif len(index) != 2:
             raise TypeError("Invalid index type.")
@@ -764,9 +870,17 @@ class MultipleSeqAlignment(object):
             return self._records[row_index][col_index]
         elif isinstance(col_index, int):
             # e.g. col_or_part_col = align[1:5, 6], gives a string
+            if array is not None:
+                column = array[row_index, col_index].tobytes()
+                if not isinstance(column, str):
+                    # Python 3
+                    column = column.decode("latin-1")
+                return column
             return "".join(rec[col_index] for rec in self._records[row_index])
         else:
             # e.g. sub_align = align[1:4, 5:7], gives another alignment
+            if array is not None:
+                return self._sub_alignment(row_index, col_index)
             return MultipleSeqAlignment((rec[col_index] for rec in self._records[row_index]),
                                         self._alphabet)
 
@@ -844,9 +958,16 @@ class MultipleSeqAlignment(object):
 
         """
         if key is None:
-            self._records.sort(key=lambda r: r.id, reverse=reverse)
-        else:
+            key = lambda r: r.id
+        if self._array is None:
             self._records.sort(key=key, reverse=reverse)
+        else:
+            # Sort the row numbers, to reorder the array rows to match
+            records = self._records
+            order = sorted(range(len(records)),
+                           key=lambda i: key(records[i]), reverse=reverse)
+            self._records = [records[i] for i in order]
+            self._set_array(self._array[order])
 
 
 if __name__ == "__main__":
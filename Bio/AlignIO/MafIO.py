@@ -32,6 +32,7 @@ For an inclusive end coordinate, we need to use ``end = start + size - 1``.
 A 1-column wide alignment would have ``start == end``.
 """
 import os
+from collections import OrderedDict
 from itertools import islice
 
 try:
@@ -235,11 +236,20 @@ class MafIndex(object):
     """This is used as an index for a MAF file.
 
     The index is a sqlite3 database that is built upon creation of the object
-    if necessary, and queried when methods *search* or *get_spliced* are
-    used."""
-    def __init__(self, sqlite_file, maf_file, target_seqname):
+    if necessary, and queried when methods *search*, *get_spliced* or
+    *get_spliced_many* are used.
+
+    Optionally, the most recently parsed alignment blocks (up to
+    *cache_size* of them, by default none) are cached in memory, keyed by
+    their offset in the MAF file, so that searches for nearby or overlapping
+    regions do not read and parse the same blocks again. Note this means
+    that the same *MultipleSeqAlignment* object can then be returned more
+    than once, so you should not modify it."""
+    def __init__(self, sqlite_file, maf_file, target_seqname, cache_size=0):
         """Indexes or loads the index of a MAF file"""
         self._target_seqname = target_seqname
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
         # example: Tests/MAF/ucsc_mm9_chr10.mafindex
         self._index_filename = sqlite_file
         # example: /home/bli/src/biopython/Tests/MAF
@@ -342,18 +352,18 @@ class MafIndex(object):
 
         insert_count = 0
 
-        # iterate over the entire file and insert in batches
+        # iterate over the entire file and insert in large batches, all in
+        # a single transaction (committing each batch is much slower)
         mafindex_func = self.__maf_indexer()
 
         while True:
-            batch = list(islice(mafindex_func, 100))
+            batch = list(islice(mafindex_func, 10000))
             if not batch:
                 break
 
             # batch is made from self.__maf_indexer(),
             self._con.executemany(
                 "INSERT INTO offset_data (bin, start, end, offset) VALUES (?,?,?,?);", batch)
-            self._con.commit()
             insert_count += len(batch)
 
         # then make indexes on the relevant fields
@@ -452,20 +462,42 @@ class MafIndex(object):
         return 0
 
     def _get_record(self, offset):
-        """Retrieves a single MAF record located at the offset provided."""
-        self._maf_fp.seek(offset)
-        return next(self._mafiter)
+        """Retrieves a single MAF record located at the offset provided.
 
-    def search(self, starts, ends):
-        """Searches index database for MAF records overlapping ranges provided.
-
-        Returns *MultipleSeqAlignment* results in order by start, then end, then
-        internal offset field.
-
-        *starts* should be a list of 0-based start coordinates of segments in the reference.
-        *ends* should be the list of the corresponding segment ends
-        (in the half-open UCSC convention:
-        http://genome.ucsc.edu/blog/the-ucsc-genome-browser-coordinate-counting-systems/).
+        If cache_size was given, recently retrieved records are cached, so
+        asking again for the same offset returns the same object without
+        reading the file.
+        """
+        cache = self._cache
+        if offset in cache:
+            # Remove and add it again to mark it as the most recent
+            record = cache.pop(offset)
+        else:
+            self._maf_fp.seek(offset)
+            record = next(self._mafiter)
+        if self._cache_size > 0:
+            cache[offset] = record
+            if len(cache) > self._cache_size:
+                cache.popitem(last=False)
+        return record
+
+    def _check_record(self, fetched, rec_start, rec_end, offset):
+        """Checks a record matches its coordinates in the index (PRIVATE)."""
+        for record in fetched:
+            if record.id == self._target_seqname:
+                # start and size come from the maf lines
+                start = record.annotations["start"]
+                end = record.annotations["start"] + record.annotations["size"]
+
+                if not (start == rec_start and end == rec_end):
+                    raise ValueError("Expected %s-%s @ offset %s, found %s-%s" %
+                                     (rec_start, rec_end, offset, start, end))
+
+    def _search_blocks(self, starts, ends):
+        """Returns index entries of blocks overlapping the ranges (PRIVATE).
+
+        Returns a list of (start, end, offset) tuples from the index database,
+        in the order used by *search*, after checking the ranges.
         """
         # verify the provided exon coordinates
         if len(starts) != len(ends):
@@ -476,10 +508,11 @@ class MafIndex(object):
                 raise ValueError("Exon coordinates invalid (%s >= %s)" % (exonstart, exonend))
         con = self._con
 
-        # Keep track of what blocks have already been yielded
+        # Keep track of what blocks have already been found
         # in order to avoid duplicating them
         # (see https://github.com/biopython/biopython/issues/1083)
         yielded_rec_coords = set([])
+        blocks = []
         # search for every exon
         for exonstart, exonend in zip(starts, ends):
             try:
@@ -506,30 +539,33 @@ class MafIndex(object):
                                  "offset ASC;"
                                  % (possible_bins, exonstart, exonend, exonend))
 
-            rows = result.fetchall()
-
-            for rec_start, rec_end, offset in rows:
-                # Avoid yielding multiple time the same block
+            for rec_start, rec_end, offset in result.fetchall():
+                # Avoid using multiple time the same block
                 if (rec_start, rec_end) in yielded_rec_coords:
                     continue
                 else:
                     yielded_rec_coords.add((rec_start, rec_end))
-                # Iterate through hits, fetching alignments from the MAF file
-                # and checking to be sure we've retrieved the expected record.
+                blocks.append((rec_start, rec_end, int(offset)))
 
-                fetched = self._get_record(int(offset))
+        return blocks
 
-                for record in fetched:
-                    if record.id == self._target_seqname:
-                        # start and size come from the maf lines
-                        start = record.annotations["start"]
-                        end = record.annotations["start"] + record.annotations["size"]
+    def search(self, starts, ends):
+        """Searches index database for MAF records overlapping ranges provided.
 
-                        if not (start == rec_start and end == rec_end):
-                            raise ValueError("Expected %s-%s @ offset %s, found %s-%s" %
-                                             (rec_start, rec_end, offset, start, end))
+        Returns *MultipleSeqAlignment* results in order by start, then end, then
+        internal offset field.
 
-                yield fetched
+        *starts* should be a list of 0-based start coordinates of segments in the reference.
+        *ends* should be the list of the corresponding segment ends
+        (in the half-open UCSC convention:
+        http://genome.ucsc.edu/blog/the-ucsc-genome-browser-coordinate-counting-systems/).
+        """
+        for rec_start, rec_end, offset in self._search_blocks(starts, ends):
+            # Iterate through hits, fetching alignments from the MAF file
+            # and checking to be sure we've retrieved the expected record.
+            fetched = self._get_record(offset)
+            self._check_record(fetched, rec_start, rec_end, offset)
+            yield fetched
 
     def get_spliced(self, starts, ends, strand=1):
         """Returns a multiple alignment of the exact sequence range provided.
@@ -554,6 +590,65 @@ class MafIndex(object):
         # pull all alignments that span the desired intervals
         fetched = [multiseq for multiseq in self.search(starts, ends)]
 
+        return self._splice(fetched, starts, ends, strand)
+
+    def get_spliced_many(self, regions):
+        """Returns spliced multiple alignments for many regions at once.
+
+        *regions* should be an iterable of (starts, ends, strand) tuples, each
+        holding the arguments of one call to *get_spliced* (for example, one
+        tuple for each transcript of a genome annotation).
+
+        The regions are sorted by their first (smallest) start coordinate,
+        and this generator function yields (index, alignment) tuples in that
+        order, where index is the position of the region in *regions* and
+        alignment is the *MultipleSeqAlignment* that *get_spliced* would
+        return for it. Each MAF block is read from the file and parsed only
+        once, however many of the regions it overlaps, and is dropped as soon
+        as the remaining regions all start after its end. This is much faster
+        than calling *get_spliced* for thousands of overlapping regions.
+
+        All the regions are checked before any alignment is returned.
+        """
+        batch = []
+        for index, (starts, ends, strand) in enumerate(regions):
+            # validate strand and exon coordinates
+            if strand not in (1, -1):
+                raise ValueError("Strand must be 1 or -1, got %s" % str(strand))
+            blocks = self._search_blocks(starts, ends)
+            first_start = min(starts) if len(starts) else 0
+            batch.append((first_start, index, starts, ends, strand, blocks))
+        batch.sort(key=lambda region: (region[0], region[1]))
+
+        # key: offset, value: (end, alignment) for the blocks parsed so far
+        # which may still be needed
+        parsed = {}
+        for first_start, index, starts, ends, strand, blocks in batch:
+            # Any block found for this (or a later) region ends at or after
+            # the start of one of its exons, so blocks ending before that
+            # will not be needed again
+            for offset in [offset for offset, (rec_end, multiseq)
+                           in parsed.items() if rec_end < first_start]:
+                del parsed[offset]
+
+            fetched = []
+            for rec_start, rec_end, offset in blocks:
+                try:
+                    multiseq = parsed[offset][1]
+                except KeyError:
+                    multiseq = self._get_record(offset)
+                    self._check_record(multiseq, rec_start, rec_end, offset)
+                    parsed[offset] = (rec_end, multiseq)
+                fetched.append(multiseq)
+
+            yield index, self._splice(fetched, starts, ends, strand)
+
+    def _splice(self, fetched, starts, ends, strand):
+        """Splices together the exons from the alignment blocks (PRIVATE).
+
+        Used by *get_spliced* and *get_spliced_many*, with the alignment
+        blocks found by a search for the exons.
+        """
         # keep track of the expected letter count
         # (sum of lengths of [start, end) segments,
         # where [start, end) half-open)
@@ -0,0 +1,212 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Integer encoding of the letters of an alphabet, using NumPy.
+
+Numerical code working on sequences (alignment, motif and HMM calculations,
+or substitution matrices) is much faster using small integers and arrays
+than looking up each letter (or pair of letters) in a dictionary. This
+module maps the letters of an alphabet to the codes 0, 1, 2, ... in the
+order given by the alphabet, with any other letter given the next code
+(which can be used for unknown letters):
+
+>>> from Bio.Alphabet import IUPAC
+>>> from Bio.Alphabet.Encoding import get_encoding
+>>> encoding = get_encoding(IUPAC.unambiguous_dna)
+>>> encoding
+Encoding('GATC')
+>>> encoding.encode("GATTACA")
+array([0, 1, 2, 2, 1, 3, 1], dtype=uint8)
+>>> encoding.encode("NNGA")
+array([4, 4, 0, 1], dtype=uint8)
+>>> encoding.decode([3, 1, 0])
+'CAG'
+
+If the letters of the alphabet are all upper case (or all lower case), the
+encoding ignores case. Alphabets without a fixed set of letters, such as
+Bio.Alphabet.generic_dna, use the corresponding IUPAC ambiguous letters
+(for generic alphabets, the letters A to Z) plus any gap or stop symbol:
+
+>>> from Bio.Alphabet import Gapped, generic_dna
+>>> get_encoding(Gapped(generic_dna)).letters
+'GATCRYWSMKHBVDN-'
+
+The translation tables are cached, so calling get_encoding again for the
+same letters is cheap. You can also encode a sequence object directly
+with its encoded method, see Bio.Seq.Seq.encoded.
+"""
+
+import string
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Alphabet.Encoding.")
+
+from Bio import Alphabet
+from Bio.Data import IUPACData
+
+
+class Encoding(object):
+    """Map the letters of an alphabet to small integer codes.
+
+    The letters attribute is the string of letters, with letters[i] given
+    the code i. Any other letter is given the code unknown, which is the
+    number of letters. The codes are unsigned 8 bit integers, so there can
+    be at most 255 letters.
+    """
+
+    def __init__(self, letters):
+        """Create an Encoding for a string of single letters."""
+        if len(letters) > 255:
+            raise ValueError("Too many letters to encode as 8 bit integers")
+        if len(set(letters)) != len(letters):
+            raise ValueError("Repeated letters in %r" % letters)
+        self.letters = letters
+        self.unknown = len(letters)
+        table = numpy.empty(256, numpy.uint8)
+        table.fill(self.unknown)
+        if letters == letters.upper():
+            extra = letters.lower()
+        elif letters == letters.lower():
+            extra = letters.upper()
+        else:
+            extra = letters
+        # Add the other case first, so the letters themselves take priority
+        for code, letter in enumerate(extra):
+            table[ord(letter)] = code
+        for code, letter in enumerate(letters):
+            table[ord(letter)] = code
+        self.table = table
+
+    def __repr__(self):
+        """Return a string representation of the Encoding."""
+        return "Encoding(%r)" % self.letters
+
+    def __len__(self):
+        """Return the number of letters (excluding the unknown code)."""
+        return len(self.letters)
+
+    def encode(self, sequence):
+        """Return a NumPy array of the codes for the letters in a sequence.
+
+        The sequence can be a string, or a Seq or similar object (which is
+        converted to a string). Letters not in the alphabet are given the
+        code unknown.
+        """
+        data = str(sequence)
+        if not isinstance(data, bytes):
+            # Python 3 unicode string
+            data = data.encode("latin-1", "replace")
+        return self.table[numpy.frombuffer(data, numpy.uint8)]
+
+    def _code(self, letter):
+        """Return the code for a single letter (PRIVATE)."""
+        if len(letter) == 1 and ord(letter) < 256:
+            return self.table[ord(letter)]
+        return self.unknown
+
+    def decode(self, codes):
+        """Return a string of the letters for an array or list of codes.
+
+        The unknown code is shown as "?".
+        """
+        letters = numpy.frombuffer((self.letters + "?").encode("latin-1"),
+                                   numpy.uint8)
+        data = letters[numpy.asarray(codes, numpy.intp)].tobytes()
+        return data.decode("latin-1")
+
+    def score_array(self, matrix, default=None):
+        """Return a substitution matrix as a square NumPy array of scores.
+
+        The matrix is a dictionary of scores keyed by pairs of letters, such
+        as a Bio.SubsMat.SeqMat or one of the matrices in
+        Bio.SubsMat.MatrixInfo. As in these, if only one of the pairs (a, b)
+        and (b, a) is given it is used for both. The array is indexed by the
+        codes of the two letters, e.g. array[encoding.encode("W")[0],
+        encoding.encode("Y")[0]]:
+
+        >>> from Bio.Alphabet import IUPAC
+        >>> from Bio.SubsMat.MatrixInfo import blosum62
+        >>> encoding = get_encoding(IUPAC.protein)
+        >>> scores = encoding.score_array(blosum62)
+        >>> scores.shape
+        (20, 20)
+        >>> codes = encoding.encode("WY")
+        >>> print(scores[codes[0], codes[1]])
+        2.0
+
+        Pairs in the matrix with letters not in the alphabet are ignored.
+        Pairs of letters in the alphabet missing from the matrix get the
+        default score, or if this is None a ValueError is raised.
+        """
+        size = len(self.letters)
+        scores = numpy.empty((size, size))
+        scores.fill(numpy.nan)
+        for (letter1, letter2), score in matrix.items():
+            code1 = self._code(letter1)
+            code2 = self._code(letter2)
+            if code1 == self.unknown or code2 == self.unknown:
+                continue
+            scores[code1, code2] = score
+            if (letter2, letter1) not in matrix:
+                scores[code2, code1] = score
+        missing = numpy.isnan(scores)
+        if missing.any():
+            if default is None:
+                code1, code2 = numpy.argwhere(missing)[0]
+                raise ValueError("No score for the pair (%r, %r)"
+                                 % (self.letters[code1], self.letters[code2]))
+            scores[missing] = default
+        return scores
+
+
+# Letters used for alphabets without a fixed set of letters:
+_default_letters = [
+    (Alphabet.DNAAlphabet, IUPACData.ambiguous_dna_letters),
+    (Alphabet.RNAAlphabet, IUPACData.ambiguous_rna_letters),
+    (Alphabet.NucleotideAlphabet, IUPACData.ambiguous_dna_letters + "U"),
+    (Alphabet.ProteinAlphabet, IUPACData.extended_protein_letters),
+]
+
+_encodings = {}
+
+
+def _get_letters(alphabet):
+    """Return the letters to encode for an alphabet (PRIVATE)."""
+    if alphabet.letters:
+        return alphabet.letters
+    extra = ""
+    while isinstance(alphabet, Alphabet.AlphabetEncoder):
+        extra = alphabet.new_letters + extra
+        alphabet = alphabet.alphabet
+    for alphabet_type, letters in _default_letters:
+        if isinstance(alphabet, alphabet_type):
+            break
+    else:
+        letters = string.ascii_uppercase
+    return letters + "".join(c for c in extra if c not in letters)
+
+
+def get_encoding(alphabet):
+    """Return the (cached) Encoding for an alphabet.
+
+    The alphabet should be a Bio.Alphabet object, or a string of letters.
+    Only single letter alphabets can be encoded.
+    """
+    if isinstance(alphabet, str):
+        letters = alphabet
+    else:
+        letters = _get_letters(alphabet)
+    if not isinstance(letters, str):
+        raise ValueError("Only single letter alphabets can be encoded")
+    try:
+        return _encodings[letters]
+    except KeyError:
+        pass
+    encoding = Encoding(letters)
+    _encodings[letters] = encoding
+    return encoding
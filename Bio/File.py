@@ -24,8 +24,11 @@ import os
 import sys
 import contextlib
 import itertools
+import struct
+import zlib
 
 from Bio._py3k import basestring
+from Bio._py3k import _as_bytes, _bytes_to_string, _string_to_bytes
 
 try:
     from collections import UserDict as _dict_base
@@ -202,6 +205,26 @@ class UndoHandle(object):
 # The rest of this file defines code used in Bio.SeqIO and Bio.SearchIO
 # for indexing
 
+_OFFSETS_MAGIC = b"BioOffs\x01"
+
+
+def _file_signature(filename, sample=65536):
+    """Return the size, modification time and checksum of a file (PRIVATE).
+
+    Used to spot if a file has changed since it was indexed. The CRC32
+    checksum only covers the start and end of the file (by default the
+    first and last 64kb), so that this is quick even for huge files.
+    """
+    size = os.path.getsize(filename)
+    mtime = os.path.getmtime(filename)
+    with open(filename, "rb") as handle:
+        checksum = zlib.crc32(handle.read(sample))
+        if size > sample:
+            handle.seek(max(sample, size - sample))
+            checksum = zlib.crc32(handle.read(sample), checksum)
+    return size, mtime, checksum & 0xffffffff
+
+
 class _IndexedSeqFileProxy(object):
     """Base class for file format specific random access (PRIVATE).
 
@@ -260,14 +283,26 @@ class _IndexedSeqFileDict(_dict_base):
 
     Note that this dictionary is essentially read only. You cannot
     add or change values, pop values, nor clear the dictionary.
+
+    Optionally the keys and offsets can be saved to a small binary index
+    file (see the index_filename argument), and reloaded from it next time
+    rather than scanning the whole sequence file again. The index file
+    records the size, modification time and a checksum (of the start and
+    end) of the sequence file, and it is rebuilt if any of these change.
     """
     def __init__(self, random_access_proxy, key_function,
-                 repr, obj_repr):
+                 repr, obj_repr, index_filename=None, filename=None,
+                 format=None):
         # Use key_function=None for default value
         self._proxy = random_access_proxy
         self._key_function = key_function
         self._repr = repr
         self._obj_repr = obj_repr
+        if index_filename:
+            offsets = self._load_offsets(index_filename, filename, format)
+            if offsets is not None:
+                self._offsets = offsets
+                return
         if key_function:
             offset_iter = (
                 (key_function(k), o, l) for (k, o, l) in random_access_proxy)
@@ -290,6 +325,82 @@ class _IndexedSeqFileDict(_dict_base):
             else:
                 offsets[key] = offset
         self._offsets = offsets
+        if index_filename:
+            self._save_offsets(index_filename, filename, format)
+
+    def _load_offsets(self, index_filename, filename, format):
+        """Load offsets from an index file, or None if out of date (PRIVATE).
+
+        Raises a ValueError if the file exists but is not an index file
+        (it won't be overwritten).
+        """
+        if not os.path.isfile(index_filename):
+            return None
+        with open(index_filename, "rb") as handle:
+            if handle.read(len(_OFFSETS_MAGIC)) != _OFFSETS_MAGIC:
+                self._proxy._handle.close()
+                raise ValueError("%r is not a Biopython offsets index file"
+                                 % index_filename)
+            try:
+                size, mtime, checksum, format_len = \
+                    struct.unpack("<QdIH", handle.read(22))
+                old_format = _bytes_to_string(handle.read(format_len))
+                if (size, mtime, checksum, old_format) != \
+                        _file_signature(filename) + (format,):
+                    return None
+                count, text_len = struct.unpack("<QQ", handle.read(16))
+                offsets = struct.unpack("<%iq" % count,
+                                        handle.read(8 * count))
+                lengths = struct.unpack("<%iI" % count,
+                                        handle.read(4 * count))
+                text = handle.read(text_len)
+            except struct.error:
+                # Truncated file, e.g. an interrupted write, so rebuild it
+                return None
+        if len(text) != sum(lengths):
+            return None
+        keys = []
+        start = 0
+        for length in lengths:
+            # Keys are stored encoded, but used as native strings
+            keys.append(_bytes_to_string(text[start:start + length]))
+            start += length
+        return dict(zip(keys, offsets))
+
+    def _save_offsets(self, index_filename, filename, format):
+        """Write the keys and offsets to an index file (PRIVATE).
+
+        Any existing index file is replaced. The index is written to a
+        temporary file first, so that other processes using the same index
+        file will never see a partial index.
+        """
+        keys = list(self._offsets)
+        for key in keys:
+            if not isinstance(key, basestring):
+                raise TypeError("Can only save string keys to an index "
+                                "file, not %r" % key)
+        encoded_keys = [_string_to_bytes(key) for key in keys]
+        text = b"".join(encoded_keys)
+        format = _as_bytes(format)
+        temp_filename = "%s.%i.tmp" % (index_filename, os.getpid())
+        with open(temp_filename, "wb") as handle:
+            handle.write(_OFFSETS_MAGIC)
+            handle.write(struct.pack("<QdIH", *(_file_signature(filename) +
+                                                (len(format),))))
+            handle.write(format)
+            handle.write(struct.pack("<QQ", len(keys), len(text)))
+            handle.write(struct.pack("<%iq" % len(keys),
+                                     *[self._offsets[k] for k in keys]))
+            handle.write(struct.pack("<%iI" % len(keys),
+                                     *[len(k) for k in encoded_keys]))
+            handle.write(text)
+        try:
+            os.replace(temp_filename, index_filename)
+        except AttributeError:
+            # Python 2, where os.rename won't replace files on Windows
+            if os.path.isfile(index_filename):
+                os.remove(index_filename)
+            os.rename(temp_filename, index_filename)
 
     def __repr__(self):
         return self._repr
@@ -381,6 +492,18 @@ class _IndexedSeqFileDict(_dict_base):
         # Pass the offset to the proxy
         return self._proxy.get_raw(self._offsets[key])
 
+    def get_many(self, keys):
+        """Iterate over (key, record) tuples for the given keys.
+
+        The records are loaded in the order they appear in the file (not
+        the order of the keys given), making the disk reads sequential.
+        Repeated keys are only returned once. If any key is not found, a
+        KeyError exception is raised before any records are loaded.
+        """
+        offsets = self._offsets
+        for offset, key in sorted((offsets[k], k) for k in set(keys)):
+            yield key, self.__getitem__(key)
+
     def __setitem__(self, key, value):
         """Would allow setting or replacing records, but not implemented."""
         raise NotImplementedError("An indexed a sequence file is read only.")
@@ -422,6 +545,20 @@ class _IndexedSeqFileDict(_dict_base):
         self._proxy._handle.close()
 
 
+def _scan_offsets(args):
+    """Return the list of (key, offset, length) tuples for a file (PRIVATE).
+
+    Used in the worker processes when building an SQLite index in parallel,
+    the argument is a tuple of the proxy factory, format and filename.
+    """
+    proxy_factory, format, filename = args
+    random_access_proxy = proxy_factory(format, filename)
+    try:
+        return list(random_access_proxy)
+    finally:
+        random_access_proxy._handle.close()
+
+
 class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
     """Read only dictionary interface to many sequential record files.
 
@@ -435,10 +572,23 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
     There are OS limits on the number of files that can be open at once,
     so a pool are kept. If a record is required from a closed file, then
     one of the open handles is closed first.
+
+    When building a new index, the offsets are inserted batch_size rows at
+    a time within a single transaction, using SQLite's write ahead log and
+    large pages for speed. With processes greater than one, the files are
+    scanned in parallel using a pool of worker processes (which requires
+    the proxy_factory can be pickled), and the offsets merged into the
+    index in the main process. The optional progress callback is called
+    after each file has been indexed, with the number of files done so
+    far, the total number of files, and the number of records indexed.
     """
+    # Counter used to give each get_many call its own temporary table
+    _temp_tables = 0
+
     def __init__(self, index_filename, filenames,
                  proxy_factory, format,
-                 key_function, repr, max_open=10):
+                 key_function, repr, max_open=10, batch_size=10000,
+                 processes=1, progress=None):
         """Loads or creates an SQLite based index."""
         # TODO? - Don't keep filename list in memory (just in DB)?
         # Should save a chunk of memory if dealing with 1000s of files.
@@ -461,6 +611,9 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         self._proxy_factory = proxy_factory
         self._repr = repr
         self._max_open = max_open
+        self._batch_size = batch_size
+        self._processes = processes
+        self._progress = progress
         self._proxies = {}
 
         # Note if using SQLite :memory: trick index filename, this will
@@ -558,13 +711,10 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
     def _build_index(self):
         """Called from __init__ to create a new index (PRIVATE)."""
         index_filename = self._index_filename
-        relative_path = self._relative_path
         filenames = self._filenames
         format = self._format
-        key_function = self._key_function
         proxy_factory = self._proxy_factory
-        max_open = self._max_open
-        random_access_proxies = self._proxies
+        processes = self._processes
 
         if not format or not filenames:
             raise ValueError("Filenames to index and format required to build %r" % index_filename)
@@ -574,9 +724,13 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         con = _sqlite.connect(index_filename)
         self._con = con
         # print("Creating index")
-        # Sqlite PRAGMA settings for speed
+        # Sqlite PRAGMA settings for speed (page size must be set before
+        # creating any tables)
+        con.execute("PRAGMA page_size=65536")
         con.execute("PRAGMA synchronous=OFF")
         con.execute("PRAGMA locking_mode=EXCLUSIVE")
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA cache_size=-65536")  # i.e. 64MB
         # Don't index the key column until the end (faster)
         # con.execute("CREATE TABLE offset_data (key TEXT PRIMARY KEY, "
         #             "offset INTEGER);")
@@ -593,6 +747,58 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             "CREATE TABLE file_data (file_number INTEGER, name TEXT);")
         con.execute("CREATE TABLE offset_data (key TEXT, "
                     "file_number INTEGER, offset INTEGER, length INTEGER);")
+        pool = None
+        scanned = None
+        if processes > 1 and len(filenames) > 1:
+            # Only import this if needed (e.g. not available on Jython)
+            import multiprocessing
+            pool = multiprocessing.Pool(processes)
+            # Results come back in the order of the files:
+            scanned = pool.imap(_scan_offsets,
+                                [(proxy_factory, format, filename)
+                                 for filename in filenames])
+        try:
+            count = self._insert_offsets(scanned)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        self._length = count
+        # print("About to index %i entries" % count)
+        try:
+            con.execute("CREATE UNIQUE INDEX IF NOT EXISTS "
+                        "key_index ON offset_data(key);")
+        except _IntegrityError as err:
+            self.close()
+            con.close()
+            raise ValueError("Duplicate key? %s" % err)
+        con.execute("UPDATE meta_data SET value = ? WHERE key = ?;",
+                    (count, "count"))
+        con.commit()
+        # Back to a rollback journal, so that using the index later does not
+        # need write access to create the WAL files:
+        con.execute("PRAGMA journal_mode=DELETE")
+        con.execute("PRAGMA locking_mode=NORMAL")
+        # print("Index created")
+
+    def _insert_offsets(self, scanned=None):
+        """Called from _build_index to add the files and offsets (PRIVATE).
+
+        If given, scanned should be an iterator giving the list of (key,
+        offset, length) tuples for each file (from the worker processes),
+        otherwise each file is scanned here. Returns the number of records.
+        """
+        con = self._con
+        index_filename = self._index_filename
+        relative_path = self._relative_path
+        filenames = self._filenames
+        format = self._format
+        key_function = self._key_function
+        proxy_factory = self._proxy_factory
+        max_open = self._max_open
+        batch_size = self._batch_size
+        progress = self._progress
+        random_access_proxies = self._proxies
         count = 0
         for i, filename in enumerate(filenames):
             # Default to storing as an absolute path,
@@ -614,15 +820,20 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             con.execute(
                 "INSERT INTO file_data (file_number, name) VALUES (?,?);",
                 (i, f))
-            random_access_proxy = proxy_factory(format, filename)
+            if scanned is None:
+                random_access_proxy = proxy_factory(format, filename)
+                offsets = random_access_proxy
+            else:
+                random_access_proxy = None
+                offsets = next(scanned)
             if key_function:
                 offset_iter = ((key_function(k), i, o, l)
-                               for (k, o, l) in random_access_proxy)
+                               for (k, o, l) in offsets)
             else:
                 offset_iter = ((k, i, o, l)
-                               for (k, o, l) in random_access_proxy)
+                               for (k, o, l) in offsets)
             while True:
-                batch = list(itertools.islice(offset_iter, 100))
+                batch = list(itertools.islice(offset_iter, batch_size))
                 if not batch:
                     break
                 # print("Inserting batch of %i offsets, %s ... %s"
@@ -630,27 +841,17 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
                 con.executemany(
                     "INSERT INTO offset_data (key,file_number,offset,length) VALUES (?,?,?,?);",
                     batch)
-                con.commit()
                 count += len(batch)
-            if len(random_access_proxies) < max_open:
+            con.commit()
+            if random_access_proxy is None:
+                pass
+            elif len(random_access_proxies) < max_open:
                 random_access_proxies[i] = random_access_proxy
             else:
                 random_access_proxy._handle.close()
-        self._length = count
-        # print("About to index %i entries" % count)
-        try:
-            con.execute("CREATE UNIQUE INDEX IF NOT EXISTS "
-                        "key_index ON offset_data(key);")
-        except _IntegrityError as err:
-            self._proxies = random_access_proxies
-            self.close()
-            con.close()
-            raise ValueError("Duplicate key? %s" % err)
-        con.execute("PRAGMA locking_mode=NORMAL")
-        con.execute("UPDATE meta_data SET value = ? WHERE key = ?;",
-                    (count, "count"))
-        con.commit()
-        # print("Index created")
+            if progress:
+                progress(i + 1, len(filenames), count)
+        return count
 
     def __repr__(self):
         return self._repr
@@ -687,17 +888,7 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         if not row:
             raise KeyError
         file_number, offset = row
-        proxies = self._proxies
-        if file_number in proxies:
-            record = proxies[file_number].get(offset)
-        else:
-            if len(proxies) >= self._max_open:
-                # Close an old handle...
-                proxies.popitem()[1]._handle.close()
-            # Open a new handle...
-            proxy = self._proxy_factory(self._format, self._filenames[file_number])
-            record = proxy.get(offset)
-            proxies[file_number] = proxy
+        record = self._get_proxy(file_number).get(offset)
         if self._key_function:
             key2 = self._key_function(record.id)
         else:
@@ -713,6 +904,68 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         except KeyError:
             return d
 
+    def get_many(self, keys):
+        """Iterate over (key, record) tuples for the given keys.
+
+        The keys are looked up in bulk via a temporary table, and the
+        records are loaded sorted by file and offset (not in the order of
+        the keys given), making the disk reads sequential. Repeated keys
+        are only returned once. If any key is not found, a KeyError
+        exception is raised before any records are loaded.
+        """
+        con = self._con
+        batch_size = self._batch_size
+        _SQLiteManySeqFilesDict._temp_tables += 1
+        table = "temp_keys_%i" % _SQLiteManySeqFilesDict._temp_tables
+        con.execute("CREATE TEMP TABLE %s (key TEXT PRIMARY KEY);" % table)
+        try:
+            keys = iter(keys)
+            while True:
+                batch = [(k,) for k in itertools.islice(keys, batch_size)]
+                if not batch:
+                    break
+                con.executemany("INSERT OR IGNORE INTO %s (key) VALUES (?);"
+                                % table, batch)
+            row = con.execute("SELECT t.key FROM %s AS t LEFT JOIN "
+                              "offset_data AS o ON t.key = o.key "
+                              "WHERE o.key IS NULL LIMIT 1;"
+                              % table).fetchone()
+            if row:
+                raise KeyError(row[0])
+            # Fetch all the rows before loading any records, in case
+            # the caller uses the index while iterating:
+            rows = con.execute("SELECT o.key, o.file_number, o.offset "
+                               "FROM %s AS t JOIN offset_data AS o "
+                               "ON t.key = o.key ORDER BY o.file_number, "
+                               "o.offset;" % table).fetchall()
+        finally:
+            con.execute("DROP TABLE %s;" % table)
+        key_function = self._key_function
+        for key, file_number, offset in rows:
+            record = self._get_proxy(file_number).get(offset)
+            if key_function:
+                key2 = key_function(record.id)
+            else:
+                key2 = record.id
+            if key != key2:
+                raise ValueError("Key did not match (%s vs %s)" % (key, key2))
+            yield key, record
+
+    def _get_proxy(self, file_number):
+        """Return the proxy for a file, opening it if needed (PRIVATE)."""
+        proxies = self._proxies
+        try:
+            return proxies[file_number]
+        except KeyError:
+            if len(proxies) >= self._max_open:
+                # Close an old handle...
+                proxies.popitem()[1]._handle.close()
+            # Open a new handle...
+            proxy = self._proxy_factory(self._format,
+                                        self._filenames[file_number])
+            proxies[file_number] = proxy
+            return proxy
+
     def get_raw(self, key):
         """Return the raw record from the file as a bytes string.
 
@@ -9,13 +9,28 @@ import numpy
 import warnings
 import copy
 
-from Bio.PDB.Entity import DisorderedEntityWrapper
+from Bio.PDB.Entity import DisorderedEntityWrapper, _get_state, _intern
 from Bio.PDB.PDBExceptions import PDBConstructionWarning
 from Bio.PDB.Vector import Vector
 from Bio.Data import IUPACData
 
 
 class Atom(object):
+    """An atom, with its name, coordinates, B factor, occupancy, etc.
+
+    Large structures contain millions of atoms, so to save memory the
+    attributes are stored in slots, the atom and element names are interned
+    (shared between atoms), the full id is only computed when needed, and
+    the xtra dictionary is only created when first used.
+    """
+
+    __slots__ = ("parent", "name", "fullname", "_coord_in_store", "_coord",
+                 "bfactor", "occupancy", "altloc", "id", "disordered_flag",
+                 "anisou_array", "siguij_array", "sigatm_array",
+                 "serial_number", "_xtra", "element", "mass", "__weakref__")
+
+    level = "A"
+
     def __init__(self, name, coord, bfactor, occupancy, altloc, fullname, serial_number,
                  element=None):
         """Create Atom object.
@@ -47,27 +62,28 @@ class Atom(object):
         @param element: atom element, e.g. "C" for Carbon, "HG" for mercury,
         @type element: uppercase string (or None if unknown)
         """
-        self.level = "A"
         # Reference to the residue
         self.parent = None
         # the atomic data
+        name = _intern(name)
         self.name = name  # eg. CA, spaces are removed from atom name
-        self.fullname = fullname  # e.g. " CA ", spaces included
+        self.fullname = _intern(fullname)  # e.g. " CA ", spaces included
+        # True if the coordinates are a row of the structure's array
+        self._coord_in_store = False
         self.coord = coord
         self.bfactor = bfactor
         self.occupancy = occupancy
         self.altloc = altloc
-        self.full_id = None  # (structure id, model id, chain id, residue id, atom id)
         self.id = name  # id of atom is the atom name (e.g. "CA")
         self.disordered_flag = 0
         self.anisou_array = None
         self.siguij_array = None
         self.sigatm_array = None
         self.serial_number = serial_number
-        # Dictionary that keeps additional properties
-        self.xtra = {}
+        # Dictionary that keeps additional properties (made when needed)
+        self._xtra = None
         assert not element or element == element.upper(), element
-        self.element = self._assign_element(element)
+        self.element = _intern(self._assign_element(element))
         self.mass = self._assign_atom_mass()
 
     def _assign_element(self, element):
@@ -108,6 +124,15 @@ class Atom(object):
 
     # Special methods
 
+    def __getstate__(self):
+        """Return the state for pickling and copying.
+
+        The copy has its own coordinates, not part of a structure's array.
+        """
+        state, slots = _get_state(self)
+        slots["_coord_in_store"] = False
+        return state, slots
+
     def __repr__(self):
         """Print Atom object as <Atom atom_name>."""
         return "<Atom %s>" % self.get_id()
@@ -124,6 +149,45 @@ class Atom(object):
         diff = self.coord - other.coord
         return numpy.sqrt(numpy.dot(diff, diff))
 
+    @property
+    def coord(self):
+        """Atomic coordinates, as a NumPy array of size 3.
+
+        If the coordinate array of the structure has been made (see the
+        get_coords method of Structure and the other entities), this is
+        a view of the row for this atom, and setting new coordinates
+        updates the row in place.
+        """
+        return self._coord
+
+    @coord.setter
+    def coord(self, value):
+        if self._coord_in_store:
+            self._coord[:] = value
+        else:
+            self._coord = value
+
+    @property
+    def xtra(self):
+        """Dictionary of additional properties (created when first used)."""
+        if self._xtra is None:
+            self._xtra = {}
+        return self._xtra
+
+    @xtra.setter
+    def xtra(self, value):
+        self._xtra = value
+
+    @property
+    def full_id(self):
+        """Full id of the atom (computed each time, None without a parent).
+
+        See the get_full_id method.
+        """
+        if self.parent is None:
+            return None
+        return self.get_full_id()
+
     # set methods
 
     def set_serial_number(self, n):
@@ -286,7 +350,8 @@ class Atom(object):
         shallow = copy.copy(self)
         shallow.detach_parent()
         shallow.set_coord(copy.copy(self.get_coord()))
-        shallow.xtra = self.xtra.copy()
+        if self._xtra is not None:
+            shallow._xtra = self._xtra.copy()
         return shallow
 
 
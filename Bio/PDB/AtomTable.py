@@ -0,0 +1,190 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tables of atoms as NumPy structured arrays, and structures built from them.
+
+Parsing a PDB file into a Structure object creates Python objects for every
+atom, residue, chain and model, which is slow and needs a lot of memory when
+all you want is, for example, the coordinates and B factors of the atoms in
+many files. The get_atom_table method of the PDBParser instead returns the
+atoms as a table, a NumPy structured array with one row per atom:
+
+>>> from Bio.PDB import PDBParser
+>>> table = PDBParser().get_atom_table("PDB/1A8O.pdb")
+>>> len(table)
+644
+>>> print("%s %s %i %s" % (table["chain"][1], table["resname"][1],
+...                        table["resseq"][1], table["name"][1]))
+A MSE 151 CA
+>>> table["coord"].shape
+(644, 3)
+
+The columns are described by atom_table_dtype (see below), and can be used
+with the usual NumPy operations. For example, to select the alpha carbons:
+
+>>> ca_atoms = table[table["name"] == "CA"]
+>>> len(ca_atoms)
+70
+
+When needed, the build_structure function turns a table (or a selection of
+its rows) into a Structure, as PDBParser.get_structure would have done:
+
+>>> from Bio.PDB.AtomTable import build_structure
+>>> structure = build_structure("1A8O", ca_atoms)
+>>> len(list(structure.get_atoms()))
+70
+
+The columns of atom_table_dtype are:
+
+ - model - model id, numbered from 0 in the order of the models.
+ - model_serial - model serial number, from the MODEL record.
+ - hetero - hetero flag of the residue: " ", "H" (hetero residue) or
+   "W" (water).
+ - serial_number - atom serial number.
+ - name - atom name, normally without spaces (e.g. "CA").
+ - fullname - atom name with spaces (e.g. " CA ").
+ - altloc - alternative location specifier.
+ - resname - residue name.
+ - chain - chain id.
+ - resseq - residue sequence number.
+ - icode - insertion code.
+ - coord - the x, y and z coordinates.
+ - occupancy - occupancy (NaN if missing).
+ - bfactor - isotropic B factor.
+ - segid - segment id.
+ - element - element symbol, upper case.
+"""
+
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio.PDB.PDBExceptions import PDBConstructionException
+from Bio.PDB.PDBExceptions import PDBConstructionWarning
+from Bio.PDB.StructureBuilder import StructureBuilder
+
+
+atom_table_dtype = numpy.dtype([
+    ("model", numpy.int32),
+    ("model_serial", numpy.int32),
+    ("hetero", "U1"),
+    ("serial_number", numpy.int32),
+    ("name", "U4"),
+    ("fullname", "U4"),
+    ("altloc", "U1"),
+    ("resname", "U3"),
+    ("chain", "U1"),
+    ("resseq", numpy.int32),
+    ("icode", "U1"),
+    ("coord", numpy.float32, (3,)),
+    ("occupancy", numpy.float64),
+    ("bfactor", numpy.float64),
+    ("segid", "U4"),
+    ("element", "U2"),
+])
+
+
+def build_structure(structure_id, table, structure_builder=None,
+                    permissive=True, anisou=None):
+    """Build a Structure object from a table of atoms.
+
+    Arguments:
+     - structure_id - string, the id that will be used for the structure
+     - table - NumPy structured array with the fields of atom_table_dtype
+       (other fields are ignored, and the string fields can be longer)
+     - structure_builder - an optional user implemented StructureBuilder
+       object
+     - permissive - Evaluated as a Boolean. If true (DEFAULT), exceptions
+       in constructing the SMCRA data structure are shown as warnings
+       (and some residues or atoms will be missing), as in the PDBParser.
+     - anisou - optional N by 6 array of the anisotropic B factors of the
+       N atoms in the table.
+
+    The atoms of each model, chain and residue should be together in the
+    table, as in a PDB file.
+    """
+    if structure_builder is None:
+        structure_builder = StructureBuilder()
+    structure_builder.init_structure(structure_id)
+    if anisou is not None:
+        anisou = numpy.array(anisou, "f").reshape(len(table), 6)
+    coords = numpy.array(table["coord"], "f").reshape(len(table), 3)
+    columns = [table[name].tolist() for name in (
+        "model", "model_serial", "segid", "chain", "hetero", "resname",
+        "resseq", "icode", "name", "fullname", "altloc", "serial_number",
+        "occupancy", "bfactor", "element")]
+    current_model = None
+    current_segid = None
+    current_chain = None
+    current_residue = None
+    for index, (model, model_serial, segid, chain, hetero, resname,
+                resseq, icode, name, fullname, altloc, serial_number,
+                occupancy, bfactor, element) in enumerate(zip(*columns)):
+        if model != current_model:
+            current_model = model
+            structure_builder.init_model(model, model_serial)
+            current_chain = None
+            current_residue = None
+        if segid != current_segid:
+            current_segid = segid
+            structure_builder.init_seg(segid)
+        residue = (hetero, resseq, icode, resname)
+        if chain != current_chain or residue != current_residue:
+            if chain != current_chain:
+                current_chain = chain
+                structure_builder.init_chain(chain)
+            current_residue = residue
+            try:
+                structure_builder.init_residue(resname, hetero, resseq, icode)
+            except PDBConstructionException as message:
+                _handle_exception(message, index, permissive)
+        if occupancy != occupancy:
+            # Missing occupancy (NaN), as in the PDBParser
+            occupancy = None
+        try:
+            structure_builder.init_atom(name, coords[index], bfactor,
+                                        occupancy, altloc, fullname,
+                                        serial_number, element)
+        except PDBConstructionException as message:
+            _handle_exception(message, index, permissive)
+        if anisou is not None:
+            structure_builder.set_anisou(anisou[index])
+    return structure_builder.get_structure()
+
+
+def _make_table(columns, size):
+    """Make an atom table from a dictionary of its columns (PRIVATE).
+
+    The string fields are made wider than in atom_table_dtype if needed
+    to hold the values in the columns.
+    """
+    columns = dict((name, numpy.asarray(column))
+                   for name, column in columns.items())
+    fields = []
+    for name in atom_table_dtype.names:
+        dtype = atom_table_dtype.fields[name][0]
+        if dtype.kind == "U" and columns[name].dtype.kind == "U":
+            dtype = max(dtype, columns[name].dtype, key=lambda t: t.itemsize)
+        fields.append((name, dtype))
+    table = numpy.empty(size, fields)
+    for name in atom_table_dtype.names:
+        table[name] = columns[name]
+    return table
+
+
+def _handle_exception(message, index, permissive):
+    """Warn about, or raise, an exception building a structure (PRIVATE)."""
+    message = "%s at atom %i of the table." % (message, index)
+    if permissive:
+        warnings.warn("PDBConstructionException: %s\n"
+                      "Exception ignored.\n"
+                      "Some atoms or residues may be missing in the data structure."
+                      % message, PDBConstructionWarning)
+    else:
+        raise PDBConstructionException(message)
@@ -9,8 +9,10 @@ from Bio.PDB.Entity import Entity
 
 
 class Chain(Entity):
+
+    level = "C"
+
     def __init__(self, id):
-        self.level = "C"
         Entity.__init__(self, id)
 
     # Private methods
@@ -6,10 +6,27 @@
 """Base class for Residue, Chain, Model and Structure classes.
 
 It is a simple container class, with list and dictionary like properties.
+
+The coordinates of all the atoms in a structure (or more generally, under
+the top level entity) can be read and changed at once as an N by 3 NumPy
+array with the get_coords and set_coords methods, and moved with transform.
+This uses a single array for the whole structure, which is created when
+first needed, with the coordinates of each atom being a view of one row.
+Any change to the hierarchy (adding or removing children, or selecting
+another child of a disordered entity) discards the array, and a new one is
+made when next needed.
 """
 
 from copy import copy
 
+import numpy
+
+try:
+    from sys import intern
+except ImportError:
+    # Python 2, where intern is a builtin
+    pass
+
 from Bio.PDB.PDBExceptions import PDBConstructionException
 
 
@@ -18,7 +35,15 @@ class Entity(object):
 
     Structure, Model, Chain and Residue are subclasses of Entity.
     It deals with storage and lookup.
+
+    To save memory with very large structures, the attributes are stored
+    in slots (Residue also uses slots, while Structure, Model and Chain
+    objects have an instance dictionary as usual).
     """
+
+    __slots__ = ("_id", "full_id", "parent", "child_list", "child_dict",
+                 "xtra", "_coord_store", "__weakref__")
+
     def __init__(self, id):
         self._id = id
         self.full_id = None
@@ -27,6 +52,8 @@ class Entity(object):
         self.child_dict = {}
         # Dictionary that keeps additional properties
         self.xtra = {}
+        # Coordinate array of the atoms (if this is the top level entity)
+        self._coord_store = None
 
     # Special methods
 
@@ -51,6 +78,16 @@ class Entity(object):
         for child in self.child_list:
             yield child
 
+    def __getstate__(self):
+        """Return the state for pickling and copying.
+
+        The coordinate array is left out, as the atoms of a copy have their
+        own coordinates.
+        """
+        state, slots = _get_state(self)
+        slots["_coord_store"] = None
+        return state, slots
+
     # Private methods
 
     def _reset_full_id(self):
@@ -68,6 +105,44 @@ class Entity(object):
                 pass  # Atoms do not cache their full ids.
         self.full_id = None
 
+    def _reset_coord_store(self):
+        """Discard the coordinate array of the top level entity (PRIVATE).
+
+        Called whenever the atoms under the top level entity change.
+        """
+        entity = self
+        while entity.parent is not None:
+            entity = entity.parent
+        entity._coord_store = None
+
+    def _get_coord_rows(self):
+        """Return the rows of the coordinate array for this entity (PRIVATE).
+
+        The coordinate array of the top level entity is created if needed,
+        and the rows for the atoms of this entity are returned as a view.
+        Returns None for an entity not included in the array, i.e. a
+        residue of a DisorderedResidue which is not the selected one.
+        """
+        top = self
+        while top.parent is not None:
+            top = top.parent
+        if top._coord_store is None:
+            atoms = []
+            ranges = {}
+            _collect_atoms(top, atoms, ranges)
+            coords = numpy.array([atom.coord for atom in atoms], float)
+            coords = coords.reshape(len(atoms), 3)
+            for atom, row in zip(atoms, coords):
+                atom._coord = row
+                atom._coord_in_store = True
+            top._coord_store = (coords, ranges)
+        coords, ranges = top._coord_store
+        try:
+            start, end = ranges[self]
+        except KeyError:
+            return None
+        return coords[start:end]
+
     # Public methods
 
     @property
@@ -120,6 +195,7 @@ class Entity(object):
         child.detach_parent()
         del self.child_dict[id]
         self.child_list.remove(child)
+        self._reset_coord_store()
 
     def add(self, entity):
         """Add a child to the Entity."""
@@ -130,6 +206,7 @@ class Entity(object):
         entity.set_parent(self)
         self.child_list.append(entity)
         self.child_dict[entity_id] = entity
+        self._reset_coord_store()
 
     def insert(self, pos, entity):
         """Add a child to the Entity at a specified position."""
@@ -140,6 +217,7 @@ class Entity(object):
         entity.set_parent(self)
         self.child_list[pos:pos] = [entity]
         self.child_dict[entity_id] = entity
+        self._reset_coord_store()
 
     def get_iterator(self):
         """Return iterator over children."""
@@ -208,9 +286,75 @@ class Entity(object):
 
         @param tran: the translation vector
         @type tran: size 3 Numeric array
+
+        All the atoms are moved at once using the coordinate array of the
+        structure (see get_coords).
         """
-        for o in self.get_list():
-            o.transform(rot, tran)
+        rows = self._get_coord_rows()
+        if rows is None:
+            for o in self.get_list():
+                o.transform(rot, tran)
+        else:
+            rows[:] = numpy.dot(rows, rot) + tran
+
+    def get_coords(self):
+        """Return the coordinates of all the atoms as an N by 3 array.
+
+        The rows follow the order of the atoms when iterating over the
+        entity (e.g. Structure.get_atoms), using the selected atom for any
+        disordered atom. A new array is returned, so changing it does not
+        move the atoms (use set_coords for that):
+
+        >>> import warnings
+        >>> from Bio.PDB import PDBParser
+        >>> from Bio.PDB.PDBExceptions import PDBConstructionWarning
+        >>> with warnings.catch_warnings():
+        ...     warnings.simplefilter("ignore", PDBConstructionWarning)
+        ...     structure = PDBParser().get_structure("1A8O", "PDB/1A8O.pdb")
+        ...
+        >>> atom = next(structure.get_atoms())
+        >>> print("%0.3f" % atom.coord[2])
+        28.012
+        >>> coords = structure.get_coords()
+        >>> coords.shape
+        (644, 3)
+        >>> coords[:, 2] += 10.0
+        >>> structure.set_coords(coords)
+        >>> print("%0.3f" % atom.coord[2])
+        38.012
+
+        Once the coordinate array of a structure exists, getting or setting
+        the coordinates of any of its entities only takes a slice of it,
+        so this is much faster than looping over the atoms.
+        """
+        rows = self._get_coord_rows()
+        if rows is None:
+            atoms = []
+            _collect_atoms(self, atoms, {})
+            return numpy.array([atom.coord for atom in atoms],
+                               float).reshape(len(atoms), 3)
+        return rows.copy()
+
+    def set_coords(self, coords):
+        """Set the coordinates of all the atoms from an N by 3 array.
+
+        The rows should be in the same order as given by get_coords.
+        """
+        coords = numpy.asarray(coords, float)
+        rows = self._get_coord_rows()
+        if rows is None:
+            atoms = []
+            _collect_atoms(self, atoms, {})
+            if coords.shape != (len(atoms), 3):
+                raise ValueError("Expected %i by 3 coordinates, got shape %r"
+                                 % (len(atoms), coords.shape))
+            for atom, coord in zip(atoms, coords):
+                atom.coord = coord.copy()
+        else:
+            if coords.shape != rows.shape:
+                raise ValueError("Expected %i by 3 coordinates, got shape %r"
+                                 % (len(rows), coords.shape))
+            rows[:] = coords
 
     def copy(self):
         shallow = copy(self)
@@ -226,6 +370,52 @@ class Entity(object):
         return shallow
 
 
+def _intern(value):
+    """Return the interned string, so equal strings share memory (PRIVATE).
+
+    Used for the atom and residue names, which are repeated many times in
+    a structure. Other values (e.g. unicode strings on Python 2) are returned
+    unchanged.
+    """
+    if type(value) is str:
+        return intern(value)
+    return value
+
+
+def _get_state(obj):
+    """Return the instance dictionary (if any) and slot values (PRIVATE).
+
+    This is the state used for pickling and copying objects with slots.
+    """
+    slots = {}
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if name != "__weakref__" and hasattr(obj, name):
+                slots[name] = getattr(obj, name)
+    return getattr(obj, "__dict__", None), slots
+
+
+def _collect_atoms(entity, atoms, ranges):
+    """Add the atoms of an entity to a list and note their range (PRIVATE).
+
+    The ranges dictionary maps each entity visited to the start and end of
+    its atoms in the list. For disordered atoms and residues, the selected
+    child is used.
+    """
+    start = len(atoms)
+    if entity.get_level() == "R":
+        for atom in entity:
+            if atom.is_disordered() == 2:
+                atom = atom.disordered_get()
+            atoms.append(atom)
+    else:
+        for child in entity:
+            _collect_atoms(child, atoms, ranges)
+    ranges[entity] = (start, len(atoms))
+    if isinstance(entity, DisorderedEntityWrapper):
+        ranges[entity.disordered_get()] = ranges[entity]
+
+
 class DisorderedEntityWrapper(object):
     """
     This class is a simple wrapper class that groups a number of equivalent
@@ -246,8 +436,9 @@ class DisorderedEntityWrapper(object):
 
     def __getattr__(self, method):
         """Forward the method call to the selected child."""
-        if method == '__setstate__':
-            # Avoid issues with recursion when attempting deepcopy
+        if method in ('__getstate__', '__setstate__', '__slots__'):
+            # Avoid issues with recursion when attempting deepcopy, and
+            # using the state or slots of the selected child
             raise AttributeError
         if not hasattr(self, 'selected_child'):
             # Avoid problems with pickling
@@ -313,6 +504,8 @@ class DisorderedEntityWrapper(object):
         Uncaught method calls are forwarded to the selected child object.
         """
         self.selected_child = self.child_dict[id]
+        if self.parent is not None:
+            self.parent._reset_coord_store()
 
     def disordered_add(self, child):
         """This is implemented by DisorderedAtom and DisorderedResidue."""
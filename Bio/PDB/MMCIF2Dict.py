@@ -16,16 +16,20 @@ import shlex
 class MMCIF2Dict(dict):
     """Parse a mmCIF file and return a dictionary."""
 
-    def __init__(self, filename):
+    def __init__(self, filename, categories=None):
         """Parse a mmCIF file and return a dictionary.
 
         Arguments:
          - file - name of the PDB file OR an open filehandle
+         - categories - optional list of the categories to read, e.g.
+           ["_atom_site", "_cell"]; the lines of the other categories are
+           skipped without being split into tokens, which is much faster.
+           By default (None) all categories are read.
         """
         with as_handle(filename) as handle:
             loop_flag = False
             key = None
-            tokens = self._tokenize(handle)
+            tokens = self._tokenize(handle, categories)
             token = next(tokens)
             self[token[0:5]] = token[5:]
             i = 0
@@ -58,7 +62,14 @@ class MMCIF2Dict(dict):
 
     # Private methods
 
-    def _tokenize(self, handle):
+    def _tokenize(self, handle, categories=None):
+        if categories is not None:
+            categories = set("_" + category.lstrip("_")
+                             for category in categories)
+        # Skipping the lines of an unwanted category?
+        skip = False
+        # A loop_ not yet known to be for a wanted category
+        loop_pending = False
         for line in handle:
             if line.startswith("#"):
                 continue
@@ -69,11 +80,27 @@ class MMCIF2Dict(dict):
                     if line == ';':
                         break
                     token += line
-                yield token
-            else:
-                tokens = shlex.split(line)
-                for token in tokens:
+                if not skip:
                     yield token
+                continue
+            elif categories is not None:
+                if line.startswith("loop_"):
+                    loop_pending = True
+                    skip = False
+                    continue
+                elif line.startswith("_"):
+                    category = line.split(".", 1)[0]
+                    skip = category not in categories
+                    if loop_pending and not skip:
+                        yield "loop_"
+                    loop_pending = False
+                elif line.startswith("data_"):
+                    skip = False
+                if skip:
+                    continue
+            tokens = shlex.split(line)
+            for token in tokens:
+                yield token
 
 
 if __name__ == "__main__":
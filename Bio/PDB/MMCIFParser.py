@@ -8,17 +8,23 @@
 from __future__ import print_function
 
 import numpy
+import re
 import warnings
 
 from Bio.File import as_handle
 from Bio._py3k import range
 
+from Bio.PDB.AtomTable import build_structure, _make_table
 from Bio.PDB.MMCIF2Dict import MMCIF2Dict
 from Bio.PDB.StructureBuilder import StructureBuilder
 from Bio.PDB.PDBExceptions import PDBConstructionException
 from Bio.PDB.PDBExceptions import PDBConstructionWarning
 
 
+# A quoted mmCIF value ends at the quote followed by whitespace
+_quoted_token = re.compile(r"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(\S+)""")
+
+
 class MMCIFParser(object):
     """Parse a mmCIF file and return a Structure object."""
 
@@ -222,8 +228,9 @@ class FastMMCIFParser(object):
         StructureBuilder object, the latter is used instead.
 
         The main difference between this class and the regular MMCIFParser is
-        that only 'ATOM' and 'HETATM' lines are parsed here. Use if you are
-        interested only in coordinate information.
+        that only the _atom_site loop is parsed here, streaming its columns
+        into NumPy arrays rather than building a dictionary of the whole
+        file. Use if you are interested only in coordinate information.
 
         Arguments:
          - structure_builder - an optional user implemented StructureBuilder class.
@@ -253,180 +260,182 @@ class FastMMCIFParser(object):
             if self.QUIET:
                 warnings.filterwarnings("ignore", category=PDBConstructionWarning)
             with as_handle(filename) as handle:
-                self._build_structure(structure_id, handle)
-
-        return self._structure_builder.get_structure()
-
-    # Private methods
-
-    def _build_structure(self, structure_id, filehandle):
-
-        # Read only _atom_site. and atom_site_anisotrop entries
-        read_atom, read_aniso = False, False
-        _fields, _records = [], []
-        _anisof, _anisors = [], []
-        for line in filehandle:
-            if line.startswith('_atom_site.'):
-                read_atom = True
-                _fields.append(line.strip())
-            elif line.startswith('_atom_site_anisotrop.'):
-                read_aniso = True
-                _anisof.append(line.strip())
-            elif read_atom and line.startswith('#'):
-                read_atom = False
-            elif read_aniso and line.startswith('#'):
-                read_aniso = False
-            elif read_atom:
-                _records.append(line.strip())
-            elif read_aniso:
-                _anisors.append(line.strip())
+                table, anisou = self._parse_atom_site(handle)
+            structure = build_structure(structure_id, table,
+                                        self._structure_builder,
+                                        permissive=False, anisou=anisou)
 
-        # Dumping the shlex module here since this particular
-        # category should be rather straightforward.
-        # Quite a performance boost..
-        _record_tbl = zip(*map(str.split, _records))
-        _anisob_tbl = zip(*map(str.split, _anisors))
+        return structure
 
-        mmcif_dict = dict(zip(_fields, _record_tbl))
-        mmcif_dict.update(dict(zip(_anisof, _anisob_tbl)))
+    def get_atom_table(self, filename):
+        """Return the atoms as a table (NumPy structured array).
 
-        # Build structure object
-        atom_id_list = mmcif_dict["_atom_site.label_atom_id"]
-        residue_id_list = mmcif_dict["_atom_site.label_comp_id"]
+        Arguments:
+         - filename - name of the mmCIF file OR an open filehandle
 
-        try:
-            element_list = mmcif_dict["_atom_site.type_symbol"]
-        except KeyError:
-            element_list = None
+        The table has one row per atom of the _atom_site loop, with the
+        fields of Bio.PDB.AtomTable.atom_table_dtype (the string fields may
+        be wider, e.g. for chain ids of more than one character), taking
+        the values get_structure would use. Use the build_structure function
+        in Bio.PDB.AtomTable to turn the table into a Structure object.
+        """
+        with as_handle(filename) as handle:
+            table, anisou = self._parse_atom_site(handle)
+        return table
 
-        seq_id_list = mmcif_dict["_atom_site.label_seq_id"]
-        chain_id_list = mmcif_dict["_atom_site.auth_asym_id"]
+    # Private methods
 
-        x_list = [float(x) for x in mmcif_dict["_atom_site.Cartn_x"]]
-        y_list = [float(x) for x in mmcif_dict["_atom_site.Cartn_y"]]
-        z_list = [float(x) for x in mmcif_dict["_atom_site.Cartn_z"]]
-        alt_list = mmcif_dict["_atom_site.label_alt_id"]
-        icode_list = mmcif_dict["_atom_site.pdbx_PDB_ins_code"]
-        b_factor_list = mmcif_dict["_atom_site.B_iso_or_equiv"]
-        occupancy_list = mmcif_dict["_atom_site.occupancy"]
-        fieldname_list = mmcif_dict["_atom_site.group_PDB"]
+    def _parse_atom_site(self, handle, chunk_size=10000):
+        """Read the _atom_site loop into an atom table (PRIVATE).
 
-        try:
-            serial_list = [int(n) for n in mmcif_dict["_atom_site.pdbx_PDB_model_num"]]
-        except KeyError:
-            # No model number column
-            serial_list = None
-        except ValueError:
-            # Invalid model number (malformed file)
-            raise PDBConstructionException("Invalid model number")
+        The lines are split into tokens and converted to NumPy arrays in
+        chunks of chunk_size rows, so the strings for the whole loop are
+        never held in memory at once. Returns the table and an N by 6
+        array of the anisotropic B factors (or None if not in the file).
+        """
+        fields = []
+        columns = {}
+        tokens = []
+        read_atom = False
+        for line in handle:
+            if line.startswith("_atom_site."):
+                field = line.split(None, 1)[0][11:]
+                fields.append(field)
+                if field in _atom_site_fields:
+                    columns[field] = []
+                read_atom = True
+            elif read_atom:
+                if line.startswith(("#", "_", "loop_", "data_")):
+                    break
+                if '"' in line or "'" in line:
+                    tokens.extend("".join(token) for token
+                                  in _quoted_token.findall(line))
+                else:
+                    tokens.extend(line.split())
+                if len(tokens) >= chunk_size * len(fields):
+                    tokens = _add_chunk(fields, columns, tokens)
+        if not fields:
+            raise PDBConstructionException("No _atom_site loop found")
+        tokens = _add_chunk(fields, columns, tokens)
+        if tokens:
+            raise PDBConstructionException(
+                "Incomplete row in the _atom_site loop")
+        for field, chunks in columns.items():
+            if any(chunk.dtype.kind == "U" for chunk in chunks):
+                # Some values could not be converted, keep them all as strings
+                chunks = [chunk.astype(str) for chunk in chunks]
+            if chunks:
+                columns[field] = numpy.concatenate(chunks)
+            else:
+                columns[field] = numpy.array([], _atom_site_fields[field])
+        size = len(columns["label_atom_id"])
 
+        def numbers(field, message):
+            dtype = _atom_site_fields[field]
+            try:
+                # Already converted, unless some values were invalid
+                return columns[field].astype(dtype)
+            except ValueError:
+                raise PDBConstructionException(message)
+
+        table = {}
+        if "pdbx_PDB_model_num" in columns:
+            serial = numbers("pdbx_PDB_model_num", "Invalid model number")
+            # As in MMCIFParser, a new model whenever the serial changes
+            new_model = numpy.ones(size, bool)
+            new_model[1:] = serial[1:] != serial[:-1]
+            table["model"] = numpy.cumsum(new_model) - 1
+            table["model_serial"] = serial
+        else:
+            table["model"] = 0
+            table["model_serial"] = 0
+        table["hetero"] = numpy.where(columns["group_PDB"] == "HETATM",
+                                      "H", " ")
         try:
-            aniso_u11 = mmcif_dict["_atom_site.aniso_U[1][1]"]
-            aniso_u12 = mmcif_dict["_atom_site.aniso_U[1][2]"]
-            aniso_u13 = mmcif_dict["_atom_site.aniso_U[1][3]"]
-            aniso_u22 = mmcif_dict["_atom_site.aniso_U[2][2]"]
-            aniso_u23 = mmcif_dict["_atom_site.aniso_U[2][3]"]
-            aniso_u33 = mmcif_dict["_atom_site.aniso_U[3][3]"]
-            aniso_flag = 1
-        except KeyError:
-            # no anisotropic B factors
-            aniso_flag = 0
-
+            table["serial_number"] = columns["id"].astype(numpy.int32)
+        except (KeyError, ValueError):
+            table["serial_number"] = 0
+        table["name"] = table["fullname"] = columns["label_atom_id"]
+        altloc = columns["label_alt_id"]
+        table["altloc"] = numpy.where(altloc == ".", " ", altloc)
+        table["resname"] = columns["label_comp_id"]
+        table["chain"] = columns["auth_asym_id"]
         # if auth_seq_id is present, we use this.
         # Otherwise label_seq_id is used.
-        if "_atom_site.auth_seq_id" in mmcif_dict:
-            seq_id_list = mmcif_dict["_atom_site.auth_seq_id"]
+        if "auth_seq_id" in columns:
+            seq_id = "auth_seq_id"
         else:
-            seq_id_list = mmcif_dict["_atom_site.label_seq_id"]
-
-        # Now loop over atoms and build the structure
-        current_chain_id = None
-        current_residue_id = None
-        current_resname = None
-        structure_builder = self._structure_builder
-        structure_builder.init_structure(structure_id)
-        structure_builder.init_seg(" ")
-
-        # Historically, Biopython PDB parser uses model_id to mean array index
-        # so serial_id means the Model ID specified in the file
-        current_model_id = -1
-        current_serial_id = -1
-        for i in range(0, len(atom_id_list)):
-
-            # set the line_counter for 'ATOM' lines only and not
-            # as a global line counter found in the PDBParser()
-            # this number should match the '_atom_site.id' index in the MMCIF
-            structure_builder.set_line_counter(i)
-
-            x = x_list[i]
-            y = y_list[i]
-            z = z_list[i]
-            resname = residue_id_list[i]
-            chainid = chain_id_list[i]
-            altloc = alt_list[i]
-            if altloc == ".":
-                altloc = " "
-            int_resseq = int(seq_id_list[i])
-            icode = icode_list[i]
-            if icode == "?":
-                icode = " "
-            name = atom_id_list[i].strip('"')  # Remove occasional " from quoted atom names (e.g. xNA)
-
-            # occupancy & B factor
-            try:
-                tempfactor = float(b_factor_list[i])
-            except ValueError:
-                raise PDBConstructionException("Invalid or missing B factor")
-
-            try:
-                occupancy = float(occupancy_list[i])
-            except ValueError:
-                raise PDBConstructionException("Invalid or missing occupancy")
-
-            fieldname = fieldname_list[i]
-            if fieldname == "HETATM":
-                hetatm_flag = "H"
-            else:
-                hetatm_flag = " "
-
-            resseq = (hetatm_flag, int_resseq, icode)
-
-            if serial_list is not None:
-                # model column exists; use it
-                serial_id = serial_list[i]
-                if current_serial_id != serial_id:
-                    # if serial changes, update it and start new model
-                    current_serial_id = serial_id
-                    current_model_id += 1
-                    structure_builder.init_model(current_model_id, current_serial_id)
-                    current_chain_id = None
-                    current_residue_id = None
-                    current_resname = None
-            else:
-                # no explicit model column; initialize single model
-                structure_builder.init_model(current_model_id)
-
-            if current_chain_id != chainid:
-                current_chain_id = chainid
-                structure_builder.init_chain(current_chain_id)
-                current_residue_id = None
-                current_resname = None
-
-            if current_residue_id != resseq or current_resname != resname:
-                current_residue_id = resseq
-                current_resname = resname
-                structure_builder.init_residue(resname, hetatm_flag, int_resseq, icode)
-
-            coord = numpy.array((x, y, z), 'f')
-            element = element_list[i] if element_list else None
-            structure_builder.init_atom(name, coord, tempfactor, occupancy, altloc,
-                name, element=element)
-            if aniso_flag == 1:
-                u = (aniso_u11[i], aniso_u12[i], aniso_u13[i],
-                    aniso_u22[i], aniso_u23[i], aniso_u33[i])
-                mapped_anisou = [float(x) for x in u]
-                anisou_array = numpy.array(mapped_anisou, 'f')
-                structure_builder.set_anisou(anisou_array)
+            seq_id = "label_seq_id"
+        table["resseq"] = numbers(seq_id, "Invalid or missing residue number")
+        icode = columns["pdbx_PDB_ins_code"]
+        table["icode"] = numpy.where(icode == "?", " ", icode)
+        table["coord"] = numpy.column_stack([
+            numbers(field, "Invalid or missing coordinate(s)")
+            for field in ("Cartn_x", "Cartn_y", "Cartn_z")])
+        table["occupancy"] = numbers("occupancy",
+                                     "Invalid or missing occupancy")
+        table["bfactor"] = numbers("B_iso_or_equiv",
+                                   "Invalid or missing B factor")
+        table["segid"] = " "
+        table["element"] = columns.get("type_symbol", "")
+        aniso_fields = ("aniso_U[1][1]", "aniso_U[1][2]", "aniso_U[1][3]",
+                        "aniso_U[2][2]", "aniso_U[2][3]", "aniso_U[3][3]")
+        if all(field in columns for field in aniso_fields):
+            anisou = numpy.column_stack([
+                numbers(field, "Invalid anisotropic B factor")
+                for field in aniso_fields])
+        else:
+            # no anisotropic B factors
+            anisou = None
+        return _make_table(table, size), anisou
+
+
+# The _atom_site fields used by FastMMCIFParser, with the type of their
+# values (None for strings)
+_atom_site_fields = {
+    "group_PDB": None,
+    "id": numpy.int32,
+    "type_symbol": None,
+    "label_atom_id": None,
+    "label_alt_id": None,
+    "label_comp_id": None,
+    "label_seq_id": numpy.int32,
+    "auth_seq_id": numpy.int32,
+    "auth_asym_id": None,
+    "pdbx_PDB_ins_code": None,
+    "Cartn_x": numpy.float32,
+    "Cartn_y": numpy.float32,
+    "Cartn_z": numpy.float32,
+    "occupancy": numpy.float64,
+    "B_iso_or_equiv": numpy.float64,
+    "pdbx_PDB_model_num": numpy.int32,
+    "aniso_U[1][1]": numpy.float32,
+    "aniso_U[1][2]": numpy.float32,
+    "aniso_U[1][3]": numpy.float32,
+    "aniso_U[2][2]": numpy.float32,
+    "aniso_U[2][3]": numpy.float32,
+    "aniso_U[3][3]": numpy.float32,
+}
+
+
+def _add_chunk(fields, columns, tokens):
+    """Add complete rows of tokens to the columns, return the rest (PRIVATE).
+
+    Each column is a list of NumPy arrays, one per chunk, converted to the
+    type in _atom_site_fields, or left as strings if that fails.
+    """
+    count = len(fields)
+    end = len(tokens) - len(tokens) % count
+    if end:
+        for index, field in enumerate(fields):
+            if field in columns:
+                values = tokens[index:end:count]
+                try:
+                    chunk = numpy.array(values, _atom_site_fields[field])
+                except ValueError:
+                    chunk = numpy.array(values)
+                columns[field].append(chunk)
+    return tokens[end:]
 
 
 if __name__ == "__main__":
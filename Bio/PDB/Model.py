@@ -16,13 +16,14 @@ class Model(Entity):
     normally contain many different models.
     """
 
+    level = "M"
+
     def __init__(self, id, serial_num=None):
         """
         Arguments:
         o id - int
         o serial_num - int
         """
-        self.level = "M"
         if serial_num is None:
             self.serial_num = id
         else:
@@ -95,6 +95,32 @@ class PDBParser(object):
         """Return the trailer."""
         return self.trailer
 
+    def get_atom_table(self, file):
+        """Return the atoms as a table (NumPy structured array).
+
+        Arguments:
+         - file - name of the PDB file OR an open filehandle
+
+        This is much faster than get_structure, and uses less memory, as no
+        Atom, Residue, Chain or Model objects are created. Instead the ATOM
+        and HETATM records are sliced column by column into a NumPy
+        structured array with one row per atom, and the fields described
+        by Bio.PDB.AtomTable.atom_table_dtype. The models are numbered
+        as in get_structure. The header, and any ANISOU, SIGUIJ and SIGATM
+        records, are ignored.
+
+        Use Bio.PDB.AtomTable.build_structure to turn the table (or some of
+        its rows) into a Structure object.
+        """
+        with warnings.catch_warnings():
+            if self.QUIET:
+                warnings.filterwarnings("ignore", category=PDBConstructionWarning)
+
+            with as_handle(file, mode='rU') as handle:
+                table = self._parse_atom_table(handle.readlines())
+
+        return table
+
     # Private methods
 
     def _parse(self, header_coords_trailer):
@@ -271,6 +297,142 @@ class PDBParser(object):
         self.line_counter = self.line_counter + local_line_counter
         return []
 
+    def _parse_atom_table(self, lines):
+        """Parse the ATOM and HETATM records into a table (PRIVATE)."""
+        from Bio.PDB.AtomTable import atom_table_dtype
+        atom_lines = []
+        line_numbers = []
+        # Index of the first atom, id and serial number of each model
+        models = []
+        current_model_id = 0
+        model_open = False
+        coordinates = False
+        for line_counter, line in enumerate(lines, 1):
+            record_type = line[0:6]
+            if record_type == "ATOM  " or record_type == "HETATM":
+                if not model_open:
+                    # There was no explicit MODEL record
+                    models.append((len(atom_lines), current_model_id,
+                                   current_model_id))
+                    current_model_id += 1
+                    model_open = True
+                atom_lines.append(line)
+                line_numbers.append(line_counter)
+                coordinates = True
+            elif record_type == "MODEL ":
+                try:
+                    serial_num = int(line[10:14])
+                except Exception:
+                    self._handle_PDB_exception("Invalid or missing model serial number",
+                                               line_counter)
+                    serial_num = 0
+                models.append((len(atom_lines), current_model_id, serial_num))
+                current_model_id += 1
+                model_open = True
+                coordinates = True
+            elif record_type == "ENDMDL":
+                model_open = False
+            elif (record_type == "END   " or record_type == "CONECT") \
+                    and coordinates:
+                break
+        table = numpy.zeros(len(atom_lines), atom_table_dtype)
+        if not atom_lines:
+            return table
+        # One row of character codes per line, without the line ends
+        codes = numpy.array(atom_lines, "U80").view(numpy.uint32)
+        codes = codes.reshape(len(atom_lines), 80)
+        codes[(codes == 10) | (codes == 13)] = 0
+
+        def column(start, end):
+            return numpy.ascontiguousarray(codes[:, start:end]).view(
+                "U%i" % (end - start)).ravel()
+
+        def number_column(start, end):
+            # Converting bytes to numbers is much faster than unicode
+            chars = numpy.where(codes[:, start:end] < 128,
+                                codes[:, start:end], 127).astype(numpy.uint8)
+            return chars.view("S%i" % (end - start)).ravel()
+
+        # As in get_structure, the segid is cut short with the line
+        table["segid"] = column(72, 76)
+        # The other columns are padded with spaces
+        codes[codes == 0] = 32
+
+        starts, ids, serials = zip(*models)
+        counts = numpy.diff(starts + (len(atom_lines),))
+        table["model"] = numpy.repeat(ids, counts)
+        table["model_serial"] = numpy.repeat(serials, counts)
+        try:
+            serial_number = number_column(6, 11).astype(numpy.int32)
+        except ValueError:
+            serial_number = numpy.zeros(len(atom_lines), numpy.int32)
+            for i, value in enumerate(number_column(6, 11).tolist()):
+                try:
+                    serial_number[i] = int(value)
+                except ValueError:
+                    pass
+        table["serial_number"] = serial_number
+        fullname = column(12, 16)
+        stripped = numpy.char.strip(fullname)
+        # Atom names with internal spaces, e.g. " N B ", are not stripped
+        keep = (stripped == "") | (numpy.char.find(stripped, " ") >= 0)
+        table["name"] = numpy.where(keep, fullname, stripped)
+        table["fullname"] = fullname
+        table["altloc"] = column(16, 17)
+        resname = column(17, 20)
+        table["resname"] = resname
+        water = (resname == "HOH") | (resname == "WAT")
+        table["hetero"] = numpy.where(column(0, 6) == "HETATM",
+                                      numpy.where(water, "W", "H"), " ")
+        table["chain"] = column(21, 22)
+        table["resseq"] = self._parse_table_column(
+            number_column(22, 26), numpy.int32, line_numbers,
+            "Invalid or missing residue number")
+        table["icode"] = column(26, 27)
+        for axis, (start, end) in enumerate(((30, 38), (38, 46), (46, 54))):
+            table["coord"][:, axis] = self._parse_table_column(
+                number_column(start, end), numpy.float32, line_numbers,
+                "Invalid or missing coordinate(s)")
+        occupancy = self._parse_table_column(
+            number_column(54, 60), numpy.float64, line_numbers,
+            "Invalid or missing occupancy", numpy.nan)
+        if (occupancy < 0).any():
+            warnings.warn("Negative occupancy in one or more atoms", PDBConstructionWarning)
+        table["occupancy"] = occupancy
+        table["bfactor"] = self._parse_table_column(
+            number_column(60, 66), numpy.float64, line_numbers,
+            "Invalid or missing B factor", 0.0)
+        table["element"] = numpy.char.upper(numpy.char.strip(column(76, 78)))
+        return table
+
+    def _parse_table_column(self, values, dtype, line_numbers, message,
+                            default=None):
+        """Convert a column of strings from the PDB file to numbers (PRIVATE).
+
+        Values which cannot be converted are an error if no default is
+        given, otherwise they are handled as by _handle_PDB_exception and
+        replaced by the default.
+        """
+        try:
+            return values.astype(dtype)
+        except ValueError:
+            pass
+        numbers = numpy.empty(len(values), dtype)
+        if numpy.issubdtype(numbers.dtype, numpy.integer):
+            convert = int
+        else:
+            convert = float
+        for i, value in enumerate(values.tolist()):
+            try:
+                numbers[i] = convert(value)
+            except ValueError:
+                if default is None:
+                    raise PDBConstructionException("%s at line %i."
+                                                   % (message, line_numbers[i]))
+                self._handle_PDB_exception(message, line_numbers[i])
+                numbers[i] = default
+        return numbers
+
     def _handle_PDB_exception(self, message, line_counter):
         """Handle exception (PRIVATE).
 
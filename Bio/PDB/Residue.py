@@ -7,7 +7,7 @@
 
 # My Stuff
 from Bio.PDB.PDBExceptions import PDBConstructionException
-from Bio.PDB.Entity import Entity, DisorderedEntityWrapper
+from Bio.PDB.Entity import Entity, DisorderedEntityWrapper, _intern
 
 
 _atom_name_dict = {}
@@ -20,11 +20,14 @@ _atom_name_dict["O"] = 4
 class Residue(Entity):
     """Represents a residue. A Residue object stores atoms."""
 
+    __slots__ = ("disordered", "resname", "segid")
+
+    level = "R"
+
     def __init__(self, id, resname, segid):
-        self.level = "R"
         self.disordered = 0
-        self.resname = resname
-        self.segid = segid
+        self.resname = _intern(resname)
+        self.segid = _intern(segid)
         Entity.__init__(self, id)
 
     # Special methods
@@ -12,8 +12,10 @@ class Structure(Entity):
     """
     The Structure class contains a collection of Model instances.
     """
+
+    level = "S"
+
     def __init__(self, id):
-        self.level = "S"
         Entity.__init__(self, id)
 
     # Special methods
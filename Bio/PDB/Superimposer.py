@@ -10,6 +10,7 @@ from __future__ import print_function
 import numpy
 
 from Bio.SVDSuperimposer import SVDSuperimposer
+from Bio.PDB.Entity import Entity
 from Bio.PDB.PDBExceptions import PDBException
 
 
@@ -48,11 +49,18 @@ class Superimposer(object):
     def apply(self, atom_list):
         """
         Rotate/translate a list of atoms.
+
+        Instead of a list of atoms, you can give an entity such as a whole
+        Structure or Model, whose atoms are then all moved at once (see the
+        Entity transform method).
         """
         if self.rotran is None:
             raise PDBException("No transformation has been calculated yet")
         rot, tran = self.rotran
         rot = rot.astype('f')
         tran = tran.astype('f')
+        if isinstance(atom_list, Entity):
+            atom_list.transform(rot, tran)
+            return
         for atom in atom_list:
             atom.transform(rot, tran)
@@ -23,6 +23,8 @@ from .PDBList import PDBList
 # Parse PDB header directly
 from .parse_pdb_header import parse_pdb_header
 
+from .parse_many import parse_many
+
 # Find connected polypeptides in a Structure
 from .Polypeptide import PPBuilder, CaPPBuilder, is_aa, standard_aa_names
 # This is also useful :-)
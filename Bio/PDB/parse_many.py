@@ -0,0 +1,176 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Parse many PDB or mmCIF files, optionally in parallel.
+
+Parsing thousands of structure files (for example from a local mirror kept
+up to date with PDBList) one by one is slow, and sending whole Structure
+objects between processes is slower still. The parse_many function parses
+the files in worker processes, calls your own extraction function on each
+structure there, and gives back only the (small) results:
+
+>>> from Bio.PDB import parse_many
+>>> def count_atoms(structure):
+...     return len(list(structure.get_atoms()))
+...
+>>> for path, count in parse_many(["PDB/1A8O.pdb", "PDB/1A8O.cif"],
+...                               extract=count_atoms):
+...     print("%s %i" % (path, count))
+...
+PDB/1A8O.pdb 644
+PDB/1A8O.cif 644
+
+To use worker processes, pass processes=N and an extraction function
+(sending whole Structure objects back from the workers would be slower
+than parsing the files yourself). The extraction function (and parser, if
+given) must then be picklable, so use a function defined at the top level
+of a module rather than a lambda or nested function. These are sent to
+each worker process once, rather than with every file.
+"""
+
+import gzip
+import os
+
+from Bio._py3k import _binary_to_string_handle, basestring
+
+from Bio.PDB.MMCIFParser import MMCIFParser, FastMMCIFParser
+from Bio.PDB.PDBParser import PDBParser
+
+
+# Known file extensions (after removing any .gz)
+_pdb_extensions = (".pdb", ".ent")
+_mmcif_extensions = (".cif", ".mmcif")
+
+
+def parse_many(paths, parser=None, extract=None, processes=1,
+               atom_table=False, return_exceptions=False, chunksize=1):
+    """Parse many structure files, returning an iterator of results.
+
+    Arguments:
+     - paths - list (or other iterable) of file names, or the name of a
+       directory to search (including subdirectories) for files ending
+       .pdb, .ent, .cif or .mmcif, optionally followed by .gz. Files
+       ending .gz are decompressed as they are read.
+     - parser - parser object to use, e.g. FastMMCIFParser(QUIET=True).
+       By default a quiet PDBParser is used for .pdb and .ent files, and
+       a quiet MMCIFParser (or FastMMCIFParser for atom tables) for .cif
+       and .mmcif files.
+     - extract - function called with each Structure (or atom table)
+       in the worker process, whose return value is passed back. By
+       default the Structure (or atom table) itself is returned, but this
+       is only allowed for Structures without worker processes.
+     - processes - number of worker processes (default 1, meaning no
+       worker processes are used).
+     - atom_table - if true, use the get_atom_table method of the parser
+       rather than get_structure, so extract is called with a NumPy table
+       of the atoms (see Bio.PDB.AtomTable) instead.
+     - return_exceptions - if true, an exception parsing a file (or in
+       extract) is returned as the result for that file, rather than
+       being raised (which stops the iteration).
+     - chunksize - number of files sent to a worker process at a time.
+
+    Returns an iterator of (path, result) tuples, in the order of the
+    paths. The id of each structure is taken from its file name, e.g.
+    "1abc" for "pdb1abc.ent.gz" or "1abc.cif".
+    """
+    if processes < 1:
+        raise ValueError("processes should be at least one")
+    if processes > 1 and extract is None and not atom_table:
+        raise ValueError("An extract function is needed with worker "
+                         "processes, rather than returning whole Structures")
+    if isinstance(paths, basestring):
+        paths = _find_structure_files(paths)
+    settings = (parser, extract, atom_table, return_exceptions)
+    return _parse_many(paths, settings, processes, chunksize)
+
+
+# The parse_many settings in a worker process, see _init_worker
+_worker_settings = None
+
+
+def _parse_many(paths, settings, processes, chunksize):
+    """Parse the files in the worker processes, for parse_many (PRIVATE)."""
+    if processes == 1:
+        for path in paths:
+            yield _parse_one(path, settings)
+        return
+    # Only import this if needed (e.g. not available on Jython)
+    import multiprocessing
+    pool = multiprocessing.Pool(processes, _init_worker, (settings,))
+    try:
+        # Results come back in the order of the files:
+        for result in pool.imap(_parse_in_worker, paths, chunksize):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker(settings):
+    """Keep the parse_many settings in a worker process (PRIVATE)."""
+    global _worker_settings
+    _worker_settings = settings
+
+
+def _parse_in_worker(path):
+    """Parse one file in a worker process, for parse_many (PRIVATE)."""
+    return _parse_one(path, _worker_settings)
+
+
+def _find_structure_files(directory):
+    """Find the structure files in a directory, in sorted order (PRIVATE)."""
+    extensions = _pdb_extensions + _mmcif_extensions
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            name = filename.lower()
+            if name.endswith(".gz"):
+                name = name[:-3]
+            if name.endswith(extensions):
+                yield os.path.join(root, filename)
+
+
+def _structure_id(path):
+    """Return the structure id and file extension for a path (PRIVATE)."""
+    name = os.path.basename(path)
+    if name.lower().endswith(".gz"):
+        name = name[:-3]
+    name, extension = os.path.splitext(name)
+    extension = extension.lower()
+    if extension == ".ent" and name.lower().startswith("pdb"):
+        # As in PDBList, e.g. pdb1abc.ent
+        name = name[3:]
+    return name, extension
+
+
+def _parse_one(path, settings):
+    """Parse one file and extract the result, for parse_many (PRIVATE)."""
+    parser, extract, atom_table, return_exceptions = settings
+    try:
+        structure_id, extension = _structure_id(path)
+        if parser is None:
+            if extension in _mmcif_extensions and atom_table:
+                parser = FastMMCIFParser(QUIET=True)
+            elif extension in _mmcif_extensions:
+                parser = MMCIFParser(QUIET=True)
+            else:
+                parser = PDBParser(QUIET=True)
+        if path.lower().endswith(".gz"):
+            handle = _binary_to_string_handle(gzip.open(path, "rb"))
+        else:
+            handle = open(path)
+        try:
+            if atom_table:
+                result = parser.get_atom_table(handle)
+            else:
+                result = parser.get_structure(structure_id, handle)
+        finally:
+            handle.close()
+        if extract is not None:
+            result = extract(result)
+    except Exception as err:
+        if not return_exceptions:
+            raise
+        result = err
+    return path, result
@@ -197,6 +197,7 @@ of the format's documentation.
 from __future__ import print_function
 from Bio._py3k import basestring
 
+import functools
 import sys
 import warnings
 
@@ -490,7 +491,8 @@ def index(filename, format=None, key_function=None, **kwargs):
 
 
 def index_db(index_filename, filenames=None, format=None,
-        key_function=None, **kwargs):
+             key_function=None, processes=1, progress=None,
+             batch_size=10000, **kwargs):
     """Indexes several search output files into an SQLite database.
 
      - index_filename - The SQLite filename.
@@ -502,6 +504,13 @@ def index_db(index_filename, filenames=None, format=None,
      - key_function - Optional callback function which when given a
                       QueryResult identifier string should return a unique
                       key for the dictionary.
+     - processes    - Optional number of worker processes used to scan the
+                      files in parallel when building a new index.
+     - progress     - Optional callback function, called after each file is
+                      indexed with the number of files done, the total number
+                      of files, and the number of queries indexed so far.
+     - batch_size   - Optional number of queries inserted into (or keys looked
+                      up in) the SQLite database at a time (default 10000).
      - kwargs       - Format-specific keyword arguments.
 
     The `index_db` function is similar to `index` in that it indexes the start
@@ -539,6 +548,9 @@ def index_db(index_filename, filenames=None, format=None,
     of one thousand sequences each in order to run as ten separate BLAST jobs
     on a cluster. You could use `index_db` to index the ten BLAST output
     files together for seamless access to all the results as one dictionary.
+    Building the index of so many files can be done in parallel with (for
+    example) processes=4, which scans four files at once, each in its own
+    worker process.
 
     Note that ':memory:' rather than an index filename tells SQLite to hold
     the index database in memory. This is useful for quick tests, but using
@@ -559,16 +571,25 @@ def index_db(index_filename, filenames=None, format=None,
     repr = "SearchIO.index_db(%r, filenames=%r, format=%r, key_function=%r, ...)" \
                % (index_filename, filenames, format, key_function)
 
-    def proxy_factory(format, filename=None):
-        """Given a filename returns proxy object, else boolean if format OK."""
-        if filename:
-            return get_processor(format, _INDEXER_MAP)(filename, **kwargs)
-        else:
-            return format in _INDEXER_MAP
-
+    # Using a partial function (not a closure) so this can be pickled
+    # for use in worker processes:
+    proxy_factory = functools.partial(_index_db_proxy_factory, kwargs)
     return _SQLiteManySeqFilesDict(index_filename, filenames,
                                    proxy_factory, format,
-                                   key_function, repr)
+                                   key_function, repr,
+                                   batch_size=batch_size,
+                                   processes=processes, progress=progress)
+
+
+def _index_db_proxy_factory(kwargs, format, filename=None):
+    """Return proxy object for a filename, else boolean if format OK (PRIVATE).
+
+    Used via functools.partial in index_db.
+    """
+    if filename:
+        return get_processor(format, _INDEXER_MAP)(filename, **kwargs)
+    else:
+        return format in _INDEXER_MAP
 
 
 def write(qresults, handle, format=None, **kwargs):
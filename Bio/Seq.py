@@ -21,9 +21,14 @@ import string  # for maketrans only
 import array
 import sys
 import warnings
+from collections import OrderedDict
 
 from Bio._py3k import range
+from Bio._py3k import map
+from Bio._py3k import zip
 from Bio._py3k import basestring
+from Bio._py3k import _as_bytes
+from Bio._py3k import _bytes_bytearray_to_str
 
 from Bio import BiopythonWarning
 from Bio import Alphabet
@@ -362,6 +367,20 @@ class Seq(object):
         """
         return MutableSeq(str(self), self.alphabet)
 
+    def encoded(self):
+        """Returns the sequence as a NumPy array of integer letter codes.
+
+        The codes are given by the Encoding for the sequence's alphabet (see
+        Bio.Alphabet.Encoding), with any letters not in the alphabet given
+        the code for unknown letters (one more than the last letter). For
+        example, Seq("GATTACAN", IUPAC.unambiguous_dna) gives the codes
+        [0, 1, 2, 2, 1, 3, 1, 4] as G, A, T and C are 0 to 3.
+
+        This requires NumPy.
+        """
+        from Bio.Alphabet.Encoding import get_encoding
+        return get_encoding(self.alphabet).encode(str(self))
+
     def _get_seq_str_and_check_alphabet(self, other_sequence):
         """string/Seq/MutableSeq to string, checking alphabet (PRIVATE).
 
@@ -1552,6 +1571,231 @@ class UnknownSeq(Seq):
             return Seq("", s.alphabet)
 
 
+class BufferSeq(Seq):
+    """A read-only sequence object viewing part of a bytes-like buffer.
+
+    The normal Seq object holds its sequence as a python string, and any
+    slice is a new string copy. For very long sequences (e.g. whole
+    chromosomes) this class instead holds a reference to a buffer such as
+    a bytes, bytearray or mmap object, together with the start and end
+    offsets of the sequence within it:
+
+    >>> from Bio.Seq import BufferSeq
+    >>> from Bio.Alphabet import generic_dna
+    >>> my_seq = BufferSeq(b"NNNNACGTACGTTTGANNNN", generic_dna, 4, -4)
+    >>> my_seq
+    BufferSeq('ACGTACGTTTGA', DNAAlphabet())
+    >>> len(my_seq)
+    12
+
+    Slicing (without a step) gives another BufferSeq sharing the same
+    buffer, so no sequence data is copied:
+
+    >>> my_seq[4:]
+    BufferSeq('ACGTTTGA', DNAAlphabet())
+    >>> my_seq[4:]._buffer is my_seq._buffer
+    True
+
+    Searching methods like find and count work on the buffer directly:
+
+    >>> my_seq.find("TTG")
+    8
+    >>> my_seq.count("ACG")
+    2
+
+    The sequence is only copied into a string when needed, for example by
+    str(my_seq), or for methods returning a new sequence such as complement
+    or translate (which return normal Seq objects):
+
+    >>> print(my_seq)
+    ACGTACGTTTGA
+    >>> my_seq.reverse_complement()
+    Seq('TCAAACGTACGT', DNAAlphabet())
+    >>> my_seq.translate()
+    Seq('TYV*', HasStopCodon(ExtendedIUPACProtein(), '*'))
+    """
+
+    def __init__(self, data, alphabet=Alphabet.generic_alphabet,
+                 start=0, end=None):
+        """Create a BufferSeq object.
+
+        Arguments:
+            - data - Buffer holding the sequence as ASCII bytes, e.g. a
+              bytes, bytearray or mmap object.
+            - alphabet - Optional argument, an Alphabet object from
+              Bio.Alphabet
+            - start - Optional offset of the sequence start in the buffer.
+            - end - Optional offset of the sequence end in the buffer,
+              defaults to the end of the buffer.
+
+        Negative offsets are interpreted as in slice notation.
+        """
+        if isinstance(data, basestring) and not isinstance(data, bytes):
+            raise TypeError("The sequence data given to a BufferSeq object "
+                            "should be a bytes-like buffer (not a string), "
+                            "use a Seq object for strings")
+        start, end, _ = slice(start, end).indices(len(data))
+        self._buffer = data
+        self._start = start
+        self._end = max(start, end)
+        self.alphabet = alphabet
+
+    @property
+    def _data(self):
+        """The sequence as a string, used by the Seq base class (PRIVATE)."""
+        return str(self)
+
+    def __repr__(self):
+        """Return (truncated) representation of the sequence for debugging."""
+        if len(self) > 60:
+            # Only copy the letters shown from the buffer
+            return "{0}('{1}...{2}', {3!r})".format(self.__class__.__name__,
+                                                    str(self[:54]),
+                                                    str(self[-3:]),
+                                                    self.alphabet)
+        else:
+            return '{0}({1!r}, {2!r})'.format(self.__class__.__name__,
+                                              str(self),
+                                              self.alphabet)
+
+    def __str__(self):
+        """Returns the sequence as a python string (a copy), use str(my_seq).
+        """
+        return _bytes_bytearray_to_str(self._buffer[self._start:self._end])
+
+    def __len__(self):
+        """Returns the length of the sequence, use len(my_seq)."""
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        """Returns a single letter, or a subsequence as a new BufferSeq.
+
+        >>> my_seq = BufferSeq(b"ACGTACGTTTGA")
+        >>> my_seq[-1]
+        'A'
+        >>> my_seq[2:-2]
+        BufferSeq('GTACGTTT', Alphabet())
+
+        Slices with a step are copied into a normal Seq object:
+
+        >>> my_seq[::-1]
+        Seq('AGTTTGCATGCA', Alphabet())
+        """
+        length = self._end - self._start
+        if isinstance(index, int):
+            if index < 0:
+                index += length
+            if index < 0 or index >= length:
+                raise IndexError("BufferSeq index out of range")
+            index += self._start
+            return _bytes_bytearray_to_str(self._buffer[index:index + 1])
+        start, end, step = index.indices(length)
+        if step == 1:
+            return BufferSeq(self._buffer, self.alphabet,
+                             self._start + start, self._start + max(start, end))
+        return Seq(str(self)[index], self.alphabet)
+
+    def _buffer_range(self, start, end):
+        """Convert a slice of the sequence to offsets in the buffer (PRIVATE).
+        """
+        # Adjust the indices as for python string methods, where unlike
+        # slicing, the start is not capped at the length of the sequence.
+        length = self._end - self._start
+        if start < 0:
+            start = max(0, start + length)
+        if end > length:
+            end = length
+        elif end < 0:
+            end = max(0, end + length)
+        return self._start + start, self._start + end
+
+    def count(self, sub, start=0, end=sys.maxsize):
+        """Non-overlapping count method, like that of a python string.
+
+        See the Seq object's count method for details. This searches the
+        buffer directly without copying the sequence.
+
+        >>> BufferSeq(b"AAAATGA").count("AA")
+        2
+        """
+        sub_bytes = _as_bytes(self._get_seq_str_and_check_alphabet(sub))
+        start, end = self._buffer_range(start, end)
+        try:
+            return self._buffer.count(sub_bytes, start, end)
+        except AttributeError:
+            # e.g. an mmap object, which has find but not count
+            pass
+        if start > end:
+            return 0
+        elif not sub_bytes:
+            return end - start + 1
+        count = 0
+        find = self._buffer.find
+        start = find(sub_bytes, start, end)
+        while start != -1:
+            count += 1
+            start = find(sub_bytes, start + len(sub_bytes), end)
+        return count
+
+    def __contains__(self, char):
+        """Implements the 'in' keyword, like a python string."""
+        return self.find(char) != -1
+
+    def find(self, sub, start=0, end=sys.maxsize):
+        """Find method, like that of a python string.
+
+        See the Seq object's find method for details. This searches the
+        buffer directly without copying the sequence.
+
+        >>> BufferSeq(b"GUCAUGGCCAUUGUAAUGGG").find("AUG")
+        3
+        """
+        sub_bytes = _as_bytes(self._get_seq_str_and_check_alphabet(sub))
+        start, end = self._buffer_range(start, end)
+        index = self._buffer.find(sub_bytes, start, end)
+        if index == -1:
+            return -1
+        return index - self._start
+
+    def rfind(self, sub, start=0, end=sys.maxsize):
+        """Find from right method, like that of a python string.
+
+        See the Seq object's rfind method for details. This searches the
+        buffer directly without copying the sequence.
+
+        >>> BufferSeq(b"GUCAUGGCCAUUGUAAUGGG").rfind("AUG")
+        15
+        """
+        sub_bytes = _as_bytes(self._get_seq_str_and_check_alphabet(sub))
+        start, end = self._buffer_range(start, end)
+        index = self._buffer.rfind(sub_bytes, start, end)
+        if index == -1:
+            return -1
+        return index - self._start
+
+    def complement(self):
+        """Returns the complement sequence. New Seq object.
+
+        >>> from Bio.Alphabet import generic_dna
+        >>> BufferSeq(b"CCCCCGATAG", generic_dna).complement()
+        Seq('GGGGGCTATC', DNAAlphabet())
+        """
+        # Copy the sequence once, rather than for each use of self._data
+        return Seq(str(self), self.alphabet).complement()
+
+    def encoded(self):
+        """Returns the sequence as a NumPy array of integer letter codes.
+
+        See the Seq object's encoded method for details. This reads the
+        buffer directly without copying the sequence into a string.
+        """
+        import numpy
+        from Bio.Alphabet.Encoding import get_encoding
+        data = numpy.frombuffer(self._buffer, numpy.uint8,
+                                self._end - self._start, self._start)
+        return get_encoding(self.alphabet).table[data]
+
+
 class MutableSeq(object):
     """An editable sequence object (with an alphabet).
 
@@ -1953,6 +2197,14 @@ class MutableSeq(object):
         """
         return Seq("".join(self.data), self.alphabet)
 
+    def encoded(self):
+        """Returns the sequence as a NumPy array of integer letter codes.
+
+        See the Seq object's encoded method for details.
+        """
+        from Bio.Alphabet.Encoding import get_encoding
+        return get_encoding(self.alphabet).encode("".join(self.data))
+
 
 # The transcribe, backward_transcribe, and translate functions are
 # user-friendly versions of the corresponding functions in Bio.Transcribe
@@ -2002,6 +2254,76 @@ def back_transcribe(rna):
         return rna.replace('U', 'T').replace('u', 't')
 
 
+# Placeholders used in codon lookups for (possible) stop codons, replaced
+# by the user's chosen stop_symbol and pos_stop once translation is done:
+_STOP_MARKER = "\x00"
+_POS_STOP_MARKER = "\x01"
+
+
+class _CodonLookup(dict):
+    """Dictionary mapping codons to amino acids for a codon table (PRIVATE).
+
+    Entries are filled in on first use from the codon table's forward table,
+    so any codon (including ambiguous codons like "TAN" or "NNN") is only
+    resolved once. Stop codons and possible stop codons are mapped to the
+    _STOP_MARKER and _POS_STOP_MARKER placeholders, and if a gap character
+    was given, a gap codon (e.g. "---") is mapped to the gap character.
+
+    Invalid codons raise a TranslationError and are not stored.
+    """
+
+    def __init__(self, table, gap=None):
+        dict.__init__(self)
+        self.table = table
+        self.gap = gap
+        if table.nucleotide_alphabet.letters is not None:
+            self.valid_letters = set(
+                table.nucleotide_alphabet.letters.upper())
+        else:
+            # Assume the worst case, ambiguous DNA or RNA:
+            self.valid_letters = set(IUPAC.ambiguous_dna.letters.upper() +
+                                     IUPAC.ambiguous_rna.letters.upper())
+
+    def __missing__(self, codon):
+        try:
+            amino_acid = self.table.forward_table[codon]
+        except (KeyError, CodonTable.TranslationError):
+            if codon in self.table.stop_codons:
+                amino_acid = _STOP_MARKER
+            elif self.valid_letters.issuperset(set(codon)):
+                # Possible stop codon (e.g. NNN or TAN)
+                amino_acid = _POS_STOP_MARKER
+            elif self.gap is not None and codon == self.gap * 3:
+                # Gapped translation
+                amino_acid = self.gap
+            else:
+                raise CodonTable.TranslationError(
+                    "Codon '{0}' is invalid".format(codon))
+        self[codon] = amino_acid
+        return amino_acid
+
+
+# The recently used _CodonLookup objects, keyed on the table and gap, with
+# the least recently used first (removed once there are too many, as custom
+# tables or gap characters could otherwise fill up the cache):
+_codon_lookups = OrderedDict()
+_max_codon_lookups = 32
+
+
+def _get_codon_lookup(table, gap=None):
+    """Return the cached _CodonLookup for a codon table and gap (PRIVATE)."""
+    key = table, gap
+    try:
+        # Move it to the end as the most recently used
+        lookup = _codon_lookups.pop(key)
+    except KeyError:
+        lookup = _CodonLookup(table, gap)
+        while len(_codon_lookups) >= _max_codon_lookups:
+            _codon_lookups.popitem(last=False)
+    _codon_lookups[key] = lookup
+    return lookup
+
+
 def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
                    cds=False, pos_stop="X", gap=None):
     """Helper function to translate a nucleotide string (PRIVATE).
@@ -2066,14 +2388,6 @@ def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
     """
     sequence = sequence.upper()
     amino_acids = []
-    forward_table = table.forward_table
-    stop_codons = table.stop_codons
-    if table.nucleotide_alphabet.letters is not None:
-        valid_letters = set(table.nucleotide_alphabet.letters.upper())
-    else:
-        # Assume the worst case, ambiguous DNA or RNA:
-        valid_letters = set(IUPAC.ambiguous_dna.letters.upper() +
-                            IUPAC.ambiguous_rna.letters.upper())
     n = len(sequence)
     if cds:
         if str(sequence[:3]).upper() not in table.start_codons:
@@ -2082,7 +2396,7 @@ def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
         if n % 3 != 0:
             raise CodonTable.TranslationError(
                 "Sequence length {0} is not a multiple of three".format(n))
-        if str(sequence[-3:]).upper() not in stop_codons:
+        if str(sequence[-3:]).upper() not in table.stop_codons:
             raise CodonTable.TranslationError(
                 "Final codon '{0}' is not a stop codon".format(sequence[-3:]))
         # Don't translate the stop symbol, and manually translate the M
@@ -2102,27 +2416,47 @@ def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
             raise ValueError("Gap character should be a single character "
                              "string.")
 
+    lookup = _get_codon_lookup(table, gap)
+    # Zipping three references to the same iterator yields the codons,
+    # dropping any trailing partial codon, which is much faster than
+    # slicing the string:
+    letters = iter(sequence)
+    try:
+        protein = "".join(map(lookup.__getitem__,
+                              map("".join, zip(letters, letters, letters))))
+    except CodonTable.TranslationError:
+        # An invalid codon, but with to_stop an earlier stop codon would
+        # end the translation first - so walk the codons one by one:
+        protein = _translate_codons(sequence, n, lookup, cds, to_stop)
+    if _STOP_MARKER in protein:
+        if cds:
+            raise CodonTable.TranslationError(
+                "Extra in frame stop codon found.")
+        if to_stop:
+            protein = protein[:protein.index(_STOP_MARKER)]
+        protein = protein.replace(_STOP_MARKER, stop_symbol)
+    protein = protein.replace(_POS_STOP_MARKER, pos_stop)
+    return "".join(amino_acids) + protein
+
+
+def _translate_codons(sequence, n, lookup, cds, to_stop):
+    """Translate codon by codon, stopping at invalid codons (PRIVATE).
+
+    Slow path for _translate_str, used when the sequence contains an invalid
+    codon. Returns a string still containing the stop and possible stop
+    markers, or raises a TranslationError for the first invalid codon not
+    preceded by a stop codon where that would end the translation.
+    """
+    amino_acids = []
     for i in range(0, n - n % 3, 3):
-        codon = sequence[i:i + 3]
-        try:
-            amino_acids.append(forward_table[codon])
-        except (KeyError, CodonTable.TranslationError):
-            if codon in table.stop_codons:
-                if cds:
-                    raise CodonTable.TranslationError(
-                        "Extra in frame stop codon found.")
-                if to_stop:
-                    break
-                amino_acids.append(stop_symbol)
-            elif valid_letters.issuperset(set(codon)):
-                # Possible stop codon (e.g. NNN or TAN)
-                amino_acids.append(pos_stop)
-            elif gap is not None and codon == gap * 3:
-                # Gapped translation
-                amino_acids.append(gap)
-            else:
+        amino_acid = lookup[sequence[i:i + 3]]
+        if amino_acid == _STOP_MARKER:
+            if cds:
                 raise CodonTable.TranslationError(
-                    "Codon '{0}' is invalid".format(codon))
+                    "Extra in frame stop codon found.")
+            if to_stop:
+                break
+        amino_acids.append(amino_acid)
     return "".join(amino_acids)
 
 
@@ -2215,6 +2549,58 @@ def translate(sequence, table="Standard", stop_symbol="*", to_stop=False,
                               gap=gap)
 
 
+def translate_many(sequences, table="Standard", stop_symbol="*",
+                   to_stop=False, cds=False, gap=None):
+    """Translate many nucleotide sequences using the same settings.
+
+    Takes an iterable of sequences (strings, Seq or MutableSeq objects) and
+    returns a list of their translations, as done by the translate function
+    with the same arguments. The codon table is only looked up once, and the
+    codons seen are cached with the table, making this the fastest way to
+    translate a large number of sequences (for example, reading frames
+    from a genome assembly).
+
+    >>> translate_many(["ATGGCCTAA", "GTGGCCATTTGA"])
+    ['MA*', 'VAI*']
+    >>> translate_many(["ATGGCCTAA", "GTGGCCATTTGA"], table=11, cds=True)
+    ['MA', 'MAI']
+    """
+    try:
+        table_id = int(table)
+        codon_table = CodonTable.ambiguous_generic_by_id[table_id]
+        unambiguous_tables = {
+            IUPAC.unambiguous_dna: CodonTable.unambiguous_dna_by_id[table_id],
+            IUPAC.unambiguous_rna: CodonTable.unambiguous_rna_by_id[table_id]}
+    except ValueError:
+        codon_table = CodonTable.ambiguous_generic_by_name[table]
+        unambiguous_tables = {
+            IUPAC.unambiguous_dna: CodonTable.unambiguous_dna_by_name[table],
+            IUPAC.unambiguous_rna: CodonTable.unambiguous_rna_by_name[table]}
+    except (AttributeError, TypeError):
+        if isinstance(table, CodonTable.CodonTable):
+            codon_table = table
+            unambiguous_tables = {}
+        else:
+            raise ValueError('Bad table argument')
+    results = []
+    for sequence in sequences:
+        if isinstance(sequence, (Seq, MutableSeq)):
+            # Seq objects pick their codon table based on their alphabet,
+            # as in the Seq object's translate method
+            seq_table = codon_table
+            for alphabet in unambiguous_tables:
+                if sequence.alphabet == alphabet:
+                    seq_table = unambiguous_tables[alphabet]
+            if isinstance(sequence, MutableSeq):
+                sequence = sequence.toseq()
+            results.append(sequence.translate(seq_table, stop_symbol,
+                                              to_stop, cds, gap=gap))
+        else:
+            results.append(_translate_str(sequence, codon_table, stop_symbol,
+                                          to_stop, cds, gap=gap))
+    return results
+
+
 def reverse_complement(sequence):
     """Returns the reverse complement sequence of a nucleotide string.
 
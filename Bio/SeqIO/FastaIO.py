@@ -13,8 +13,13 @@ You are expected to use this module via the Bio.SeqIO functions."""
 
 from __future__ import print_function
 
+import sys
+
+from Bio._py3k import _bytes_to_string
+from Bio._py3k import _bytes_bytearray_to_str
+
 from Bio.Alphabet import single_letter_alphabet
-from Bio.Seq import Seq
+from Bio.Seq import Seq, BufferSeq
 from Bio.SeqRecord import SeqRecord
 from Bio.SeqIO.Interfaces import SequentialSequenceWriter
 
@@ -72,6 +77,31 @@ def SimpleFastaParser(handle):
     assert False, "Should not reach this line"
 
 
+def FastaBlockIterator(handle, batch_size=10000, chunk_size=4194304):
+    """Iterate over Fasta records in batches (as RecordBlock objects).
+
+    This is intended for high throughput processing of FASTA files, where
+    the per-record overhead of SimpleFastaParser is significant. The handle
+    must be opened in binary mode, and is read in large chunks (by default
+    4MB). The records are returned in batches of batch_size (except for
+    the last batch which may be smaller), each a RecordBlock object holding
+    the data read from the file plus NumPy arrays of the offsets of each
+    record's title line and sequence. These can be used directly, or via
+    methods returning lists of the titles and sequences as bytes. For
+    example, to print the number of records and total length of each batch::
+
+        with open("example.fasta", "rb") as handle:
+            for block in FastaBlockIterator(handle):
+                print(len(block), block.seq_lengths().sum())
+
+    Iterating over a block gives (title, sequence) tuples of bytes, just like
+    SimpleFastaParser gives tuples of strings. This requires NumPy.
+    """
+    from ._blocks import _block_iterator, _parse_fasta
+    return _block_iterator(handle, _parse_fasta, b">", batch_size,
+                           chunk_size)
+
+
 def FastaIterator(handle, alphabet=single_letter_alphabet, title2ids=None):
     """Generator function to iterate over Fasta records (as SeqRecord objects).
 
@@ -130,6 +160,208 @@ def FastaIterator(handle, alphabet=single_letter_alphabet, title2ids=None):
                             id=first_word, name=first_word, description=title)
 
 
+def SimpleFaiParser(handle):
+    """Generator function to iterate over a FASTA index (.fai) file.
+
+    The samtools faidx tool and Bio.SeqIO.FastaIO.write_fai create these
+    tab separated plain text files, with one line per FASTA record. For
+    each record a tuple is returned giving the name (the first word of the
+    title line), the sequence length, the offset of the sequence in the
+    FASTA file, the number of bases per line, and the number of bytes per
+    line (including the new line characters):
+
+    >>> from Bio._py3k import StringIO
+    >>> handle = StringIO("alpha\\t5\\t7\\t5\\t6\\nbeta\\t4\\t19\\t4\\t5\\n")
+    >>> for values in SimpleFaiParser(handle):
+    ...     print(values)
+    ...
+    ('alpha', 5, 7, 5, 6)
+    ('beta', 4, 19, 4, 5)
+
+    Any extra columns (e.g. for a FASTQ file index) are ignored.
+    """
+    for line in handle:
+        if not line.strip():
+            continue
+        parts = line.rstrip("\r\n").split("\t")
+        if len(parts) < 5:
+            raise ValueError("Expected at least 5 tab separated columns in "
+                             "FASTA index line, got %r" % line)
+        yield (parts[0], int(parts[1]), int(parts[2]),
+               int(parts[3]), int(parts[4]))
+
+
+def fai_entries(handle):
+    """Generator function to scan a FASTA file and compute its index entries.
+
+    The handle must be opened in binary mode, as the offsets are in bytes.
+    This returns the same tuples as the SimpleFaiParser function, i.e. the
+    values for a samtools style FASTA index (.fai) file:
+
+    >>> with open("Fasta/dups.fasta", "rb") as handle:
+    ...     for values in fai_entries(handle):
+    ...         print(values)
+    ...
+    ('alpha', 5, 7, 5, 6)
+    ('beta', 4, 20, 4, 5)
+    ('gamma', 5, 33, 5, 6)
+    ('alpha', 5, 109, 5, 6)
+    ('delta', 5, 123, 5, 6)
+
+    As with samtools, all the sequence lines of a record must be the same
+    length except the last, otherwise a ValueError is raised.
+    """
+    offset = 0
+    line = handle.readline()
+    # Skip any text before the first record (e.g. blank lines, comments)
+    while line and line[:1] != b">":
+        offset += len(line)
+        line = handle.readline()
+    while line:
+        title = line[1:].strip()
+        name = _bytes_to_string(title.split(None, 1)[0]) if title else ""
+        offset += len(line)
+        seq_offset = offset
+        length = line_bases = line_width = 0
+        # Set once we have seen a line shorter than the first, which
+        # must be the last line of the sequence:
+        short_line = False
+        line = handle.readline()
+        while line and line[:1] != b">":
+            bases = len(line.rstrip())
+            if bases:
+                if short_line:
+                    raise ValueError("Different line length in sequence %r"
+                                     % name)
+                if not line_bases:
+                    line_bases = bases
+                    line_width = len(line)
+                elif bases > line_bases or \
+                        (bases == line_bases and len(line) != line_width):
+                    raise ValueError("Different line length in sequence %r"
+                                     % name)
+                short_line = bases < line_bases
+                length += bases
+            else:
+                # Blank line, only allowed at the end of the record
+                short_line = True
+            offset += len(line)
+            line = handle.readline()
+        yield name, length, seq_offset, line_bases, line_width
+
+
+def write_fai(entries, handle):
+    """Write FASTA index (.fai) entries to a handle, returns the count.
+
+    Takes an iterable of tuples like those from SimpleFaiParser or
+    fai_entries, and the output handle in text mode. For example, to
+    create the samtools style index for a FASTA file::
+
+        with open("example.fasta", "rb") as in_handle:
+            with open("example.fasta.fai", "w") as out_handle:
+                write_fai(fai_entries(in_handle), out_handle)
+
+    """
+    count = 0
+    for name, length, offset, line_bases, line_width in entries:
+        handle.write("%s\t%i\t%i\t%i\t%i\n"
+                     % (name, length, offset, line_bases, line_width))
+        count += 1
+    return count
+
+
+class IndexedFastaSeq(BufferSeq):
+    """A read-only sequence object reading on demand from a FASTA file.
+
+    This is used by Bio.SeqIO.index(..., lazy=True) for FASTA files, and
+    looks up any part of the sequence from a memory mapped file using the
+    line lengths from a FASTA index (.fai). Slicing returns another lazy
+    sequence, so only the slice needed is ever read from the file:
+
+    >>> data = b">alpha\\nACGTA\\nCGTAC\\nGT\\n"
+    >>> seq = IndexedFastaSeq(data, 7, 12, 5, 6)
+    >>> seq
+    IndexedFastaSeq('ACGTACGTACGT', SingleLetterAlphabet())
+    >>> seq[3:8]
+    IndexedFastaSeq('TACGT', SingleLetterAlphabet())
+    >>> seq[-1]
+    'T'
+    >>> seq.count("CG")
+    3
+    """
+
+    def __init__(self, data, offset, length, line_bases, line_width,
+                 alphabet=single_letter_alphabet, start=0, end=None):
+        """Create an IndexedFastaSeq object.
+
+        Arguments:
+            - data - Buffer holding the FASTA file, e.g. an mmap object.
+            - offset - Offset of the record's sequence in the buffer.
+            - length - Length of the record's sequence.
+            - line_bases - Number of bases per sequence line.
+            - line_width - Number of bytes per sequence line.
+            - alphabet - Optional argument, an Alphabet object.
+            - start - Optional start of the region of the sequence to use.
+            - end - Optional end of the region of the sequence to use.
+        """
+        start, end, _ = slice(start, end).indices(length)
+        self._buffer = data
+        self._offset = offset
+        self._length = length
+        self._line_bases = line_bases
+        self._line_width = line_width
+        self._start = start
+        self._end = max(start, end)
+        self.alphabet = alphabet
+
+    def _position(self, index):
+        """Offset in the buffer of a letter in the full sequence (PRIVATE)."""
+        line, column = divmod(index, self._line_bases)
+        return self._offset + line * self._line_width + column
+
+    def __str__(self):
+        """Returns the sequence as a python string, use str(my_seq)."""
+        if self._start >= self._end:
+            return ""
+        data = self._buffer[self._position(self._start):
+                            self._position(self._end - 1) + 1]
+        return _bytes_bytearray_to_str(data.replace(b"\n", b"")
+                                           .replace(b"\r", b""))
+
+    def __getitem__(self, index):
+        """Returns a single letter, or a subsequence as a new IndexedFastaSeq.
+        """
+        length = self._end - self._start
+        if isinstance(index, int):
+            if index < 0:
+                index += length
+            if index < 0 or index >= length:
+                raise IndexError("IndexedFastaSeq index out of range")
+            offset = self._position(self._start + index)
+            return _bytes_bytearray_to_str(self._buffer[offset:offset + 1])
+        start, end, step = index.indices(length)
+        if step == 1:
+            return IndexedFastaSeq(self._buffer, self._offset, self._length,
+                                   self._line_bases, self._line_width,
+                                   self.alphabet, self._start + start,
+                                   self._start + max(start, end))
+        return Seq(str(self)[index], self.alphabet)
+
+    # The buffer also holds the line breaks, so search a copy instead:
+
+    def count(self, sub, start=0, end=sys.maxsize):
+        """Non-overlapping count method, like that of a python string."""
+        return Seq.count(self, sub, start, end)
+
+    def find(self, sub, start=0, end=sys.maxsize):
+        """Find method, like that of a python string."""
+        return Seq.find(self, sub, start, end)
+
+    def rfind(self, sub, start=0, end=sys.maxsize):
+        """Find from right method, like that of a python string."""
+        return Seq.rfind(self, sub, start, end)
+
+
 class FastaWriter(SequentialSequenceWriter):
     """Class to write Fasta format files."""
     def __init__(self, handle, wrap=60, record2title=None):
@@ -370,6 +370,13 @@ from Bio.SeqIO.Interfaces import SequentialSequenceWriter
 from math import log
 import warnings
 from Bio import BiopythonWarning, BiopythonParserWarning
+from Bio import MissingPythonDependencyError
+
+try:
+    import numpy
+except ImportError:
+    # Only needed for the NumPy array based functions
+    numpy = None
 
 
 # define score offsets. See discussion for differences between Sanger and
@@ -518,6 +525,48 @@ def phred_quality_from_solexa(solexa_quality):
     return 10 * log(10 ** (solexa_quality / 10.0) + 1, 10)
 
 
+def _check_numpy():
+    """Raise MissingPythonDependencyError if NumPy is missing (PRIVATE)."""
+    if numpy is None:
+        raise MissingPythonDependencyError(
+            "Install NumPy if you want to use the quality array functions.")
+
+
+def solexa_quality_array_from_phred(phred_qualities):
+    """Convert PHRED qualities to Solexa qualities, as a NumPy array.
+
+    This is a vectorised version of the solexa_quality_from_phred function,
+    giving the same values (as floating point numbers) for a whole array
+    of PHRED qualities at once, e.g. PHRED qualities 0, 1, 2, 10 and 40
+    give Solexa qualities of about -5, -5, -2.33, 9.54 and 40.
+    """
+    _check_numpy()
+    phred_qualities = numpy.asarray(phred_qualities, numpy.float64)
+    if phred_qualities.size and phred_qualities.min() < 0:
+        raise ValueError("PHRED qualities must be positive (or zero), not %r"
+                         % phred_qualities.min())
+    with numpy.errstate(divide="ignore"):
+        # PHRED zero gives minus infinity, which becomes -5 as well
+        solexa = 10 * numpy.log10(10 ** (phred_qualities / 10.0) - 1)
+    return numpy.maximum(solexa, -5.0)
+
+
+def phred_quality_array_from_solexa(solexa_qualities):
+    """Convert Solexa qualities to PHRED qualities, as a NumPy array.
+
+    This is a vectorised version of the phred_quality_from_solexa function,
+    giving the same values (as floating point numbers) for a whole array
+    of Solexa qualities at once, e.g. Solexa qualities -5, -2, 0, 10 and
+    40 give PHRED qualities of about 1.19, 2.12, 3.01, 10.41 and 40.
+    """
+    _check_numpy()
+    solexa_qualities = numpy.asarray(solexa_qualities, numpy.float64)
+    if solexa_qualities.size and solexa_qualities.min() < -5:
+        warnings.warn("Solexa quality less than -5 passed, %r"
+                      % solexa_qualities.min(), BiopythonWarning)
+    return 10 * numpy.log10(10 ** (solexa_qualities / 10.0) + 1)
+
+
 def _get_phred_quality(record):
     """Extract PHRED qualities from a SeqRecord's letter_annotations (PRIVATE).
 
@@ -888,6 +937,21 @@ def FastqGeneralIterator(handle):
     is that (provided there are no line breaks in the quality sequence) it
     would prevent the above problem with the "@" character.
     """
+    return _fastq_records(handle, False)
+
+
+def _fastq_records(handle, binary):
+    """Parse FASTQ records as (title, sequence, quality) tuples (PRIVATE).
+
+    This is the parser behind FastqGeneralIterator (for a handle in text
+    mode, giving strings) and FastqRawIterator (for a handle in binary mode,
+    giving bytes); see FastqGeneralIterator for the parsing rules.
+    """
+    if binary:
+        at, plus, space, tab = b"@", b"+", b" ", b"\t"
+    else:
+        at, plus, space, tab = "@", "+", " ", "\t"
+
     # We need to call handle.readline() at least four times per record,
     # so we'll save a property look up each time:
     handle_readline = handle.readline
@@ -897,13 +961,16 @@ def FastqGeneralIterator(handle):
         line = handle_readline()
         if not line:
             return  # Premature end of file, or just empty?
-        if line[0] == "@":
+        if line[:1] == at:
             break
-        if isinstance(line[0], int):
+        if str is not bytes and isinstance(line, bytes) != binary:
+            if binary:
+                raise ValueError("Is this handle in text mode not binary "
+                                 "mode?")
             raise ValueError("Is this handle in binary mode not text mode?")
 
     while line:
-        if line[0] != "@":
+        if line[:1] != at:
             raise ValueError(
                 "Records in Fastq files should start with '@' character")
         title_line = line[1:].rstrip()
@@ -916,7 +983,7 @@ def FastqGeneralIterator(handle):
             line = handle_readline()
             if not line:
                 raise ValueError("End of file without quality information.")
-            if line[0] == "+":
+            if line[:1] == plus:
                 # The title here is optional, but if present must match!
                 second_title = line[1:].rstrip()
                 if second_title and second_title != title_line:
@@ -925,7 +992,7 @@ def FastqGeneralIterator(handle):
             seq_string += line.rstrip()  # removes trailing newlines
         # This is going to slow things down a little, but assuming
         # this isn't allowed we should try and catch it here:
-        if " " in seq_string or "\t" in seq_string:
+        if space in seq_string or tab in seq_string:
             raise ValueError("Whitespace is not allowed in the sequence.")
         seq_len = len(seq_string)
 
@@ -936,7 +1003,7 @@ def FastqGeneralIterator(handle):
             line = handle_readline()
             if not line:
                 break  # end of file
-            if line[0] == "@":
+            if line[:1] == at:
                 # This COULD be the start of a new sequence. However, it MAY just
                 # be a line of quality data which starts with a "@" character.  We
                 # should be able to check this by looking at the sequence length
@@ -957,6 +1024,131 @@ def FastqGeneralIterator(handle):
         yield (title_line, seq_string, quality_string)
 
 
+def FastqRawIterator(handle, offset=SANGER_SCORE_OFFSET):
+    """Iterate over FASTQ records as bytes with NumPy quality arrays.
+
+    This is a lightweight alternative to the SeqRecord based iterators,
+    intended for high throughput processing of reads. The handle must be
+    opened in binary mode. Each record is returned as a tuple of the title
+    (bytes), the sequence (bytes), and the quality scores as a NumPy array
+    of unsigned 8 bit integers. These are the ASCII values of the quality
+    string minus the offset, by default 33 as used in Sanger style FASTQ
+    files. Use offset=64 for Illumina 1.3 to 1.7 style FASTQ files.
+
+    The old Solexa style FASTQ files can have negative scores, which can't
+    be held in an unsigned array. For these use offset=0 and convert the
+    ASCII values yourself (e.g. using phred_quality_array_from_solexa).
+    For example, to print the length and lowest quality of each read::
+
+        with open("example.fastq", "rb") as handle:
+            for title, seq, qual in FastqRawIterator(handle):
+                print(title.decode(), len(seq), qual.min())
+
+    The same parsing rules apply as for FastqGeneralIterator, including
+    support for line wrapped sequence and quality strings.
+    """
+    _check_numpy()
+    frombuffer = numpy.frombuffer
+    uint8 = numpy.uint8
+    for title, seq, qual in _fastq_records(handle, True):
+        qual = frombuffer(qual, uint8)
+        if offset:
+            if qual.size and qual.min() < offset:
+                raise ValueError("Quality score below zero using offset %i "
+                                 "in record %r" % (offset, title))
+            qual = qual - uint8(offset)
+        yield title, seq, qual
+
+
+def FastqBlockIterator(handle, batch_size=10000, chunk_size=4194304):
+    """Iterate over FASTQ records in batches (as RecordBlock objects).
+
+    This is intended for high throughput processing of FASTQ files, where
+    the per-record overhead of FastqGeneralIterator is significant. The
+    handle must be opened in binary mode, and is read in large chunks (by
+    default 4MB). The records are returned in batches of batch_size (except
+    for the last batch which may be smaller), each a RecordBlock object
+    holding the data read from the file plus NumPy arrays of the offsets
+    of each record's title line, sequence and quality string. These can be
+    used directly, or via methods returning lists of the titles, sequences
+    and quality scores. For example, to find the mean quality of each read::
+
+        with open("example.fastq", "rb") as handle:
+            for block in FastqBlockIterator(handle):
+                means = mean_qualities(block.qualities())
+
+    Iterating over a block gives (title, sequence, quality) tuples of bytes,
+    just like FastqGeneralIterator gives tuples of strings. Unlike that
+    function, each record must be exactly four lines (as is normal), that
+    is line wrapped sequence or quality strings are not supported. Any
+    errors are found when the chunk of the file containing them is parsed,
+    so may be raised before the batch with the preceding records has been
+    returned. This requires NumPy.
+    """
+    _check_numpy()
+    from ._blocks import _block_iterator, _parse_fastq
+    return _block_iterator(handle, _parse_fastq, b"@", batch_size,
+                           chunk_size)
+
+
+def _concatenate_qualities(qualities):
+    """Join a batch of quality arrays, giving the values and offsets (PRIVATE).
+
+    Returns the concatenated array, the start offsets and lengths of each
+    read, and a boolean array marking the non-empty reads.
+    """
+    _check_numpy()
+    qualities = list(qualities)
+    lengths = numpy.array([len(q) for q in qualities], numpy.intp)
+    if qualities:
+        values = numpy.concatenate(qualities)
+    else:
+        values = numpy.zeros(0, numpy.uint8)
+    starts = numpy.cumsum(lengths) - lengths
+    return values, starts, lengths, lengths > 0
+
+
+def mean_qualities(qualities):
+    """Return the mean quality of each read in a batch, as a NumPy array.
+
+    The argument should be a list (or other iterable) of quality score
+    arrays, for example from FastqRawIterator, or a two dimensional NumPy
+    array of reads with the same length. The means are calculated for the
+    whole batch at once, and empty reads are given a mean of NaN. For
+    example, reads with scores [30, 40] and [10] have means 35 and 10.
+    """
+    values, starts, lengths, non_empty = _concatenate_qualities(qualities)
+    sums = numpy.zeros(len(lengths), numpy.int64)
+    if values.size:
+        # As empty reads add nothing, each sum runs to the next non-empty read
+        sums[non_empty] = numpy.add.reduceat(values, starts[non_empty],
+                                             dtype=numpy.int64)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        return sums / lengths.astype(numpy.float64)
+
+
+def quality_trim_lengths(qualities, threshold=20):
+    """Return the length of each read after trimming low quality bases.
+
+    The argument should be a list (or other iterable) of quality score
+    arrays, for example from FastqRawIterator, or a two dimensional NumPy
+    array of reads with the same length. Any bases at the end of a read
+    (the 3' end) with a quality below the threshold are trimmed off, which
+    is done for the whole batch of reads at once. The reads can then be
+    trimmed by slicing. For example, with a threshold of 20, reads with
+    scores [30, 40, 5, 31, 2, 3] and [2, 3] are trimmed to lengths 4 and 0.
+    """
+    values, starts, lengths, non_empty = _concatenate_qualities(qualities)
+    trimmed = numpy.zeros(len(lengths), numpy.intp)
+    if values.size:
+        # One based positions of the good bases, zero for the bad bases.
+        good = numpy.where(values >= threshold,
+                           numpy.arange(1, len(values) + 1), 0)
+        last = numpy.maximum.reduceat(good, starts[non_empty])
+        trimmed[non_empty] = numpy.maximum(last - starts[non_empty], 0)
+    return trimmed
+
+
 def FastqPhredIterator(handle, alphabet=single_letter_alphabet, title2ids=None):
     """Generator function to iterate over FASTQ records (as SeqRecord objects).
 
@@ -323,6 +323,9 @@ making up each alignment as SeqRecords.
 """
 
 from __future__ import print_function
+
+import functools
+
 from Bio._py3k import basestring
 
 # TODO
@@ -745,7 +748,8 @@ def to_dict(sequences, key_function=None):
     return d
 
 
-def index(filename, format, alphabet=None, key_function=None):
+def index(filename, format, alphabet=None, key_function=None, lazy=False,
+          index_filename=None):
     """Indexes a sequence file and returns a dictionary like object.
 
         - filename - string giving name of file to be indexed
@@ -756,6 +760,12 @@ def index(filename, format, alphabet=None, key_function=None):
         - key_function - Optional callback function which when given a
           SeqRecord identifier string should return a unique
           key for the dictionary.
+        - lazy - Optional boolean, only supported for FASTA files. If True
+          the sequences are not loaded into memory, but read on demand
+          from the file (see below).
+        - index_filename - Optional filename of a small binary index file
+          used to save the record offsets, and reload them next time
+          (see below).
 
     This indexing function will return a dictionary like object, giving the
     SeqRecord objects as values:
@@ -851,6 +861,49 @@ def index(filename, format, alphabet=None, key_function=None):
     to be completely parsed while building the index. Right now this is
     usually avoided.
 
+    For very large FASTA files, such as whole genomes, you can ask for the
+    sequences to be loaded lazily. Each record's sequence is then an
+    IndexedFastaSeq object which reads only the parts of the sequence you
+    use from the (memory mapped) file:
+
+    >>> records = SeqIO.index("GenBank/NC_005816.fna", "fasta", lazy=True)
+    >>> record = records["gi|45478711|ref|NC_005816.1|"]
+    >>> len(record)
+    9609
+    >>> print(record.seq[1000:1030])
+    GAAAAAAGAGTATGACGTGCATCTTGATGA
+    >>> records.close()
+
+    Scanning a very large file can take a long time, so you can ask for
+    the keys and offsets to be saved to a compact binary index file to be
+    reused next time (for example by each of your worker processes):
+
+    >>> records = SeqIO.index("Quality/example.fastq", "fastq",
+    ...                       index_filename="example_fastq.idx")
+    >>> len(records)
+    3
+    >>> records.close()
+    >>> records = SeqIO.index("Quality/example.fastq", "fastq",
+    ...                       index_filename="example_fastq.idx")
+    >>> print(records["EAS54_6_R1_2_1_540_792"].seq)
+    TTGGCAGGCCAAGGCCGATGGATCA
+    >>> records.close()
+    >>> import os
+    >>> os.remove("example_fastq.idx")
+
+    The index file records the size, modification time and a checksum of the
+    sequence file, and if any of these have changed the file is rescanned and
+    the index file replaced. You must use the same key_function each time.
+    Unlike Bio.SeqIO.index_db(), the index is loaded into memory, so lookups
+    are as fast as with the plain in memory index.
+
+    This uses the samtools style FASTA index (the filename plus a .fai
+    extension) if one exists, otherwise the file is scanned to work out
+    the same information, in which case all the sequence lines of each
+    record must be the same length (except the last). This also works
+    with BGZF compressed FASTA files, decompressing only the blocks needed
+    (using the bgzip style block index, the filename plus .gzi, if found).
+
     See Also: Bio.SeqIO.index_db() and Bio.SeqIO.to_dict()
     """
     # Try and give helpful error messages:
@@ -868,19 +921,33 @@ def index(filename, format, alphabet=None, key_function=None):
 
     # Map the file format to a sequence iterator:
     from ._index import _FormatToRandomAccess  # Lazy import
+    from ._index import FastaFaiRandomAccess
     from Bio.File import _IndexedSeqFileDict
-    try:
-        proxy_class = _FormatToRandomAccess[format]
-    except KeyError:
-        raise ValueError("Unsupported format %r" % format)
+    if lazy:
+        if format != "fasta":
+            raise ValueError("Lazy loading is only supported for FASTA files")
+        if index_filename:
+            raise ValueError("Lazy loading uses a .fai index, "
+                             "not index_filename")
+        proxy_class = FastaFaiRandomAccess
+    else:
+        try:
+            proxy_class = _FormatToRandomAccess[format]
+        except KeyError:
+            raise ValueError("Unsupported format %r" % format)
     repr = "SeqIO.index(%r, %r, alphabet=%r, key_function=%r)" \
         % (filename, format, alphabet, key_function)
+    if lazy:
+        repr = repr[:-1] + ", lazy=True)"
+    if index_filename:
+        repr = repr[:-1] + ", index_filename=%r)" % index_filename
     return _IndexedSeqFileDict(proxy_class(filename, format, alphabet),
-                               key_function, repr, "SeqRecord")
+                               key_function, repr, "SeqRecord",
+                               index_filename, filename, format)
 
 
 def index_db(index_filename, filenames=None, format=None, alphabet=None,
-             key_function=None):
+             key_function=None, processes=1, progress=None, batch_size=10000):
     """Index several sequence files and return a dictionary like object.
 
     The index is stored in an SQLite database rather than in memory (as in the
@@ -898,6 +965,13 @@ def index_db(index_filename, filenames=None, format=None, alphabet=None,
         - key_function - Optional callback function which when given a
           SeqRecord identifier string should return a unique
           key for the dictionary.
+        - processes - Optional number of worker processes used to scan the
+          files in parallel when building a new index (default 1).
+        - progress - Optional callback function, called after each file has
+          been indexed with the number of files done so far, the total
+          number of files, and the number of records indexed so far.
+        - batch_size - Optional number of records inserted into (or keys
+          looked up in) the SQLite database at a time (default 10000).
 
     This indexing function will return a dictionary like object, giving the
     SeqRecord objects as values:
@@ -922,9 +996,24 @@ def index_db(index_filename, filenames=None, format=None, alphabet=None,
 
     In this example the two files contain 85 and 10 records respectively.
 
+    To fetch many records at once, use the get_many method. This looks up
+    the keys in bulk, and returns (key, record) tuples in the order the
+    records appear in the files (which makes the disk access sequential):
+
+    >>> records = SeqIO.index_db(idx_name, files, "fasta", generic_protein, get_gi)
+    >>> for key, record in records.get_many(["45478717", "7525076"]):
+    ...     print("%s %i" % (key, len(record)))
+    7525076 2294
+    45478717 357
+    >>> records.close()
+
     BGZF compressed files are supported, and detected automatically. Ordinary
     GZIP compressed files are not supported.
 
+    When building a new index of many files, using processes=4 (say) will
+    scan up to four files at once, each in its own process. The key_function
+    is only used in the main process, so does not need to be picklable.
+
     See Also: Bio.SeqIO.index() and Bio.SeqIO.to_dict(), and the Python module
     glob which is useful for building lists of files.
     """
@@ -946,22 +1035,30 @@ def index_db(index_filename, filenames=None, format=None, alphabet=None,
                                      isinstance(alphabet, AlphabetEncoder)):
         raise ValueError("Invalid alphabet, %r" % alphabet)
 
-    # Map the file format to a sequence iterator:
-    from ._index import _FormatToRandomAccess  # Lazy import
     from Bio.File import _SQLiteManySeqFilesDict
     repr = "SeqIO.index_db(%r, filenames=%r, format=%r, alphabet=%r, key_function=%r)" \
                % (index_filename, filenames, format, alphabet, key_function)
 
-    def proxy_factory(format, filename=None):
-        """Given a filename returns proxy object, else boolean if format OK."""
-        if filename:
-            return _FormatToRandomAccess[format](filename, format, alphabet)
-        else:
-            return format in _FormatToRandomAccess
-
+    # Using a partial function (not a closure) so this can be pickled
+    # for use in worker processes:
+    proxy_factory = functools.partial(_index_db_proxy_factory, alphabet)
     return _SQLiteManySeqFilesDict(index_filename, filenames,
                                    proxy_factory, format,
-                                   key_function, repr)
+                                   key_function, repr,
+                                   batch_size=batch_size,
+                                   processes=processes, progress=progress)
+
+
+def _index_db_proxy_factory(alphabet, format, filename=None):
+    """Return proxy object for a filename, else boolean if format OK (PRIVATE).
+
+    Used via functools.partial in index_db.
+    """
+    from ._index import _FormatToRandomAccess  # Lazy import
+    if filename:
+        return _FormatToRandomAccess[format](filename, format, alphabet)
+    else:
+        return format in _FormatToRandomAccess
 
 
 def convert(in_file, in_format, out_file, out_format, alphabet=None):
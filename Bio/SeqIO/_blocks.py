@@ -0,0 +1,274 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Chunked FASTA and FASTQ parsing into batches of records (PRIVATE).
+
+You are not expected to access this module directly, instead use the
+FastaBlockIterator function in Bio.SeqIO.FastaIO or the FastqBlockIterator
+function in Bio.SeqIO.QualityIO, which return RecordBlock objects defined
+here.
+
+Rather than reading the file line by line, these read it in large chunks
+and use NumPy to find the line breaks and record boundaries in each chunk,
+so the per-record Python overhead is minimal.
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to parse FASTA or FASTQ files in blocks.")
+
+
+class RecordBlock(object):
+    """A batch of FASTA or FASTQ records held as offsets into a buffer.
+
+    The data attribute is the bytes buffer read from the file, and the
+    title_starts, title_ends, seq_starts and seq_ends attributes are
+    NumPy arrays of the offsets of each record's title line (without
+    the leading > or @ character) and sequence within that buffer. For
+    FASTQ there are also qual_starts and qual_ends arrays, otherwise
+    these are None.
+
+    For FASTA files the sequence regions can include line breaks, which are
+    removed by the sequences method. For FASTQ files, each record must be
+    four lines (no line wrapping), so the sequence and quality regions are
+    exact.
+    """
+
+    def __init__(self, data, title_starts, title_ends, seq_starts, seq_ends,
+                 qual_starts=None, qual_ends=None):
+        """Create a RecordBlock from the buffer and offset arrays."""
+        self.data = data
+        self.title_starts = title_starts
+        self.title_ends = title_ends
+        self.seq_starts = seq_starts
+        self.seq_ends = seq_ends
+        self.qual_starts = qual_starts
+        self.qual_ends = qual_ends
+
+    def __len__(self):
+        """Return the number of records in the block."""
+        return len(self.title_starts)
+
+    def __repr__(self):
+        """Return a short summary of the block."""
+        return "<%s with %i records>" % (self.__class__.__name__, len(self))
+
+    def titles(self):
+        """Return a list of the title lines (as bytes)."""
+        data = self.data
+        return [data[s:e].rstrip() for s, e in
+                zip(self.title_starts.tolist(), self.title_ends.tolist())]
+
+    def sequences(self):
+        """Return a list of the sequences (as bytes, without whitespace)."""
+        data = self.data
+        sequences = [data[s:e] for s, e in
+                     zip(self.seq_starts.tolist(), self.seq_ends.tolist())]
+        if self.qual_starts is None:
+            # FASTA, remove any line breaks or spaces
+            sequences = [s.translate(None, b" \r\n") for s in sequences]
+        return sequences
+
+    def seq_lengths(self):
+        """Return a NumPy array of the sequence lengths.
+
+        For FASTQ this is calculated from the offsets, for FASTA the
+        whitespace in each sequence must be counted.
+        """
+        if self.qual_starts is not None:
+            return self.seq_ends - self.seq_starts
+        return numpy.array([len(s) for s in self.sequences()], numpy.intp)
+
+    def qualities(self, offset=33):
+        """Return a list of NumPy arrays of the quality scores (FASTQ only).
+
+        The scores are the ASCII values minus the offset, by default 33 as
+        used in Sanger style FASTQ files, as unsigned 8 bit integers. These
+        can be used with the quality functions in Bio.SeqIO.QualityIO.
+        """
+        if self.qual_starts is None:
+            raise ValueError("No quality scores, this is not a FASTQ block")
+        if not len(self):
+            return []
+        # Only look at this batch's part of the (shared) buffer
+        start = int(self.qual_starts[0])
+        values = numpy.frombuffer(self.data, numpy.uint8,
+                                  int(self.qual_ends[-1]) - start, start)
+        bounds = list(zip((self.qual_starts - start).tolist(),
+                          (self.qual_ends - start).tolist()))
+        if offset:
+            for index, (s, e) in enumerate(bounds):
+                if s < e and values[s:e].min() < offset:
+                    title = self.titles()[index]
+                    raise ValueError("Quality score below zero using offset "
+                                     "%i in record %r" % (offset, title))
+            values = values - numpy.uint8(offset)
+        return [values[s:e] for s, e in bounds]
+
+    def __iter__(self):
+        """Iterate over the records as tuples of bytes.
+
+        For FASTA this gives (title, sequence) tuples like SimpleFastaParser,
+        for FASTQ (title, sequence, quality) like FastqGeneralIterator.
+        """
+        if self.qual_starts is None:
+            return iter(zip(self.titles(), self.sequences()))
+        data = self.data
+        quals = [data[s:e] for s, e in
+                 zip(self.qual_starts.tolist(), self.qual_ends.tolist())]
+        return iter(zip(self.titles(), self.sequences(), quals))
+
+
+def _line_ends(values, ends):
+    """Move line ends back before any carriage return (PRIVATE)."""
+    return ends - (values[numpy.maximum(ends - 1, 0)] == 13)
+
+
+def _parse_fasta(data, at_eof):
+    """Find the complete FASTA records in a buffer starting with > (PRIVATE).
+
+    Returns a RecordBlock for the complete records, and the offset at which
+    the remaining incomplete record (if any) starts.
+    """
+    values = numpy.frombuffer(data, numpy.uint8)
+    starts = numpy.flatnonzero(values == 62)  # i.e. ">"
+    # Only count > at the start of a line
+    starts = starts[(starts == 0) |
+                    (values[numpy.maximum(starts - 1, 0)] == 10)]
+    if at_eof:
+        ends = numpy.append(starts[1:], len(data))
+    else:
+        # The last record may continue in the next chunk
+        ends = starts[1:]
+        starts = starts[:-1]
+    # Title lines run to the next new line, using the end of the data
+    # as a sentinel in case there are no more new lines:
+    newlines = numpy.append(numpy.flatnonzero(values == 10), len(data))
+    title_ends = numpy.minimum(newlines[numpy.searchsorted(newlines, starts)],
+                               ends)
+    seq_starts = numpy.minimum(title_ends + 1, ends)
+    block = RecordBlock(data, starts + 1, _line_ends(values, title_ends),
+                        seq_starts, ends)
+    if at_eof:
+        return block, len(data)
+    elif len(ends):
+        return block, int(ends[-1])
+    else:
+        return block, 0
+
+
+def _parse_fastq(data, at_eof):
+    """Find the complete FASTQ records in a buffer starting with @ (PRIVATE).
+
+    Returns a RecordBlock for the complete records, and the offset at which
+    the remaining incomplete record (if any) starts. Each record must be
+    exactly four lines.
+    """
+    values = numpy.frombuffer(data, numpy.uint8)
+    newlines = numpy.flatnonzero(values == 10)
+    if at_eof and data and not data.endswith(b"\n"):
+        # Treat the end of the data as the end of the last line
+        newlines = numpy.append(newlines, len(data))
+    count = len(newlines) // 4
+    used = int(newlines[4 * count - 1]) + 1 if count else 0
+    if at_eof and data[used:].strip():
+        raise ValueError("Incomplete FASTQ record at end of file")
+    line_starts = numpy.append(0, newlines[:4 * count - 1] + 1) \
+        if count else numpy.zeros(0, numpy.intp)
+    line_ends = _line_ends(values, newlines[:4 * count])
+    title_starts = line_starts[0::4]
+    plus_starts = line_starts[2::4]
+    if (values[title_starts] != 64).any():  # i.e. "@"
+        raise ValueError(
+            "Records in Fastq files should start with '@' character")
+    if (values[plus_starts] != 43).any():  # i.e. "+"
+        raise ValueError("Expected a '+' line in each four line FASTQ "
+                         "record (line wrapped FASTQ is not supported)")
+    seq_starts = line_starts[1::4]
+    seq_ends = line_ends[1::4]
+    qual_starts = line_starts[3::4]
+    qual_ends = line_ends[3::4]
+    if ((qual_ends - qual_starts) != (seq_ends - seq_starts)).any():
+        raise ValueError("Lengths of sequence and quality values differ "
+                         "(line wrapped FASTQ is not supported)")
+    # Check for any spaces or tabs within the sequences:
+    spaces = numpy.flatnonzero((values == 32) | (values == 9))
+    if len(spaces) and len(seq_starts):
+        i = numpy.searchsorted(seq_starts, spaces, "right") - 1
+        if ((i >= 0) & (spaces < seq_ends[i.clip(0)])).any():
+            raise ValueError("Whitespace is not allowed in the sequence.")
+    # Any repeated title on the + line must match the @ line:
+    title_ends = line_ends[0::4]
+    plus_ends = line_ends[2::4]
+    for i in numpy.flatnonzero(plus_ends - plus_starts > 1).tolist():
+        if data[title_starts[i] + 1:title_ends[i]].rstrip() != \
+                data[plus_starts[i] + 1:plus_ends[i]].rstrip():
+            raise ValueError("Sequence and quality captions differ.")
+    block = RecordBlock(data, title_starts + 1, title_ends, seq_starts,
+                        seq_ends, qual_starts, qual_ends)
+    if at_eof:
+        return block, len(data)
+    return block, used
+
+
+def _slice_block(block, start, end):
+    """Return a RecordBlock for a subset of the records (PRIVATE)."""
+    qual_starts = block.qual_starts
+    qual_ends = block.qual_ends
+    if qual_starts is not None:
+        qual_starts = qual_starts[start:end]
+        qual_ends = qual_ends[start:end]
+    return RecordBlock(block.data, block.title_starts[start:end],
+                       block.title_ends[start:end],
+                       block.seq_starts[start:end],
+                       block.seq_ends[start:end], qual_starts, qual_ends)
+
+
+def _block_iterator(handle, parse, marker, batch_size, chunk_size):
+    """Read the file in chunks, and yield RecordBlocks (PRIVATE).
+
+    Any text before the first line starting with the marker (b">" or b"@")
+    is ignored. Each block has batch_size records, except for the final
+    block which may have fewer.
+    """
+    if batch_size < 1:
+        raise ValueError("The batch size should be at least one")
+    read = handle.read
+    data = b""
+    started = False
+    at_eof = False
+    while not at_eof:
+        # If the data so far was not enough for a batch, this doubles it
+        # (so that huge records are not reparsed too many times)
+        chunk = read(max(chunk_size, len(data)))
+        if not isinstance(chunk, bytes):
+            raise ValueError("Is this handle in text mode not binary mode?")
+        at_eof = not chunk
+        data += chunk
+        if not started:
+            # Skip any text before the first record
+            if data.startswith(marker):
+                started = True
+            else:
+                i = data.find(b"\n" + marker)
+                if i == -1:
+                    # Keep the last (partial) line in case it continues
+                    data = data[data.rfind(b"\n") + 1:]
+                    continue
+                data = data[i + 1:]
+                started = True
+        block, used = parse(data, at_eof)
+        if len(block) < batch_size and not at_eof:
+            # Read some more first (reparsing the data, but this only
+            # happens if a batch needs more than one chunk of the file)
+            continue
+        full = len(block) if at_eof else len(block) - len(block) % batch_size
+        for start in range(0, full, batch_size):
+            yield _slice_block(block, start, start + batch_size)
+        if full < len(block):
+            # Carry over the remaining records to the next batch
+            used = int(block.title_starts[full]) - 1
+        data = data[used:]
@@ -25,14 +25,19 @@ temp lookup file might be one idea (e.g. using SQLite or an OBDA style index).
 
 from __future__ import print_function
 
+import os
 import re
+import mmap
 from io import BytesIO
 from Bio._py3k import StringIO
 from Bio._py3k import _bytes_to_string
 
 from Bio import SeqIO
 from Bio import Alphabet
+from Bio import bgzf
 from Bio.File import _IndexedSeqFileProxy, _open_for_random_access
+from Bio.SeqRecord import SeqRecord
+from Bio.SeqIO.FastaIO import SimpleFaiParser, fai_entries, IndexedFastaSeq
 
 
 class SeqFileRandomAccess(_IndexedSeqFileProxy):
@@ -228,6 +233,135 @@ class SequentialSeqFileRandomAccess(SeqFileRandomAccess):
         return b"".join(lines)
 
 
+class _BgzfBuffer(object):
+    """Read only buffer like access to the decompressed data of a BGZF file.
+
+    Supports just enough of the interface of an mmap object for use with
+    IndexedFastaSeq, i.e. slicing and rfind, using offsets within the
+    decompressed data. Only the BGZF blocks overlapping the requested
+    region are decompressed, using the BGZF block index (.gzi) to find
+    them (PRIVATE).
+    """
+
+    def __init__(self, handle, blocks):
+        self._handle = handle
+        self._blocks = blocks
+        self._data_starts = [data_start for raw_start, data_start in blocks]
+
+    def virtual_offset(self, offset):
+        """Convert an offset in the decompressed data to a virtual offset."""
+        return bgzf.uncompressed_to_virtual_offset(self._blocks, offset,
+                                                   self._data_starts)
+
+    def __getitem__(self, index):
+        start, end, step = index.start, index.stop, index.step
+        assert step is None and 0 <= start, index
+        if end <= start:
+            return b""
+        self._handle.seek(self.virtual_offset(start))
+        return self._handle.read(end - start)
+
+    def rfind(self, sub, start, end):
+        # Search backwards in chunks (titles are normally short)
+        chunk_end = end
+        while chunk_end > start:
+            chunk_start = max(start, chunk_end - 1024)
+            index = self[chunk_start:chunk_end].rfind(sub)
+            if index != -1:
+                return chunk_start + index
+            chunk_end = chunk_start
+        return -1
+
+
+class FastaFaiRandomAccess(SequentialSeqFileRandomAccess):
+    """Lazy random access to a FASTA file using a FASTA index (.fai).
+
+    Used for Bio.SeqIO.index(..., lazy=True), where the records returned
+    use an IndexedFastaSeq object reading the sequence on demand from the
+    memory mapped file. If there is an existing samtools style FASTA index
+    next to the file (the filename plus a .fai extension) it is used,
+    otherwise the file is scanned to work out the same information.
+
+    BGZF compressed FASTA files are also supported, in which case only
+    the BGZF blocks needed are decompressed. This uses the bgzip style
+    block index (the filename plus a .gzi extension) if one exists,
+    otherwise the file is scanned to find the blocks.
+
+    The offsets used as the dictionary values are those of the sequence
+    (not the title line) within the (decompressed) file.
+    """
+
+    def __init__(self, filename, format, alphabet):
+        SequentialSeqFileRandomAccess.__init__(self, filename, format,
+                                               alphabet)
+        self._filename = filename
+        if isinstance(self._handle, bgzf.BgzfReader):
+            gzi_filename = filename + ".gzi"
+            if os.path.isfile(gzi_filename):
+                with open(gzi_filename, "rb") as handle:
+                    blocks = bgzf.read_gzi(handle)
+            else:
+                with open(filename, "rb") as handle:
+                    blocks = [(raw_start, data_start) for
+                              raw_start, raw_length, data_start, data_length
+                              in bgzf.BgzfBlocks(handle)]
+            self._data = _BgzfBuffer(self._handle, blocks)
+        elif os.path.getsize(filename):
+            self._data = mmap.mmap(self._handle.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        else:
+            # Can't memory map an empty file
+            self._data = b""
+        # Maps the sequence offset to length, bases and bytes per line:
+        self._lines = {}
+
+    def __iter__(self):
+        """Returns (id, offset, length) tuples."""
+        fai_filename = self._filename + ".fai"
+        if os.path.isfile(fai_filename):
+            with open(fai_filename) as handle:
+                entries = list(SimpleFaiParser(handle))
+        else:
+            self._handle.seek(0)
+            entries = fai_entries(self._handle)
+        for name, length, offset, line_bases, line_width in entries:
+            self._lines[offset] = (length, line_bases, line_width)
+            yield name, offset, 0
+
+    def _title_offset(self, offset):
+        """Offset of the title line for a sequence offset (PRIVATE)."""
+        # The title line ends just before the sequence, so starts after the
+        # previous new line (the title itself may contain a ">" character)
+        start = self._data.rfind(b"\n", 0, max(offset - 1, 0)) + 1
+        if self._data[start:start + 1] != b">":
+            raise ValueError("No FASTA title line before offset %i" % offset)
+        return start
+
+    def get(self, offset):
+        """Returns SeqRecord using an IndexedFastaSeq for the sequence."""
+        length, line_bases, line_width = self._lines[offset]
+        title = _bytes_to_string(
+            self._data[self._title_offset(offset) + 1:offset]).strip()
+        try:
+            first_word = title.split(None, 1)[0]
+        except IndexError:
+            first_word = ""
+        alphabet = self._alphabet
+        if alphabet is None:
+            alphabet = Alphabet.single_letter_alphabet
+        seq = IndexedFastaSeq(self._data, offset, length,
+                              line_bases, line_width, alphabet)
+        return SeqRecord(seq, id=first_word, name=first_word,
+                         description=title)
+
+    def get_raw(self, offset):
+        """Return the raw record from the file as a bytes string."""
+        start = self._title_offset(offset)
+        if isinstance(self._data, _BgzfBuffer):
+            start = self._data.virtual_offset(start)
+        return SequentialSeqFileRandomAccess.get_raw(self, start)
+
+
 #######################################
 # Fiddly indexers: GenBank, EMBL, ... #
 #######################################
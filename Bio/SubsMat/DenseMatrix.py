@@ -0,0 +1,237 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Substitution matrices held as dense symmetric NumPy arrays.
+
+The SeqMat class in Bio.SubsMat stores a half matrix as a dictionary keyed
+by pairs of letters, and the functions building log odds matrices from it
+loop over these pairs in Python. The DenseMatrix class here holds the same
+values in a square symmetric NumPy array, with the letters mapped to the
+rows and columns by a Bio.Alphabet.Encoding:
+
+>>> from Bio.SubsMat.DenseMatrix import DenseMatrix
+>>> arm = DenseMatrix.from_pairs("AC", [("AACA", "ACCA"), ("CCAA", "CAAC")])
+>>> arm
+DenseMatrix('AC', array([[3., 3.],
+       [3., 2.]]))
+>>> print(arm["C", "A"])
+3.0
+
+As in a SeqMat half matrix, the value for a pair of different letters
+combines both orders (here A was replaced by C twice, and C by A once).
+Looking up a pair of letters costs the same regardless of the alphabet
+size, and since the rows and columns follow the letter codes, the values
+array can be indexed directly with encoded sequences:
+
+>>> codes = arm.encoding.encode("CA")
+>>> print(arm.values[codes[0], codes[1]])
+3.0
+
+A DenseMatrix can be converted to and from a SeqMat (or one of its
+subclasses) with the to_seqmat and from_seqmat methods, and the log_odds
+method builds a log odds matrix in the same way as make_log_odds_matrix.
+"""
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SubsMat.DenseMatrix.")
+
+from Bio.Alphabet.Encoding import get_encoding
+from Bio import SubsMat
+
+
+class DenseMatrix(object):
+    """A symmetric substitution matrix held as a square NumPy array.
+
+    The letters attribute is the string of letters, and values is the
+    matrix of floats with values[i, j] the entry for the letters letters[i]
+    and letters[j] (as in a SeqMat half matrix, so for a pair of different
+    letters this combines both orders).
+    """
+
+    def __init__(self, letters, values):
+        """Create a DenseMatrix from a string of letters and a square array.
+
+        The array is copied, and must be symmetric.
+        """
+        self.encoding = get_encoding(letters)
+        self.letters = self.encoding.letters
+        values = numpy.array(values, float)
+        size = len(self.letters)
+        if values.shape != (size, size):
+            raise ValueError("Expected a %i by %i array of values, not %r"
+                             % (size, size, values.shape))
+        if not (values == values.T).all():
+            raise ValueError("The array of values is not symmetric")
+        self.values = values
+
+    def __repr__(self):
+        """Return a string representation of the matrix."""
+        return "DenseMatrix(%r, %r)" % (self.letters, self.values)
+
+    def __len__(self):
+        """Return the number of letters."""
+        return len(self.letters)
+
+    def __getitem__(self, key):
+        """Return the value for a pair of letters (in either order)."""
+        letter1, letter2 = key
+        code1 = self.encoding._code(letter1)
+        code2 = self.encoding._code(letter2)
+        if code1 == self.encoding.unknown or code2 == self.encoding.unknown:
+            raise KeyError(key)
+        return float(self.values[code1, code2])
+
+    def _half(self):
+        """Return the values of the half matrix (PRIVATE).
+
+        This is the upper triangle (including the diagonal) as a flat
+        array, i.e. one value for each entry in a SeqMat half matrix.
+        """
+        return self.values[numpy.triu_indices(len(self.letters))]
+
+    @classmethod
+    def from_pairs(cls, letters, pairs):
+        """Count the accepted replacements in pairs of aligned sequences.
+
+        Arguments:
+         - letters - string of the letters to count.
+         - pairs - iterable of pairs of aligned sequences of the same
+           length (strings, Seq objects, or similar).
+
+        Returns a DenseMatrix of the counts, i.e. an accepted replacements
+        matrix. Any positions where either sequence has a letter not in
+        letters (e.g. a gap) are ignored.
+        """
+        encoding = get_encoding(letters)
+        size = len(encoding) + 1
+        counts = numpy.zeros(size * size, numpy.intp)
+        for sequence1, sequence2 in pairs:
+            codes1 = encoding.encode(sequence1).astype(numpy.intp)
+            codes2 = encoding.encode(sequence2).astype(numpy.intp)
+            if len(codes1) != len(codes2):
+                raise ValueError("Aligned sequences should be the same "
+                                 "length, not %i and %i"
+                                 % (len(codes1), len(codes2)))
+            counts += numpy.bincount(codes1 * size + codes2,
+                                     minlength=size * size)
+        # Drop the row and column of the unknown code
+        counts = counts.reshape(size, size)[:-1, :-1]
+        values = counts + counts.T
+        values[numpy.diag_indices_from(values)] //= 2
+        return cls(encoding.letters, values)
+
+    @classmethod
+    def from_seqmat(cls, matrix):
+        """Create a DenseMatrix from a SeqMat (or a similar dictionary).
+
+        The letters are taken from the matrix ab_list attribute (if present,
+        otherwise from the dictionary keys), in sorted order. If both pairs
+        (a, b) and (b, a) are present they should have the same value.
+        """
+        try:
+            letters = matrix.ab_list
+        except AttributeError:
+            letters = set()
+            for pair in matrix:
+                letters.update(pair)
+        letters = "".join(sorted(letters))
+        encoding = get_encoding(letters)
+        return cls(encoding.letters, encoding.score_array(matrix))
+
+    def to_seqmat(self, matrix_class=SubsMat.SeqMat):
+        """Return the matrix as a SeqMat (or subclass) half matrix.
+
+        The keys are pairs of letters in sorted order, as used by SeqMat.
+        """
+        data = {}
+        rows, cols = numpy.triu_indices(len(self.letters))
+        for i, j, value in zip(rows.tolist(), cols.tolist(),
+                               self._half().tolist()):
+            pair = (self.letters[i], self.letters[j])
+            data[min(pair), max(pair)] = value
+        return matrix_class(data)
+
+    def letter_frequencies(self):
+        """Return the expected letter frequencies from observed frequencies.
+
+        For an observed frequency matrix this returns the same frequencies
+        as the FreqTable from Bio.SubsMat._exp_freq_table_from_obs_freq,
+        as a NumPy array in the order of the letters.
+        """
+        values = self.values
+        return (values.sum(axis=1) + values.diagonal()) / 2.0
+
+    def log_odds(self, exp_freq_table=None, logbase=2, factor=1.,
+                 round_digit=9, keep_nd=0):
+        """Build a log odds matrix from an accepted replacements matrix.
+
+        This does the same calculation as Bio.SubsMat.make_log_odds_matrix
+        (which see for the arguments) using NumPy arrays, and returns
+        a DenseMatrix. The exp_freq_table, if given, should be a FreqTable
+        or dictionary of frequencies for each letter.
+        """
+        obs_freq = self.values / self._half().sum()
+        if exp_freq_table:
+            exp_freq = numpy.array([exp_freq_table[letter]
+                                    for letter in self.letters], float)
+        else:
+            exp_freq = DenseMatrix(self.letters, obs_freq).letter_frequencies()
+        exp_freq_mat = 2.0 * numpy.outer(exp_freq, exp_freq)
+        exp_freq_mat[numpy.diag_indices_from(exp_freq_mat)] /= 2.0
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            subs = obs_freq / exp_freq_mat
+            lo = numpy.round(factor * numpy.log(subs) / numpy.log(logbase),
+                             round_digit)
+        lo[~(subs >= SubsMat.EPSILON)] = -999
+        if not keep_nd:
+            # As in _build_log_odds_mat, the minimum includes the -999
+            # entries for undetermined values
+            lo[lo <= -999] = lo.min()
+        return DenseMatrix(self.letters, lo)
+
+    def relative_entropy(self, other, logbase=2, diag=SubsMat.diagALL):
+        """Return the relative entropy of this matrix to another matrix.
+
+        This is the same calculation as Bio.SubsMat.two_mat_relative_entropy,
+        with diag one of diagALL, diagNO or diagONLY from Bio.SubsMat. The
+        two matrices must have the same letters.
+        """
+        self._check_letters(other)
+        size = len(self.letters)
+        rows, cols = numpy.triu_indices(size)
+        if diag == SubsMat.diagNO:
+            selected = rows != cols
+        elif diag == SubsMat.diagONLY:
+            selected = rows == cols
+        else:
+            selected = numpy.ones(len(rows), bool)
+        values_1 = self._half()
+        values_2 = other._half()
+        selected &= (values_1 > SubsMat.EPSILON) & \
+            (values_2 > SubsMat.EPSILON)
+        values_1 = values_1[selected]
+        values_2 = values_2[selected]
+        values_1 = values_1 / values_1.sum()
+        values_2 = values_2 / values_2.sum()
+        return float((values_1 * numpy.log(values_1 / values_2)).sum() /
+                     numpy.log(logbase))
+
+    def correlation(self, other):
+        """Return the linear correlation coefficient with another matrix.
+
+        This is the same calculation as Bio.SubsMat.two_mat_correlation,
+        using the values of the two half matrices, which must have the same
+        letters.
+        """
+        self._check_letters(other)
+        return float(numpy.corrcoef(self._half(), other._half())[0, 1])
+
+    def _check_letters(self, other):
+        """Check another matrix has the same letters (PRIVATE)."""
+        if self.letters != other.letters:
+            raise ValueError("Alphabet mismatch in passed matrices")
@@ -106,6 +106,13 @@ Methods for subtraction, addition and multiplication of matrices:
 * Jensen-Shannon distance between the distributions from which the
   matrices are derived. This is a distance function based on the
   distribution's entropies.
+
+Dense matrices:
+---------------
+The DenseMatrix class in Bio.SubsMat.DenseMatrix holds the same values as
+a square NumPy array, and can count an ARM directly from pairs of aligned
+sequences and build the log-odds matrix without looping in Python. Use its
+from_seqmat and to_seqmat methods to convert from and to a SeqMat.
 """
 
 
@@ -246,6 +253,18 @@ class SeqMat(dict):
                 result[i2] += value / 2
         return result
 
+    def score_array(self, default=None):
+        """Return the matrix as a square NumPy array.
+
+        The rows and columns follow the codes given by the integer encoding
+        of the matrix alphabet (see Bio.Alphabet.Encoding), so the array
+        can be indexed directly with an encoded sequence. Pairs of letters
+        missing from the matrix get the default score, or if this is None
+        a ValueError is raised.
+        """
+        from Bio.Alphabet.Encoding import get_encoding
+        return get_encoding(self.alphabet).score_array(self, default)
+
     def print_full_mat(self, f=None, format="%4d", topformat="%4s",
                 alphabet=None, factor=1, non_sym=None):
         f = f or sys.stdout
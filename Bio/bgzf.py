@@ -230,6 +230,8 @@ from __future__ import print_function
 import sys
 import zlib
 import struct
+from bisect import bisect_right
+from collections import OrderedDict
 
 from Bio._py3k import _as_bytes, _as_string
 from Bio._py3k import open as _open
@@ -243,12 +245,16 @@ _bgzf_eof = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00\x1b\x00
 _bytes_BC = b"BC"
 
 
-def open(filename, mode="rb"):
-    """Open a BGZF file for reading, writing or appending."""
+def open(filename, mode="rb", threads=1):
+    """Open a BGZF file for reading, writing or appending.
+
+    The optional threads argument is passed to the BgzfReader or BgzfWriter
+    to (de)compress the BGZF blocks in parallel.
+    """
     if "r" in mode.lower():
-        return BgzfReader(filename, mode)
+        return BgzfReader(filename, mode, threads=threads)
     elif "w" in mode.lower() or "a" in mode.lower():
-        return BgzfWriter(filename, mode)
+        return BgzfWriter(filename, mode, threads=threads)
     else:
         raise ValueError("Bad mode %r" % mode)
 
@@ -396,15 +402,95 @@ def BgzfBlocks(handle):
     data_start = 0
     while True:
         start_offset = handle.tell()
-        # This may raise StopIteration which is perfect here
-        block_length, data = _load_bgzf_block(handle)
+        try:
+            block_length, data = _load_bgzf_block(handle)
+        except StopIteration:
+            # End of file, can't let this escape from a generator
+            # under Python 3.7 or later (PEP 479)
+            return
         data_len = len(data)
         yield start_offset, block_length, data_start, data_len
         data_start += data_len
 
 
+def read_gzi(handle):
+    """Load a BGZF block index (.gzi file) as a list of offset pairs.
+
+    The bgzip tool can create these binary index files (using -i), which
+    record the start of each BGZF block in both the compressed file and the
+    decompressed data, allowing random access using uncompressed offsets.
+    Expects a handle opened in binary mode, and returns a list of (raw
+    start, data start) tuples, one per block, which always starts with
+    the first block at (0, 0). See also uncompressed_to_virtual_offset.
+    """
+    data = handle.read(8)
+    if len(data) != 8:
+        raise ValueError("Truncated BGZF index file, missing entry count")
+    count = struct.unpack("<Q", data)[0]
+    data = handle.read(16 * count)
+    if len(data) != 16 * count:
+        raise ValueError("Truncated BGZF index file, expected %i entries"
+                         % count)
+    values = struct.unpack("<%iQ" % (2 * count), data)
+    blocks = [(0, 0)]
+    blocks.extend(zip(values[0::2], values[1::2]))
+    return blocks
+
+
+def write_gzi(handle, blocks):
+    """Write a BGZF block index (.gzi file) as used by bgzip, returns count.
+
+    Takes a handle opened in binary mode, and an iterable of (raw start,
+    data start) tuples, for example from read_gzi, or with the first and
+    third values from the BgzfBlocks function. As with bgzip, the first
+    block at (0, 0) is implied and not written to the file.
+    """
+    blocks = [(raw_start, data_start) for raw_start, data_start in blocks
+              if raw_start]
+    values = [value for pair in blocks for value in pair]
+    handle.write(struct.pack("<Q", len(blocks)))
+    handle.write(struct.pack("<%iQ" % len(values), *values))
+    return len(blocks)
+
+
+def uncompressed_to_virtual_offset(blocks, offset, data_starts=None):
+    """Convert an offset in the decompressed data to a BGZF virtual offset.
+
+    Takes a list of (raw start, data start) tuples for the BGZF blocks, as
+    from read_gzi, and the offset within the decompressed data:
+
+    >>> blocks = [(0, 0), (18239, 65536), (36462, 131072)]
+    >>> split_virtual_offset(uncompressed_to_virtual_offset(blocks, 65540))
+    (18239, 4)
+
+    When converting many offsets, you can also pass a list of just the
+    data start offsets of the blocks to save re-computing this each time.
+    """
+    if data_starts is None:
+        data_starts = [data_start for raw_start, data_start in blocks]
+    index = bisect_right(data_starts, offset) - 1
+    if index < 0:
+        raise ValueError("Negative offset %i" % offset)
+    raw_start, data_start = blocks[index]
+    return make_virtual_offset(raw_start, offset - data_start)
+
+
 def _load_bgzf_block(handle, text_mode=False):
     """Internal function to load the next BGZF function (PRIVATE)."""
+    block_size, data = _inflate_bgzf_block(_read_bgzf_block(handle))
+    if text_mode:
+        return block_size, _as_string(data)
+    else:
+        return block_size, data
+
+
+def _read_bgzf_block(handle):
+    """Internal function to read the next BGZF block without decompressing.
+
+    Returns a tuple of the block size, the compressed data, the CRC, and the
+    length of the uncompressed data, for use with _inflate_bgzf_block. This
+    split allows the decompression to be done in another thread (PRIVATE).
+    """
     magic = handle.read(4)
     if not magic:
         # End of file
@@ -431,10 +517,20 @@ def _load_bgzf_block(handle, text_mode=False):
     assert block_size is not None, "Missing BC, this isn't a BGZF file!"
     # Now comes the compressed data, CRC, and length of uncompressed data.
     deflate_size = block_size - 1 - extra_len - 19
-    d = zlib.decompressobj(-15)  # Negative window size means no headers
-    data = d.decompress(handle.read(deflate_size)) + d.flush()
+    deflate_data = handle.read(deflate_size)
     expected_crc = handle.read(4)
     expected_size = struct.unpack("<I", handle.read(4))[0]
+    return block_size, deflate_data, expected_crc, expected_size
+
+
+def _inflate_bgzf_block(raw_block):
+    """Internal function to decompress a block from _read_bgzf_block.
+
+    Returns the block size and the decompressed data (PRIVATE).
+    """
+    block_size, deflate_data, expected_crc, expected_size = raw_block
+    d = zlib.decompressobj(-15)  # Negative window size means no headers
+    data = d.decompress(deflate_data) + d.flush()
     assert expected_size == len(data), \
         "Decompressed to %i, not %i" % (len(data), expected_size)
     # Should cope with a mix of Python platforms...
@@ -445,10 +541,48 @@ def _load_bgzf_block(handle, text_mode=False):
         crc = struct.pack("<I", crc)
     assert expected_crc == crc, \
         "CRC is %s, not %s" % (crc, expected_crc)
-    if text_mode:
-        return block_size, _as_string(data)
-    else:
-        return block_size, data
+    return block_size, data
+
+
+def _compress_bgzf_block(block, compresslevel=6):
+    """Internal function to compress data as a single BGZF block (PRIVATE).
+
+    Returns the complete block as bytes, ready to be written to disk.
+    """
+    assert len(block) <= 65536
+    # Giving a negative window bits means no gzip/zlib headers,
+    # -15 used in samtools
+    c = zlib.compressobj(compresslevel,
+                         zlib.DEFLATED,
+                         -15,
+                         zlib.DEF_MEM_LEVEL,
+                         0)
+    compressed = c.compress(block) + c.flush()
+    del c
+    assert len(compressed) < 65536, \
+        "TODO - Didn't compress enough, try less data in this block"
+    bsize = struct.pack("<H", len(compressed) + 25)  # includes -1
+    crc = struct.pack("<I", zlib.crc32(block) & 0xffffffff)
+    uncompressed_length = struct.pack("<I", len(block))
+    # Fixed 16 bytes,
+    # gzip magic bytes (4) mod time (4),
+    # gzip flag (1), os (1), extra length which is six (2),
+    # sub field which is BC (2), sub field length of two (2),
+    # Variable data,
+    # 2 bytes: block length as BC sub field (2)
+    # X bytes: the data
+    # 8 bytes: crc (4), uncompressed data length (4)
+    data = _bgzf_header + bsize + compressed + crc + uncompressed_length
+    return data
+
+
+def _thread_pool(threads):
+    """Internal function returning a pool of threads, or None (PRIVATE)."""
+    if threads == 1:
+        return None
+    # Only import this if needed (e.g. not available on Jython)
+    from multiprocessing.pool import ThreadPool
+    return ThreadPool(threads)
 
 
 class BgzfReader(object):
@@ -518,13 +652,26 @@ class BgzfReader(object):
     block can be up to 64kb, the default cache could take up to 6MB of
     RAM. The cache is not important for reading through the file in one
     pass, but is important for improving performance of random access.
+    You can also (or instead) limit the total size of the decompressed
+    blocks cached with the max_cache_bytes argument. When either limit
+    is reached, the least recently used blocks are removed first.
+
+    With the threads argument greater than one, whenever a block must be
+    loaded from disk the following blocks are read too (up to one per
+    thread) and decompressed in parallel in a pool of threads, then kept
+    in the cache ready for use. This speeds up reading through large files.
     """
 
-    def __init__(self, filename=None, mode="r", fileobj=None, max_cache=100):
+    def __init__(self, filename=None, mode="r", fileobj=None, max_cache=100,
+                 max_cache_bytes=None, threads=1):
         # TODO - Assuming we can seek, check for 28 bytes EOF empty block
         # and if missing warn about possible truncation (as in samtools)?
         if max_cache < 1:
             raise ValueError("Use max_cache with a minimum of 1")
+        if max_cache_bytes is not None and max_cache_bytes < 65536:
+            raise ValueError("Use max_cache_bytes with a minimum of 65536")
+        if threads < 1:
+            raise ValueError("Use threads with a minimum of 1")
         # Must open the BGZF file in binary mode, but we may want to
         # treat the contents as either text or binary (unicode or
         # bytes under Python 3)
@@ -543,7 +690,12 @@ class BgzfReader(object):
             self._newline = b"\n"
         self._handle = handle
         self.max_cache = max_cache
-        self._buffers = {}
+        self.max_cache_bytes = max_cache_bytes
+        # Least recently used blocks first:
+        self._buffers = OrderedDict()
+        self._cache_bytes = 0
+        self._threads = threads
+        self._pool = _thread_pool(threads)
         self._block_start_offset = None
         self._block_raw_length = None
         self._load_block(handle.tell())
@@ -558,22 +710,25 @@ class BgzfReader(object):
             self._within_block_offset = 0
             return
         elif start_offset in self._buffers:
-            # Already in cache
-            self._buffer, self._block_raw_length = self._buffers[start_offset]
+            # Already in cache, move it to the end as most recently used
+            self._buffer, self._block_raw_length = \
+                self._buffers.pop(start_offset)
+            self._buffers[start_offset] = \
+                self._buffer, self._block_raw_length
             self._within_block_offset = 0
             self._block_start_offset = start_offset
             return
-        # Must hit the disk... first check cache limits,
-        while len(self._buffers) >= self.max_cache:
-            # TODO - Implemente LRU cache removal?
-            self._buffers.popitem()
-        # Now load the block
+        # Must hit the disk...
         handle = self._handle
         if start_offset is not None:
             handle.seek(start_offset)
         self._block_start_offset = handle.tell()
         try:
-            block_size, self._buffer = _load_bgzf_block(handle, self._text)
+            if self._pool is None:
+                block_size, self._buffer = _load_bgzf_block(handle,
+                                                            self._text)
+            else:
+                block_size, self._buffer = self._load_blocks_in_parallel()
         except StopIteration:
             # EOF
             block_size = 0
@@ -584,7 +739,52 @@ class BgzfReader(object):
         self._within_block_offset = 0
         self._block_raw_length = block_size
         # Finally save the block in our cache,
-        self._buffers[self._block_start_offset] = self._buffer, block_size
+        self._cache_block(self._block_start_offset, self._buffer, block_size)
+
+    def _load_blocks_in_parallel(self):
+        """Load the current block, and decompress the following blocks too.
+
+        Reads the compressed data for up to one block per thread, starting
+        with the block at the current handle position, and decompresses
+        them in parallel. Adds the following blocks to the cache, and returns
+        the block size and data for the first block (PRIVATE).
+        """
+        handle = self._handle
+        start_offset = self._block_start_offset
+        raw_blocks = [_read_bgzf_block(handle)]  # may raise StopIteration
+        offsets = [start_offset]
+        offset = start_offset + raw_blocks[0][0]
+        while len(raw_blocks) < min(self._threads, self.max_cache) and \
+                offset not in self._buffers:
+            try:
+                raw_blocks.append(_read_bgzf_block(handle))
+            except StopIteration:
+                break
+            offsets.append(offset)
+            offset += raw_blocks[-1][0]
+        blocks = self._pool.map(_inflate_bgzf_block, raw_blocks)
+        if self._text:
+            blocks = [(block_size, _as_string(data))
+                      for block_size, data in blocks]
+        for offset, (block_size, data) in zip(offsets[1:], blocks[1:]):
+            self._cache_block(offset, data, block_size)
+        return blocks[0]
+
+    def _cache_block(self, start_offset, buffer, block_size):
+        """Add a block to the cache, removing old blocks if full (PRIVATE)."""
+        while len(self._buffers) >= self.max_cache:
+            self._remove_oldest_block()
+        if self.max_cache_bytes is not None:
+            while self._buffers and \
+                    self._cache_bytes + len(buffer) > self.max_cache_bytes:
+                self._remove_oldest_block()
+        self._buffers[start_offset] = buffer, block_size
+        self._cache_bytes += len(buffer)
+
+    def _remove_oldest_block(self):
+        """Remove the least recently used block from the cache (PRIVATE)."""
+        buffer, block_size = self._buffers.popitem(last=False)[1]
+        self._cache_bytes -= len(buffer)
 
     def tell(self):
         """Returns a 64-bit unsigned BGZF virtual offset."""
@@ -700,6 +900,10 @@ class BgzfReader(object):
         self._buffer = None
         self._block_start_offset = None
         self._buffers = None
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
 
     def seekable(self):
         return True
@@ -718,8 +922,20 @@ class BgzfReader(object):
 
 
 class BgzfWriter(object):
+    """BGZF writer, acts like a write only handle but tell differs.
+
+    With the threads argument greater than one, the BGZF blocks are
+    compressed in parallel in a pool of threads (zlib releases the GIL),
+    but are still written out in order. The output is identical to that
+    using a single thread. Note that tell must then wait for the blocks
+    being compressed to be written, so avoid calling it after every small
+    write (e.g. for every record) when using threads.
+    """
 
-    def __init__(self, filename=None, mode="w", fileobj=None, compresslevel=6):
+    def __init__(self, filename=None, mode="w", fileobj=None, compresslevel=6,
+                 threads=1):
+        if threads < 1:
+            raise ValueError("Use threads with a minimum of 1")
         if fileobj:
             assert filename is None
             handle = fileobj
@@ -734,41 +950,29 @@ class BgzfWriter(object):
         self._handle = handle
         self._buffer = b""
         self.compresslevel = compresslevel
+        self._threads = threads
+        self._pool = _thread_pool(threads)
+        # Blocks being compressed in parallel, to be written in order:
+        self._pending = []
 
     def _write_block(self, block):
         # print("Saving %i bytes" % len(block))
-        start_offset = self._handle.tell()
-        assert len(block) <= 65536
-        # Giving a negative window bits means no gzip/zlib headers,
-        # -15 used in samtools
-        c = zlib.compressobj(self.compresslevel,
-                             zlib.DEFLATED,
-                             -15,
-                             zlib.DEF_MEM_LEVEL,
-                             0)
-        compressed = c.compress(block) + c.flush()
-        del c
-        assert len(compressed) < 65536, \
-            "TODO - Didn't compress enough, try less data in this block"
-        crc = zlib.crc32(block)
-        # Should cope with a mix of Python platforms...
-        if crc < 0:
-            crc = struct.pack("<i", crc)
+        if self._pool is None:
+            self._handle.write(_compress_bgzf_block(block, self.compresslevel))
         else:
-            crc = struct.pack("<I", crc)
-        bsize = struct.pack("<H", len(compressed) + 25)  # includes -1
-        crc = struct.pack("<I", zlib.crc32(block) & 0xffffffff)
-        uncompressed_length = struct.pack("<I", len(block))
-        # Fixed 16 bytes,
-        # gzip magic bytes (4) mod time (4),
-        # gzip flag (1), os (1), extra length which is six (2),
-        # sub field which is BC (2), sub field length of two (2),
-        # Variable data,
-        # 2 bytes: block length as BC sub field (2)
-        # X bytes: the data
-        # 8 bytes: crc (4), uncompressed data length (4)
-        data = _bgzf_header + bsize + compressed + crc + uncompressed_length
-        self._handle.write(data)
+            # Start compressing the block now, but write them out in order
+            self._pending.append(self._pool.apply_async(
+                _compress_bgzf_block, (block, self.compresslevel)))
+            if len(self._pending) >= 4 * self._threads:
+                self._write_pending(2 * self._threads)
+
+    def _write_pending(self, keep=0):
+        """Write out all but the last keep pending blocks, in order (PRIVATE).
+
+        This waits for those blocks to finish being compressed.
+        """
+        while len(self._pending) > keep:
+            self._handle.write(self._pending.pop(0).get())
 
     def write(self, data):
         # TODO - Check bytes vs unicode
@@ -792,6 +996,7 @@ class BgzfWriter(object):
             self._buffer = self._buffer[65535:]
         self._write_block(self._buffer)
         self._buffer = b""
+        self._write_pending()
         self._handle.flush()
 
     def close(self):
@@ -804,12 +1009,22 @@ class BgzfWriter(object):
         """
         if self._buffer:
             self.flush()
+        self._write_pending()
         self._handle.write(_bgzf_eof)
         self._handle.flush()
         self._handle.close()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
 
     def tell(self):
-        """Returns a BGZF 64-bit virtual offset."""
+        """Returns a BGZF 64-bit virtual offset.
+
+        When using threads, this waits for any blocks still being compressed
+        to be written out, as their compressed size is needed.
+        """
+        self._write_pending()
         return make_virtual_offset(self._handle.tell(), len(self._buffer))
 
     def seekable(self):
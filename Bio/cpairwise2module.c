@@ -15,10 +15,26 @@
 
 
 #define _PRECISION 1000
-#define rint(x) (int)((x)*_PRECISION+0.5)
+#define rint(x) _rint((x), _PRECISION)
+
+/* Score of the cells outside the band in a banded alignment (as in
+   pairwise2.py, this is finite so that it can still be rounded). */
+#define OUTSIDE_BAND -1e300
 
 /* Functions in this module. */
 
+static int _rint(double x, int precision)
+{
+    /* Clip to the int range, e.g. for the scores outside a band. */
+    double y = x * precision + 0.5;
+
+    if(y <= INT_MIN)
+        return INT_MIN;
+    if(y >= INT_MAX)
+        return INT_MAX;
+    return (int)y;
+}
+
 static double calc_affine_penalty(int length, double open, double extend,
     int penalize_extend_when_opening)
 {
@@ -112,6 +128,8 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
     double open_A, extend_A, open_B, extend_B;
     int penalize_extend_when_opening, penalize_end_gaps_A, penalize_end_gaps_B;
     int align_globally, score_only;
+    PyObject *py_band = Py_None;
+    int band_low, band_high, first_col, last_col, skip_to;
 
     PyObject *py_match=NULL, *py_mismatch=NULL;
     double first_A_gap, first_B_gap;
@@ -120,17 +138,20 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
     int use_match_mismatch_scores;
     int lenA, lenB;
     double *score_matrix = NULL;
+    double *prev_row, *this_row;
+    double max_score = 0;
+    int score_rows;
     unsigned char *trace_matrix = NULL;
     PyObject *py_score_matrix=NULL, *py_trace_matrix=NULL;
 
     double *col_cache_score = NULL;
     PyObject *py_retval = NULL;
 
-    if(!PyArg_ParseTuple(args, "OOOddddi(ii)ii", &py_sequenceA, &py_sequenceB,
-                         &py_match_fn, &open_A, &extend_A, &open_B, &extend_B,
-                         &penalize_extend_when_opening,
+    if(!PyArg_ParseTuple(args, "OOOddddi(ii)ii|O", &py_sequenceA,
+                         &py_sequenceB, &py_match_fn, &open_A, &extend_A,
+                         &open_B, &extend_B, &penalize_extend_when_opening,
                          &penalize_end_gaps_A, &penalize_end_gaps_B,
-                         &align_globally, &score_only))
+                         &align_globally, &score_only, &py_band))
         return NULL;
     if(!PySequence_Check(py_sequenceA) || !PySequence_Check(py_sequenceB)) {
         PyErr_SetString(PyExc_TypeError,
@@ -199,18 +220,26 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
     first_B_gap = calc_affine_penalty(1, open_B, extend_B,
                                       penalize_extend_when_opening);
 
-    /* Allocate matrices for storing the results and initialize first row and col. */
+    /* Allocate matrices for storing the results and initialize first row and col.
+       If we only want the score, we only need to keep two rows of the score
+       matrix (the previous and the current one). */
     lenA = PySequence_Length(py_sequenceA);
     lenB = PySequence_Length(py_sequenceB);
-    score_matrix = malloc((lenA+1)*(lenB+1)*sizeof(*score_matrix));
+    /* Only the diagonals (col - row) from band_low to band_high are
+       filled in, by default all of them. */
+    band_low = -lenA;
+    band_high = lenB;
+    if(py_band != Py_None &&
+       !PyArg_ParseTuple(py_band, "ii", &band_low, &band_high))
+        goto _cleanup_make_score_matrix_fast;
+    score_rows = score_only ? 2 : (lenA+1);
+    score_matrix = malloc(score_rows*(lenB+1)*sizeof(*score_matrix));
     if(!score_matrix) {
         PyErr_SetString(PyExc_MemoryError, "Out of memory");
         goto _cleanup_make_score_matrix_fast;
     }
-    for(i=0; i<(lenB+1); i++)
-        score_matrix[i] = 0;
-    for(i=0; i<(lenA+1)*(lenB+1); i += (lenB+1))
-        score_matrix[i] = 0;
+    for(i=0; i<score_rows*(lenB+1); i++)
+        score_matrix[i] = OUTSIDE_BAND;
     /* If we only want the score, we don't need the trace matrix. */
     if (!score_only){
         trace_matrix = malloc((lenA+1)*(lenB+1)*sizeof(*trace_matrix));
@@ -218,50 +247,102 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
             PyErr_SetString(PyExc_MemoryError, "Out of memory");
             goto _cleanup_make_score_matrix_fast;
         }
-        for(i=0; i<(lenB+1); i++)
-            trace_matrix[i] = 0;
-        for(i=0; i<(lenA+1)*(lenB+1); i += (lenB+1))
+        for(i=0; i<(lenA+1)*(lenB+1); i++)
             trace_matrix[i] = 0;
         }
     else
         trace_matrix = malloc(1);
 
-    /* Initialize the first row and col of the score matrix. */
-    for(i=0; i<=lenA; i++) {
-        if(penalize_end_gaps_B)
-            score = calc_affine_penalty(i, open_B, extend_B,
-                                        penalize_extend_when_opening);
-        else
-            score = 0;
-        score_matrix[i*(lenB+1)] = score;
-    }
+    /* Initialize the first row of the score matrix. The first col is
+       initialized as each row is started. */
     for(i=0; i<=lenB; i++) {
-        if(penalize_end_gaps_A)
+        if(i > band_high && penalize_end_gaps_A)
+            score = OUTSIDE_BAND;
+        else if(penalize_end_gaps_A)
             score = calc_affine_penalty(i, open_A, extend_A,
                                         penalize_extend_when_opening);
         else
             score = 0;
         score_matrix[i] = score;
+        if(i==0 || score > max_score)
+            max_score = score;
     }
 
     /* Now initialize the col cache. */
     col_cache_score = malloc((lenB+1)*sizeof(*col_cache_score));
     memset((void *)col_cache_score, 0, (lenB+1)*sizeof(*col_cache_score));
     for(i=0; i<=lenB; i++) {
-        col_cache_score[i] = calc_affine_penalty(i, (2*open_B), extend_B,
-                             penalize_extend_when_opening);
+        if(i > band_high)
+            col_cache_score[i] = OUTSIDE_BAND;
+        else
+            col_cache_score[i] = calc_affine_penalty(i, (2*open_B), extend_B,
+                                 penalize_extend_when_opening);
     }
 
     /* Fill in the score matrix. The row cache is calculated on the fly.*/
     for(row=1; row<=lenA; row++) {
-        double row_cache_score = calc_affine_penalty(row, (2*open_A), extend_A,
-                                 penalize_extend_when_opening);
-        for(col=1; col<=lenB; col++) {
+        double row_cache_score = OUTSIDE_BAND;
+        if(row <= -band_low)
+            row_cache_score = calc_affine_penalty(row, (2*open_A), extend_A,
+                                                  penalize_extend_when_opening);
+        first_col = (row + band_low > 1) ? row + band_low : 1;
+        last_col = (row + band_high < lenB) ? row + band_high : lenB;
+        skip_to = -1;
+        if(score_only) {
+            prev_row = score_matrix + ((row-1)%2)*(lenB+1);
+            this_row = score_matrix + (row%2)*(lenB+1);
+        }
+        else {
+            prev_row = score_matrix + (row-1)*(lenB+1);
+            this_row = score_matrix + row*(lenB+1);
+        }
+        if(row > -band_low && penalize_end_gaps_B)
+            this_row[0] = OUTSIDE_BAND;
+        else if(penalize_end_gaps_B)
+            this_row[0] = calc_affine_penalty(row, open_B, extend_B,
+                                              penalize_extend_when_opening);
+        else
+            this_row[0] = 0;
+        if(this_row[0] > max_score)
+            max_score = this_row[0];
+        /* The rows are reused if only the score is wanted, so reset the
+           cells either side of the band which the next row looks at. */
+        if(first_col > 1)
+            this_row[first_col-1] = OUTSIDE_BAND;
+        if(last_col < lenB)
+            this_row[last_col+1] = OUTSIDE_BAND;
+        if(row == lenA && !penalize_end_gaps_A) {
+            /* Free end gaps in sequence A, so fill in all the last row
+               (the rows reused for the score are reset to the left of
+               the band first). */
+            for(i=1; i<first_col-1; i++)
+                prev_row[i] = OUTSIDE_BAND;
+            first_col = 1;
+        }
+        else if(first_col > 1)
+            /* This column has left the band, so its gaps can't continue */
+            col_cache_score[first_col-1] = OUTSIDE_BAND;
+        if(last_col < lenB && !penalize_end_gaps_B) {
+            /* Free end gaps in sequence B, so fill in all the last column
+               (skipping any cells outside the band before it) */
+            skip_to = last_col + 1;
+            last_col = lenB;
+            /* The next row looks at the cell before the last column */
+            if(skip_to < lenB - 1)
+                this_row[lenB-1] = OUTSIDE_BAND;
+        }
+        for(col=first_col; col<=last_col; col++) {
             double match_score, nogap_score;
             double row_open, row_extend, col_open, col_extend, best_score;
             int best_score_rint, row_score_rint, col_score_rint;
             unsigned char row_trace_score, col_trace_score, trace_score;
 
+            if(col == skip_to) {
+                /* Outside the band there is no gap to continue */
+                col = lenB;
+                row_cache_score = OUTSIDE_BAND;
+            }
+
             /* Calculate the best score. */
             match_score = _get_match_score(py_sequenceA, py_sequenceB,
                                            py_match_fn, row-1, col-1,
@@ -271,24 +352,24 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
                                            use_match_mismatch_scores);
             if(match_score==-1.0 && PyErr_Occurred())
                 goto _cleanup_make_score_matrix_fast;
-            nogap_score = score_matrix[(row-1)*(lenB+1)+col-1] + match_score;
+            nogap_score = prev_row[col-1] + match_score;
 
             if (!penalize_end_gaps_A && row==lenA) {
-                row_open = score_matrix[(row)*(lenB+1)+col-1];
+                row_open = this_row[col-1];
                 row_extend = row_cache_score;
             }
             else {
-                row_open = score_matrix[(row)*(lenB+1)+col-1] + first_A_gap;
+                row_open = this_row[col-1] + first_A_gap;
                 row_extend = row_cache_score + extend_A;
             }
             row_cache_score = (row_open > row_extend) ? row_open : row_extend;
 
             if (!penalize_end_gaps_B && col==lenB){
-                col_open = score_matrix[(row-1)*(lenB+1)+col];
+                col_open = prev_row[col];
                 col_extend = col_cache_score[col];
             }
             else {
-                col_open = score_matrix[(row-1)*(lenB+1)+col] + first_B_gap;
+                col_open = prev_row[col] + first_B_gap;
                 col_extend = col_cache_score[col] + extend_B;
             }
             col_cache_score[col] = (col_open > col_extend) ? col_open : col_extend;
@@ -298,9 +379,11 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
                 best_score = nogap_score;
 
             if(!align_globally && best_score < 0)
-                score_matrix[row*(lenB+1)+col] = 0;
+                this_row[col] = 0;
             else
-                score_matrix[row*(lenB+1)+col] = best_score;
+                this_row[col] = best_score;
+            if(this_row[col] > max_score)
+                max_score = this_row[col];
 
             if (!score_only) {
                 row_score_rint = rint(row_cache_score);
@@ -329,26 +412,29 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
         }
     }
 
+    /* If we only want the score, return the best one (for global alignments
+       this is in the bottom right corner). */
+    if(score_only) {
+        if(align_globally)
+            max_score = score_matrix[(lenA%2)*(lenB+1)+lenB];
+        py_retval = PyFloat_FromDouble(max_score);
+        goto _cleanup_make_score_matrix_fast;
+    }
+
     /* Save the score and traceback matrices into real python objects. */
     if(!(py_score_matrix = PyList_New(lenA+1)))
         goto _cleanup_make_score_matrix_fast;
-    if(!score_only){
-        if(!(py_trace_matrix = PyList_New(lenA+1)))
-            goto _cleanup_make_score_matrix_fast;
-    }
-    else
-        py_trace_matrix = PyList_New(1);
+    if(!(py_trace_matrix = PyList_New(lenA+1)))
+        goto _cleanup_make_score_matrix_fast;
 
     for(row=0; row<=lenA; row++) {
         PyObject *py_score_row, *py_trace_row;
         if(!(py_score_row = PyList_New(lenB+1)))
             goto _cleanup_make_score_matrix_fast;
         PyList_SET_ITEM(py_score_matrix, row, py_score_row);
-        if(!score_only){
-            if(!(py_trace_row = PyList_New(lenB+1)))
-                goto _cleanup_make_score_matrix_fast;
-            PyList_SET_ITEM(py_trace_matrix, row, py_trace_row);
-        }
+        if(!(py_trace_row = PyList_New(lenB+1)))
+            goto _cleanup_make_score_matrix_fast;
+        PyList_SET_ITEM(py_trace_matrix, row, py_trace_row);
 
         for(col=0; col<=lenB; col++) {
             PyObject *py_score, *py_trace;
@@ -359,12 +445,13 @@ static PyObject *cpairwise2__make_score_matrix_fast(PyObject *self,
                 goto _cleanup_make_score_matrix_fast;
             PyList_SET_ITEM(py_score_row, col, py_score);
 
-            if(score_only)
-                continue;
             /* Set py_trace_matrix[row][col] to a list of indexes.  On
                the edges of the matrix (row or column is 0), the
                matrix should be [None]. */
-            if(!row || !col) {
+            if(!row || !col || ((col - row < band_low ||
+                                 col - row > band_high) &&
+                                (row < lenA || penalize_end_gaps_A) &&
+                                (col < lenB || penalize_end_gaps_B))) {
                 if(!(py_trace = Py_BuildValue("B", 1)))
                     goto _cleanup_make_score_matrix_fast;
                 Py_INCREF(Py_None);
@@ -35,11 +35,19 @@ except ImportError:
                       "Try re-installing NumPy and then Biopython.",
                       BiopythonWarning)
 
+    try:
+        import numpy
+        from Bio.Alphabet.Encoding import get_encoding
+    except ImportError:
+        numpy = None
+
     def _calculate(score_dict, sequence, m, n):
         """Calculate scores using Python code (PRIVATE).
 
         The C code handles mixed case so Python version must too.
         """
+        if numpy is not None:
+            return _calculate_encoded(score_dict, sequence, m, n)
         sequence = sequence.upper()
         scores = []
         for i in range(n - m + 1):
@@ -54,6 +62,24 @@ except ImportError:
             scores.append(score)
         return scores
 
+    def _calculate_encoded(score_dict, sequence, m, n):
+        """Calculate scores using NumPy on the encoded sequence (PRIVATE).
+
+        The encoding ignores case, and any letter other than A, C, G or T
+        is given the unknown code, which scores NaN.
+        """
+        encoding = get_encoding(IUPAC.unambiguous_dna)
+        table = numpy.empty((m, len(encoding) + 1))
+        table.fill(numpy.nan)
+        for code, letter in enumerate(encoding.letters):
+            table[:, code] = score_dict[letter][:m]
+        codes = encoding.encode(sequence)
+        count = max(n - m + 1, 0)
+        scores = numpy.zeros(count)
+        for position in range(m):
+            scores += table[position, codes[position:position + count]]
+        return scores
+
 
 class GenericPositionMatrix(dict):
 
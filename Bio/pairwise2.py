@@ -90,11 +90,53 @@ All alignment functions have the following arguments:
 
 - ``score_only``: boolean (default: False).
   Only get the best score, don't recover any alignments. The return value of
-  the function is the score. Faster and uses less memory.
+  the function is the score. Faster and uses less memory (unless using general
+  gap functions, only two rows of the score matrix are kept in memory).
 
 - ``one_alignment_only``: boolean (default: False).
   Only recover one alignment.
 
+- ``max_alignments``: integer or None (default: ``MAX_ALIGNMENTS``, 1000).
+  The maximum number of (co-optimal) alignments to recover, or None for no
+  limit. Repetitive sequences can have a huge number of equally good
+  alignments.
+
+- ``lazy``: boolean (default: False).
+  Return a generator which finds the alignments one at a time as they are
+  needed, rather than a list of all of them.
+
+- ``count_only``: boolean (default: False).
+  Return the number of optimal alignments (ignoring ``max_alignments``),
+  which is calculated by dynamic programming without recovering them.
+
+- ``linear_memory``: boolean (default: False).
+  Only recover one alignment, using Hirschberg's divide and conquer method
+  (as extended to affine gap penalties by Myers and Miller) so that memory
+  use grows with the sum of the sequence lengths rather than their product.
+  This takes about twice as long, but allows the alignment of long sequences
+  such as whole viral genomes. Requires affine (or no) gap penalties.
+
+- ``query_profile``: boolean (default: False).
+  Calculate the score matrix a whole column at a time with NumPy, using a
+  profile of the match scores of the first sequence against each letter in
+  the second. This requires integer match scores and affine (or no) integer
+  gap penalties, otherwise (or if NumPy is not installed) the usual code is
+  used. The results are the same, but this is much faster for long sequences,
+  especially with a substitution matrix (e.g. ``localds`` with ``blosum62``)
+  as the match function is only called once for each pair of letters rather
+  than for every cell. It also uses much less memory with ``score_only``.
+
+- ``band_width``: integer, ``'auto'`` or None (default: None).
+  Only fill in the cells of the score matrix within this many diagonals of
+  the main diagonal (or for sequences of different lengths, of the diagonals
+  between the two corners), so the run time grows with the sequence length
+  times the band width rather than the product of the lengths. This is useful
+  for global alignments of near identical sequences. With ``'auto'`` the band
+  is estimated from the diagonals of the k-mers found once in each sequence
+  (if there are none, the whole matrix is used). The optimal alignment is
+  only found if it lies within the band. Only for global alignments, and can
+  not be combined with ``linear_memory``.
+
 The other parameters of the alignment function depend on the function called.
 Some examples:
 
@@ -129,6 +171,19 @@ Some examples:
       Score=3
     <BLANKLINE>
 
+- Count the optimal global alignments without recovering them, or get just
+  the first of them from a generator.
+
+    >>> pairwise2.align.globalxx("ACCGT", "ACG", count_only=True)
+    2
+    >>> alignments = pairwise2.align.globalxx("ACCGT", "ACG", lazy=True)
+    >>> print(format_alignment(*next(alignments)))
+    ACCGT
+    |||||
+    A-CG-
+      Score=3
+    <BLANKLINE>
+
 - Do a global alignment. Identical characters are given 2 points, 1 point is
   deducted for each non-identical character. Don't penalize gaps.
 
@@ -218,13 +273,26 @@ type ``help(pairwise2.align.localds``) at the Python prompt.
 """
 from __future__ import print_function
 
+import itertools
+import math
 import warnings
 
 from Bio import BiopythonWarning
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 MAX_ALIGNMENTS = 1000   # maximum alignments recovered in traceback
 
+_NEG_INF = float("-inf")
+
+# Score of the cells outside the band in a banded alignment. This is finite
+# (rather than minus infinity) so that it can still be rounded with rint.
+_OUTSIDE_BAND = -1e300
+
 
 class align(object):
     """This class provides functions that do alignments."""
@@ -369,6 +437,12 @@ alignment occurs.
                 ('force_generic', 0),
                 ('score_only', 0),
                 ('one_alignment_only', 0),
+                ('max_alignments', MAX_ALIGNMENTS),
+                ('lazy', 0),
+                ('count_only', 0),
+                ('linear_memory', 0),
+                ('query_profile', 0),
+                ('band_width', None),
             ]
             for name, default in default_params:
                 keywds[name] = keywds.get(name, default)
@@ -392,13 +466,246 @@ alignment occurs.
 align = align()
 
 
+def align_many(query, targets, function="globalxx", *parameters, **keywds):
+    """Align one query sequence to each of many target sequences.
+
+    This takes the query sequence, a list (or other iterable) of target
+    sequences, the name of the alignment function to use (e.g. "globalms"),
+    and its match and gap parameters. The other keyword arguments are as for
+    the alignment functions, plus processes (default 1) to use a pool of
+    worker processes.
+
+    Returns a list with the result for each target, which is the score if
+    score_only is set, otherwise the list of alignments:
+
+    >>> from Bio import pairwise2
+    >>> pairwise2.align_many("ACCGT", ["ACG", "ACCGA", "TTT"], "globalms",
+    ...                      2, -1, -2, -0.5, score_only=True)
+    [2.0, 7.0, -2.5]
+    >>> for alignments in pairwise2.align_many("ACCGT", ["ACG", "ACCGA"],
+    ...                                        "globalms", 2, -1, -2, -0.5,
+    ...                                        one_alignment_only=True):
+    ...     print(format_alignment(*alignments[0]))
+    ACCGT
+    |||||
+    A-CG-
+      Score=2
+    <BLANKLINE>
+    ACCGT
+    |||||
+    ACCGA
+      Score=7
+    <BLANKLINE>
+
+    The parameters are only decoded once. With score_only and affine (or no)
+    gap penalties, if NumPy is available the scores for a batch of targets
+    are calculated at the same time, with each step of the dynamic
+    programming done on the whole batch at once, and the match scores looked
+    up from a profile of the query against all the letters in the targets.
+    This is much faster than aligning the targets one by one.
+    """
+    processes = keywds.pop("processes", 1)
+    if processes < 1:
+        raise ValueError("processes should be at least one")
+    keywds = align.alignment_function(function).decode(
+        query, None, *parameters, **keywds)
+    targets = list(targets)
+    if processes == 1 or len(targets) < 2:
+        return _align_many(keywds, targets)
+    # Split the targets between the worker processes, with a few batches
+    # each to balance the load
+    import multiprocessing
+    size = -(-len(targets) // (4 * processes))
+    batches = [(keywds, targets[i:i + size])
+               for i in range(0, len(targets), size)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(_align_many_batch, batches)
+    finally:
+        pool.terminate()
+    return [result for batch in results for result in batch]
+
+
+def _align_many_batch(args):
+    """Align the query to a batch of targets, for align_many (PRIVATE)."""
+    keywds, targets = args
+    return _align_many(keywds, targets)
+
+
+def _align_many(keywds, targets):
+    """Align the query to each target, for align_many (PRIVATE)."""
+    keywds = keywds.copy()
+    if keywds["score_only"] and numpy is not None and \
+       not keywds["force_generic"] and keywds["band_width"] is None and \
+       isinstance(keywds["gap_A_fn"], affine_penalty) and \
+       isinstance(keywds["gap_B_fn"], affine_penalty):
+        return _score_many(keywds, targets)
+    results = []
+    for target in targets:
+        keywds["sequenceB"] = target
+        result = _align(**keywds)
+        if keywds["score_only"] and result != []:
+            result = float(result)
+        results.append(result)
+    return results
+
+
+def _score_many(keywds, targets, batch_size=4096):
+    """Calculate the alignment score for each target using NumPy (PRIVATE).
+
+    This follows _make_score_matrix_fast (in score only mode) exactly, but
+    each score is a NumPy array with a value for each target in a batch. The
+    targets are sorted by length, so there is little wasted effort from
+    padding the shorter targets in each batch. Returns a list of the scores
+    (or an empty list for any empty target, as done by _align).
+    """
+    query = keywds["sequenceA"]
+    gap_char = keywds["gap_char"]
+    if not isinstance(query, list):
+        query = str(query)
+    sequences = []
+    for target in targets:
+        try:
+            query + gap_char
+            target + gap_char
+        except TypeError:
+            raise TypeError('both sequences must be of the same type, ' +
+                            'either string/sequence object or list. Gap ' +
+                            'character must fit the sequence type (string ' +
+                            'or list)')
+        if not isinstance(target, list):
+            target = str(target)
+        sequences.append(target)
+    results = [[]] * len(sequences)
+    if not query:
+        return results
+    # Number the letters in the targets from one (zero is for padding), and
+    # make a profile with the match score of each query letter against each
+    # of these:
+    letters = {}
+    for target in sequences:
+        for letter in target:
+            if letter not in letters:
+                letters[letter] = len(letters) + 1
+    match_fn = keywds["match_fn"]
+    profiles = {}
+    for letter in query:
+        if letter not in profiles:
+            profile = numpy.zeros(len(letters) + 1)
+            for other, code in letters.items():
+                profile[code] = match_fn(letter, other)
+            profiles[letter] = profile
+    order = sorted((i for i in range(len(sequences)) if sequences[i]),
+                   key=lambda i: len(sequences[i]))
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        scores = _score_batch(query, [sequences[i] for i in batch], letters,
+                              profiles, keywds)
+        for i, score in zip(batch, scores.tolist()):
+            results[i] = score
+    return results
+
+
+def _score_batch(query, targets, letters, profiles, keywds):
+    """Calculate the alignment scores for a batch of targets (PRIVATE)."""
+    gap_A_fn, gap_B_fn = keywds["gap_A_fn"], keywds["gap_B_fn"]
+    penalize_end_gaps = keywds["penalize_end_gaps"]
+    align_globally = keywds["align_globally"]
+    penalize_extend_when_opening = keywds["penalize_extend_when_opening"]
+    open_A, extend_A = gap_A_fn.open, gap_A_fn.extend
+    open_B, extend_B = gap_B_fn.open, gap_B_fn.extend
+    first_A_gap = calc_affine_penalty(1, open_A, extend_A,
+                                      penalize_extend_when_opening)
+    first_B_gap = calc_affine_penalty(1, open_B, extend_B,
+                                      penalize_extend_when_opening)
+    lenA = len(query)
+    count = len(targets)
+    lengths = numpy.array([len(target) for target in targets])
+    width = int(lengths.max())
+    # The target letters, with a row for each column of the score matrix:
+    codes = numpy.zeros((width, count), numpy.intp)
+    for i, target in enumerate(targets):
+        codes[:len(target), i] = [letters[letter] for letter in target]
+    if not penalize_end_gaps[1]:
+        # Gaps in sequence B in the last column of each target are free
+        free_B = lengths[numpy.newaxis, :] == \
+            numpy.arange(width + 1)[:, numpy.newaxis]
+    if not align_globally:
+        # Ignore the padding when looking for the best local score
+        padding = lengths[numpy.newaxis, :] < \
+            numpy.arange(width + 1)[:, numpy.newaxis]
+
+    # The score and col 'matrix' rows, see _make_score_matrix_fast:
+    prev_row = numpy.empty((width + 1, count))
+    col_score = numpy.empty((width + 1, count))
+    for i in range(width + 1):
+        if penalize_end_gaps[0]:
+            prev_row[i] = calc_affine_penalty(i, open_A, extend_A,
+                                              penalize_extend_when_opening)
+        else:
+            prev_row[i] = 0
+        col_score[i] = calc_affine_penalty(i, 2 * open_B, extend_B,
+                                           penalize_extend_when_opening)
+    col_score[0] = 0
+    if not align_globally:
+        best_score = numpy.where(padding, _NEG_INF, prev_row).max(axis=0)
+    this_row = numpy.empty((width + 1, count))
+    for row in range(1, lenA + 1):
+        if penalize_end_gaps[1]:
+            this_row[0] = calc_affine_penalty(row, open_B, extend_B,
+                                              penalize_extend_when_opening)
+        else:
+            this_row[0] = 0
+        row_score = numpy.empty(count)
+        row_score.fill(calc_affine_penalty(row, 2 * open_A, extend_A,
+                                           penalize_extend_when_opening))
+        match_scores = profiles[query[row - 1]][codes]
+        free_A = not penalize_end_gaps[0] and row == lenA
+        for col in range(1, width + 1):
+            nogap_score = prev_row[col - 1] + match_scores[col - 1]
+            if free_A:
+                row_open = this_row[col - 1]
+                row_extend = row_score
+            else:
+                row_open = this_row[col - 1] + first_A_gap
+                row_extend = row_score + extend_A
+            row_score = numpy.maximum(row_open, row_extend)
+            col_open = prev_row[col] + first_B_gap
+            col_extend = col_score[col] + extend_B
+            if not penalize_end_gaps[1]:
+                col_open = numpy.where(free_B[col], prev_row[col], col_open)
+                col_extend = numpy.where(free_B[col], col_score[col],
+                                         col_extend)
+            numpy.maximum(col_open, col_extend, out=col_score[col])
+            best = numpy.maximum(nogap_score, col_score[col])
+            numpy.maximum(best, row_score, out=best)
+            if not align_globally:
+                numpy.maximum(best, 0, out=best)
+            this_row[col] = best
+        if not align_globally:
+            numpy.maximum(best_score, numpy.where(padding, _NEG_INF,
+                                                  this_row).max(axis=0),
+                          out=best_score)
+        prev_row, this_row = this_row, prev_row
+    if align_globally:
+        # The global score is in the last column of each target
+        return prev_row[lengths, numpy.arange(count)]
+    return best_score
+
+
 def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
            penalize_extend_when_opening, penalize_end_gaps,
            align_globally, gap_char, force_generic, score_only,
-           one_alignment_only):
+           one_alignment_only, max_alignments, lazy, count_only,
+           linear_memory, query_profile, band_width):
     """Return a list of alignments between two sequences or its score"""
+    if count_only and (score_only or linear_memory):
+        raise ValueError("The count_only option can not be combined with "
+                         "score_only or linear_memory.")
     if not sequenceA or not sequenceB:
-        return []
+        if count_only:
+            return 0
+        return iter([]) if lazy else []
     try:
         sequenceA + gap_char
         sequenceB + gap_char
@@ -412,18 +719,50 @@ def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
     if not isinstance(sequenceB, list):
         sequenceB = str(sequenceB)
 
+    band = None
+    if band_width is not None:
+        if not align_globally:
+            raise ValueError("The band_width option is only supported for "
+                             "global alignments.")
+        if linear_memory:
+            raise ValueError("The band_width and linear_memory options can "
+                             "not be combined.")
+        band = _find_band(sequenceA, sequenceB, band_width)
+
+    if linear_memory and not score_only:
+        if not isinstance(gap_A_fn, affine_penalty) \
+           or not isinstance(gap_B_fn, affine_penalty):
+            raise ValueError("The linear_memory option requires affine gap "
+                             "penalties, not general gap functions.")
+        aligner = _LinearSpaceAligner(sequenceA, sequenceB, match_fn,
+                                      gap_A_fn, gap_B_fn, penalize_end_gaps)
+        alignments = aligner.align(align_globally, gap_char)
+        return iter(alignments) if lazy else alignments
+
     if (not force_generic) and isinstance(gap_A_fn, affine_penalty) \
        and isinstance(gap_B_fn, affine_penalty):
         open_A, extend_A = gap_A_fn.open, gap_A_fn.extend
         open_B, extend_B = gap_B_fn.open, gap_B_fn.extend
-        x = _make_score_matrix_fast(
-            sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
-            extend_B, penalize_extend_when_opening, penalize_end_gaps,
-            align_globally, score_only)
+        x = None
+        if query_profile and band is None:
+            # This returns None if it can't be used (e.g. for non-integer
+            # scores), in which case fall back on the usual code
+            x = _make_score_matrix_profile(
+                sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                extend_B, penalize_extend_when_opening, penalize_end_gaps,
+                align_globally, score_only)
+        if x is None:
+            x = _make_score_matrix_fast(
+                sequenceA, sequenceB, match_fn, open_A, extend_A, open_B,
+                extend_B, penalize_extend_when_opening, penalize_end_gaps,
+                align_globally, score_only, band)
     else:
         x = _make_score_matrix_generic(
             sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
-            penalize_end_gaps, align_globally, score_only)
+            penalize_end_gaps, align_globally, score_only, band)
+    # If they only want the score, then we have it already.
+    if score_only:
+        return x
     score_matrix, trace_matrix = x
 
     # print("SCORE %s" % print_matrix(score_matrix))
@@ -435,50 +774,135 @@ def _align(sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
     # Find the highest score.
     best_score = max([x[0] for x in starts])
 
-    # If they only want the score, then return it.
-    if score_only:
-        return best_score
-
     tolerance = 0  # XXX do anything with this?
     # Now find all the positions within some tolerance of the best
     # score.
     starts = [(score, pos) for score, pos in starts
               if rint(abs(score - best_score)) <= rint(tolerance)]
 
+    if count_only:
+        return _count_alignments(starts, score_matrix, trace_matrix,
+                                 align_globally, gap_A_fn, gap_B_fn,
+                                 band is not None)
+
     # Recover the alignments and return them.
-    return _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
-                               trace_matrix, align_globally, gap_char,
-                               one_alignment_only, gap_A_fn, gap_B_fn)
+    alignments = _recover_alignments(sequenceA, sequenceB, starts,
+                                     score_matrix, trace_matrix,
+                                     align_globally, gap_char,
+                                     one_alignment_only, gap_A_fn, gap_B_fn,
+                                     band is not None)
+    if max_alignments is not None:
+        alignments = itertools.islice(alignments, max_alignments)
+    if lazy:
+        return alignments
+    return list(alignments)
+
+
+def _find_band(sequenceA, sequenceB, band_width):
+    """Return the lowest and highest diagonal to fill in, or None (PRIVATE).
+
+    Diagonals are numbered as column minus row, so a global alignment goes
+    from diagonal 0 to diagonal lenB - lenA, and the band covers at least
+    these. Returns None if the band would cover the whole score matrix.
+
+    >>> _find_band("ACGTACGT", "ACGTCGT", 2)
+    (-3, 2)
+    """
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    low, high = min(0, lenB - lenA), max(0, lenB - lenA)
+    if band_width == "auto":
+        k, diagonals = _kmer_diagonals(sequenceA, sequenceB)
+        if not diagonals:
+            return None
+        low = min(low, min(diagonals)) - k
+        high = max(high, max(diagonals)) + k
+    elif isinstance(band_width, str) or band_width < 0:
+        raise ValueError("band_width should be a non-negative integer or "
+                         "'auto', not %r" % band_width)
+    else:
+        low -= band_width
+        high += band_width
+    if low <= -lenA and high >= lenB:
+        return None
+    return max(low, -lenA), min(high, lenB)
+
+
+def _kmer_diagonals(sequenceA, sequenceB):
+    """Return k and the diagonals of k-mers unique in both sequences (PRIVATE).
+
+    The k-mer length is chosen so that few chance matches are expected
+    between two random sequences of the same lengths and alphabet.
+    """
+    letters = max(2, len(set(sequenceA).union(sequenceB)))
+    k = int(math.ceil(math.log(100.0 * len(sequenceA) * len(sequenceB)) /
+                      math.log(letters)))
+    kmers_A = _unique_kmers(sequenceA, k)
+    kmers_B = _unique_kmers(sequenceB, k)
+    return k, [kmers_B[kmer] - i for kmer, i in kmers_A.items()
+               if kmer in kmers_B]
+
+
+def _unique_kmers(sequence, k):
+    """Return a dict of the k-mers found once in a sequence (PRIVATE).
+
+    The values are the (zero based) positions of the k-mers.
+    """
+    if isinstance(sequence, list):
+        sequence = tuple(sequence)
+    positions = {}
+    for i in range(len(sequence) - k + 1):
+        kmer = sequence[i:i + k]
+        positions[kmer] = -1 if kmer in positions else i
+    return dict((kmer, i) for kmer, i in positions.items() if i >= 0)
 
 
 def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
                                gap_B_fn, penalize_end_gaps, align_globally,
-                               score_only):
+                               score_only, band=None):
     """Generate a score and traceback matrix according to Needleman-Wunsch
 
     This implementation allows the usage of general gap functions and is rather
     slow. It is automatically called if you define your own gap functions. You
     can force the usage of this method with ``force_generic=True``.
+
+    If score_only is true, only the best score is returned. As a general gap
+    function can depend on the whole row or column, this still needs the
+    full score matrix.
+
+    If band is given as the lowest and highest diagonal (column minus row),
+    only the cells between these diagonals are filled in, the others are
+    given the score _OUTSIDE_BAND (and a trace of None). Without end gap
+    penalties, the first and last row (or column) are also filled in, as
+    in _make_score_matrix_fast.
     """
     # Create the score and traceback matrices. These should be in the
     # shape:
     # sequenceA (down) x sequenceB (across)
     lenA, lenB = len(sequenceA), len(sequenceB)
+    if band is None:
+        low, high = -lenA, lenB
+        empty = None
+    else:
+        low, high = band
+        empty = _OUTSIDE_BAND
     score_matrix, trace_matrix = [], []
     for i in range(lenA + 1):
-        score_matrix.append([None] * (lenB + 1))
+        score_matrix.append([empty] * (lenB + 1))
         if not score_only:
             trace_matrix.append([None] * (lenB + 1))
 
     # Initialize first row and column with gap scores. This is like opening up
     # i gaps at the beginning of sequence A or B.
-    for i in range(lenA + 1):
+    # (Only within the band, if any, unless the end gaps are free.)
+    for i in range(lenA + 1 if not penalize_end_gaps[1] else
+                   min(lenA, -low) + 1):
         if penalize_end_gaps[1]:  # [1]:gap in sequence B
             score = gap_B_fn(0, i)
         else:
             score = 0
         score_matrix[i][0] = score
-    for i in range(lenB + 1):
+    for i in range(lenB + 1 if not penalize_end_gaps[0] else
+                   min(lenB, high) + 1):
         if penalize_end_gaps[0]:  # [0]:gap in sequence A
             score = gap_A_fn(0, i)
         else:
@@ -492,8 +916,30 @@ def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
     #    1) extending a previous alignment without gaps
     #    2) adding a gap in sequenceA
     #    3) adding a gap in sequenceB
+    # Within a band, gaps are only considered from the cell just outside the
+    # band (with score _OUTSIDE_BAND) inwards. The last row or column, if
+    # filled in outside the band for free end gaps, has gaps only from the
+    # cells next to it.
     for row in range(1, lenA + 1):
-        for col in range(1, lenB + 1):
+        first_col = max(1, row + low)
+        if row == lenA and not penalize_end_gaps[0]:
+            first_col = 1
+        columns = range(first_col, min(lenB, row + high) + 1)
+        if row + high < lenB and not penalize_end_gaps[1]:
+            columns = itertools.chain(columns, [lenB])
+        for col in columns:
+            if col > row + high:
+                # The last column, outside the band
+                first_x = col
+            else:
+                first_x = first_col
+            if not penalize_end_gaps[1] and col == lenB:
+                first_row = 1
+            elif col - row < low - 1:
+                # The last row, outside the band
+                first_row = row
+            else:
+                first_row = max(1, col - high)
             # First, calculate the score that would occur by extending
             # the alignment without gaps.
             nogap_score = score_matrix[row - 1][col - 1] + \
@@ -507,20 +953,22 @@ def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
             # and extending a gap, we distinguish them for the backtrace.
             if not penalize_end_gaps[0] and row == lenA:
                 row_open = score_matrix[row][col - 1]
-                row_extend = max([score_matrix[row][x] for x in range(col)])
+                row_extend = max([score_matrix[row][x]
+                                  for x in range(first_x - 1, col)])
             else:
                 row_open = score_matrix[row][col - 1] + gap_A_fn(row, 1)
                 row_extend = max([score_matrix[row][x] + gap_A_fn(row, col - x)
-                                  for x in range(col)])
+                                  for x in range(first_x - 1, col)])
 
             # Try to find a better score by opening gaps in sequenceB.
             if not penalize_end_gaps[1] and col == lenB:
                 col_open = score_matrix[row - 1][col]
-                col_extend = max([score_matrix[x][col] for x in range(row)])
+                col_extend = max([score_matrix[x][col]
+                                  for x in range(first_row - 1, row)])
             else:
                 col_open = score_matrix[row - 1][col] + gap_B_fn(col, 1)
                 col_extend = max([score_matrix[x][col] + gap_B_fn(col, row - x)
-                                  for x in range(row)])
+                                  for x in range(first_row - 1, row)])
 
             best_score = max(nogap_score, row_open, row_extend, col_open,
                              col_extend)
@@ -545,13 +993,27 @@ def _make_score_matrix_generic(sequenceA, sequenceB, match_fn, gap_A_fn,
                     trace_score += 16
                 trace_matrix[row][col] = trace_score
 
+    if score_only:
+        return max([x[0] for x in _find_start(score_matrix, align_globally)])
     return score_matrix, trace_matrix
 
 
 def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
                             open_B, extend_B, penalize_extend_when_opening,
-                            penalize_end_gaps, align_globally, score_only):
-    """Generate a score and traceback matrix according to Gotoh"""
+                            penalize_end_gaps, align_globally, score_only,
+                            band=None):
+    """Generate a score and traceback matrix according to Gotoh
+
+    If score_only is true, only the best score is returned. Since only the
+    previous row of the score matrix is needed to calculate the next one,
+    this keeps just two rows in memory (rather than the full matrices).
+
+    If band is given as the lowest and highest diagonal (column minus row),
+    only the cells between these diagonals are filled in, the others are
+    given the score _OUTSIDE_BAND (and a trace of None). Without end gap
+    penalties, the first and last row (or column) are also filled in, so
+    that the free end gaps are still found.
+    """
     # This is an implementation of the Needleman-Wunsch dynamic programming
     # algorithm as modified by Gotoh, implementing affine gap penalties.
     # In short, we have three matrices, holding scores for alignments ending
@@ -569,29 +1031,32 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
     # Create the score and traceback matrices. These should be in the
     # shape:
     # sequenceA (down) x sequenceB (across)
+    # Here we initialize the first row with gap scores. This is like opening
+    # up i gaps at the beginning of sequence A. The first column (gaps at the
+    # beginning of sequence B) is filled in as each row is added.
     lenA, lenB = len(sequenceA), len(sequenceB)
-    score_matrix, trace_matrix = [], []
-    for i in range(lenA + 1):
-        score_matrix.append([None] * (lenB + 1))
-        if not score_only:
-            trace_matrix.append([None] * (lenB + 1))
-
-    # Initialize first row and column with gap scores. This is like opening up
-    # i gaps at the beginning of sequence A or B.
-    for i in range(lenA + 1):
-        if penalize_end_gaps[1]:  # [1]:gap in sequence B
-            score = calc_affine_penalty(i, open_B, extend_B,
-                                        penalize_extend_when_opening)
-        else:
-            score = 0
-        score_matrix[i][0] = score
+    if band is None:
+        low, high = -lenA, lenB
+        empty = None
+    else:
+        low, high = band
+        empty = _OUTSIDE_BAND
+    prev_row = []
     for i in range(lenB + 1):
-        if penalize_end_gaps[0]:  # [0]:gap in sequence A
+        if i > high and penalize_end_gaps[0]:
+            score = _OUTSIDE_BAND
+        elif penalize_end_gaps[0]:  # [0]:gap in sequence A
             score = calc_affine_penalty(i, open_A, extend_A,
                                         penalize_extend_when_opening)
         else:
             score = 0
-        score_matrix[0][i] = score
+        prev_row.append(score)
+    if score_only:
+        # For local alignments, track the best score of any row so far
+        max_score = max(prev_row)
+    else:
+        score_matrix = [prev_row]
+        trace_matrix = [[None] * (lenB + 1)]
 
     # Now initialize the col 'matrix'. Actually this is only a one dimensional
     # list, since we only need the col scores from the last row.
@@ -599,17 +1064,51 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
     for i in range(1, lenB + 1):
         col_score.append(calc_affine_penalty(i, 2 * open_B, extend_B,
                                              penalize_extend_when_opening))
+    # Outside the band there are no gaps to continue
+    for i in range(high + 1, lenB + 1):
+        col_score[i] = _OUTSIDE_BAND
 
     # The row 'matrix' is calculated on the fly. Here we only need the actual
     # score.
     # Now, filling up the score and traceback matrices:
     for row in range(1, lenA + 1):
-        row_score = calc_affine_penalty(row, 2 * open_A, extend_A,
-                                        penalize_extend_when_opening)
-        for col in range(1, lenB + 1):
+        first_col = max(1, row + low)
+        if row == lenA and not penalize_end_gaps[0]:
+            # Free end gaps in sequence A, so fill in all the last row
+            first_col = 1
+        elif first_col > 1:
+            # This column has left the band, so its gaps can't continue
+            col_score[first_col - 1] = _OUTSIDE_BAND
+        columns = range(first_col, min(lenB, row + high) + 1)
+        skip_to = None
+        if row + high < lenB and not penalize_end_gaps[1]:
+            # Free end gaps in sequence B, so fill in all the last column
+            # (skipping any cells outside the band before it)
+            skip_to = lenB
+            columns = itertools.chain(columns, [lenB])
+        this_row = [empty] * (lenB + 1)
+        if row > -low and penalize_end_gaps[1]:
+            this_row[0] = _OUTSIDE_BAND
+        elif penalize_end_gaps[1]:  # [1]:gap in sequence B
+            this_row[0] = calc_affine_penalty(row, open_B, extend_B,
+                                              penalize_extend_when_opening)
+        else:
+            this_row[0] = 0
+        if not score_only:
+            trace_row = [None] * (lenB + 1)
+        if row > -low:
+            # Outside the band there is no gap to continue
+            row_score = _OUTSIDE_BAND
+        else:
+            row_score = calc_affine_penalty(row, 2 * open_A, extend_A,
+                                            penalize_extend_when_opening)
+        for col in columns:
+            if col == skip_to:
+                # Outside the band there is no gap to continue
+                row_score = _OUTSIDE_BAND
             # Calculate the score that would occur by extending the
             # alignment without gaps.
-            nogap_score = score_matrix[row - 1][col - 1] + \
+            nogap_score = prev_row[col - 1] + \
                 match_fn(sequenceA[row - 1], sequenceB[col - 1])
 
             # Check the score that would occur if there were a gap in
@@ -619,27 +1118,27 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
             # sequence B:  A-
             #              -B
             if not penalize_end_gaps[0] and row == lenA:
-                row_open = score_matrix[row][col - 1]
+                row_open = this_row[col - 1]
                 row_extend = row_score
             else:
-                row_open = score_matrix[row][col - 1] + first_A_gap
+                row_open = this_row[col - 1] + first_A_gap
                 row_extend = row_score + extend_A
             row_score = max(row_open, row_extend)
 
             # The same for sequence B:
             if not penalize_end_gaps[1] and col == lenB:
-                col_open = score_matrix[row - 1][col]
+                col_open = prev_row[col]
                 col_extend = col_score[col]
             else:
-                col_open = score_matrix[row - 1][col] + first_B_gap
+                col_open = prev_row[col] + first_B_gap
                 col_extend = col_score[col] + extend_B
             col_score[col] = max(col_open, col_extend)
 
             best_score = max(nogap_score, col_score[col], row_score)
             if not align_globally and best_score < 0:
-                score_matrix[row][col] = 0
+                this_row[col] = 0
             else:
-                score_matrix[row][col] = best_score
+                this_row[col] = best_score
 
             # Now the trace_matrix. The edges of the backtrace are encoded
             # binary: 1 = open gap in seqA, 2 = match/mismatch of seqA and
@@ -671,21 +1170,214 @@ def _make_score_matrix_fast(sequenceA, sequenceB, match_fn, open_A, extend_A,
                     trace_score += row_trace_score
                 if col_score_rint == best_score_rint:
                     trace_score += col_trace_score
-                trace_matrix[row][col] = trace_score
+                trace_row[col] = trace_score
+
+        if score_only:
+            # Keep only this row (and the best score) for the next one
+            if not align_globally:
+                max_score = max(max_score, max(this_row))
+        else:
+            score_matrix.append(this_row)
+            trace_matrix.append(trace_row)
+        prev_row = this_row
+
+    if score_only:
+        if align_globally:
+            # The global score is in the bottom right corner
+            return prev_row[-1]
+        return max_score
+    return score_matrix, trace_matrix
+
+
+def _make_score_matrix_profile(sequenceA, sequenceB, match_fn, open_A,
+                               extend_A, open_B, extend_B,
+                               penalize_extend_when_opening,
+                               penalize_end_gaps, align_globally, score_only):
+    """Generate a score and traceback matrix using a NumPy query profile.
+
+    This calculates exactly the same scores (and traceback) as
+    _make_score_matrix_fast, but a whole column of the matrices at a time
+    using NumPy integer arrays. The match scores are taken from a profile of
+    sequence A (the query) against each letter in sequence B, and the gaps
+    in sequence B within a column are found using a cumulative maximum
+    (rather than the sequential loop of the Farrar striped approach). The
+    sequences are encoded as integers, one per distinct letter.
 
+    If score_only is true, only the best score is returned, and the shorter
+    sequence is used as sequence B for fewer (but longer) columns.
+
+    Returns None if NumPy is not available, or any of the match scores or
+    gap penalties are not integers, in which case the other functions should
+    be used.
+    """
+    if numpy is None:
+        return None
+    gaps = (open_A, extend_A, open_B, extend_B)
+    if not all(x == int(x) for x in gaps):
+        return None
+    if score_only and len(sequenceB) > len(sequenceA):
+        # The scores are symmetric, so swap the sequences to have the longer
+        # one down the columns
+        return _make_score_matrix_profile(
+            sequenceB, sequenceA, lambda x, y: match_fn(y, x), open_B,
+            extend_B, open_A, extend_A, penalize_extend_when_opening,
+            penalize_end_gaps[::-1], align_globally, score_only)
+    # Encode the sequences, and make a table of the match scores between the
+    # letters of each sequence:
+    codes_A, letters_A = _encode_letters(sequenceA)
+    codes_B, letters_B = _encode_letters(sequenceB)
+    table = [[match_fn(x, y) for y in letters_B] for x in letters_A]
+    if not all(x == int(x) for row in table for x in row):
+        return None
+    # Use 32 bit integers, unless the scores could overflow them
+    lenA, lenB = len(sequenceA), len(sequenceB)
+    limit = (lenA + lenB + 2) * (2 * max(abs(x) for x in gaps) +
+                                 max(abs(x) for row in table for x in row))
+    if limit < 2 ** 31:
+        dtype = numpy.int32
+    else:
+        dtype = numpy.int64
+    # The profile has the match scores down sequence A for each letter in B
+    profile = numpy.array(table, dtype)[codes_A].T.copy()
+
+    def penalty(length, open, extend):
+        return int(calc_affine_penalty(length, open, extend,
+                                       penalize_extend_when_opening))
+
+    first_A_gap = penalty(1, open_A, extend_A)
+    first_B_gap = penalty(1, open_B, extend_B)
+    extend_A, extend_B = int(extend_A), int(extend_B)
+    # The gap in A costs for each row (gaps in the last row may be free)
+    row_open = numpy.empty(lenA, dtype)
+    row_open.fill(first_A_gap)
+    row_extend = numpy.empty(lenA, dtype)
+    row_extend.fill(extend_A)
+    if not penalize_end_gaps[0]:
+        row_open[-1] = row_extend[-1] = 0
+    steps = numpy.arange(1, lenA + 1, dtype=dtype)
+
+    # The first column, and the row 'matrix' (see _make_score_matrix_fast):
+    prev_col = numpy.array([penalty(i, open_B, extend_B)
+                            if penalize_end_gaps[1] else 0
+                            for i in range(lenA + 1)], dtype)
+    row_score = numpy.array([penalty(i, 2 * open_A, extend_A)
+                             for i in range(1, lenA + 1)], dtype)
+    if score_only:
+        max_score = int(prev_col.max())
+    else:
+        score_matrix = numpy.empty((lenB + 1, lenA + 1), dtype)
+        score_matrix[0] = prev_col
+        trace_matrix = numpy.zeros((lenB + 1, lenA + 1), numpy.uint8)
+    for col in range(1, lenB + 1):
+        # The first row, and the col 'matrix' for the first row:
+        if penalize_end_gaps[0]:
+            first_score = penalty(col, open_A, extend_A)
+        else:
+            first_score = 0
+        first_col_score = penalty(col, 2 * open_B, extend_B)
+        if not penalize_end_gaps[1] and col == lenB:
+            col_open, col_extend = 0, 0
+        else:
+            col_open, col_extend = first_B_gap, extend_B
+
+        nogap_score = prev_col[:-1] + profile[codes_B[col - 1]]
+        row_open_score = prev_col[1:] + row_open
+        row_extend_score = row_score + row_extend
+        row_score = numpy.maximum(row_open_score, row_extend_score)
+        best_score = numpy.maximum(nogap_score, row_score)
+        if not align_globally:
+            numpy.maximum(best_score, 0, out=best_score)
+        # Each gap in sequence B is opened from the best score in the row
+        # above, so the best score for a gap can be found from a cumulative
+        # maximum of these (allowing for the extension penalty):
+        opened = numpy.empty(lenA, dtype)
+        opened[0] = first_score
+        opened[1:] = best_score[:-1]
+        opened += col_open
+        col_score = numpy.maximum.accumulate(opened - col_extend * steps)
+        numpy.maximum(col_score, first_col_score, out=col_score)
+        col_score += col_extend * steps
+        numpy.maximum(best_score, col_score, out=best_score)
+
+        if not score_only:
+            # The trace scores, as in _make_score_matrix_fast
+            col_open_score = numpy.empty(lenA, dtype)
+            col_open_score[0] = first_score
+            col_open_score[1:] = best_score[:-1]
+            col_open_score += col_open
+            col_extend_score = numpy.empty(lenA, dtype)
+            col_extend_score[0] = first_col_score
+            col_extend_score[1:] = col_score[:-1]
+            col_extend_score += col_extend
+            # This is the best score before any local alignment is reset
+            unclipped = numpy.maximum(numpy.maximum(nogap_score, row_score),
+                                      col_score)
+            trace = 2 * (nogap_score == unclipped)
+            trace += (row_score == unclipped) * (
+                (row_open_score == row_score) +
+                8 * (row_extend_score == row_score))
+            trace += (col_score == unclipped) * (
+                4 * (col_open_score == col_score) +
+                16 * (col_extend_score == col_score))
+            trace_matrix[col, 1:] = trace
+
+        prev_col = numpy.empty(lenA + 1, dtype)
+        prev_col[0] = first_score
+        prev_col[1:] = best_score
+        if score_only:
+            if not align_globally:
+                max_score = max(max_score, int(prev_col.max()))
+        else:
+            score_matrix[col] = prev_col
+
+    if score_only:
+        if align_globally:
+            return int(prev_col[-1])
+        return max_score
+    # Back to lists (with rows for sequence A) for recovering the alignments
+    score_matrix = score_matrix.T.tolist()
+    trace_matrix = trace_matrix.T.tolist()
+    trace_matrix[0] = [None] * (lenB + 1)
+    for row in trace_matrix:
+        row[0] = None
     return score_matrix, trace_matrix
 
 
+def _encode_letters(sequence):
+    """Return the sequence as an array of codes, and the letters (PRIVATE).
+
+    Each distinct letter (or item, for lists) is numbered from zero in the
+    order seen.
+    """
+    letters = {}
+    codes = [letters.setdefault(letter, len(letters)) for letter in sequence]
+    if len(letters) < 256:
+        codes = numpy.array(codes, numpy.uint8)
+    else:
+        codes = numpy.array(codes, numpy.intp)
+    return codes, sorted(letters, key=letters.get)
+
+
 def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                         trace_matrix, align_globally, gap_char,
-                        one_alignment_only, gap_A_fn, gap_B_fn):
-    """Do the backtracing and return a list of alignments"""
+                        one_alignment_only, gap_A_fn, gap_B_fn,
+                        any_gap_order=False):
+    """Do the backtracing and yield the alignments.
+
+    This is a generator, so the alignments are only recovered as they are
+    needed. Duplicates and empty alignments are skipped (as done by
+    _clean_alignments).
+
+    Normally a gap in seqA is not allowed to follow a gap in seqB (see
+    below). With any_gap_order, as used for banded alignments where the
+    other order may lie outside the band, both orders are allowed.
+    """
     # Recover the alignments by following the traceback matrix.  This
     # is a recursive procedure, but it's implemented here iteratively
     # with a stack.
     lenA, lenB = len(sequenceA), len(sequenceB)
     ali_seqA, ali_seqB = sequenceA[0:0], sequenceB[0:0]
-    tracebacks = []
+    seen = set()
     in_process = []
 
     for start in starts:
@@ -715,7 +1407,7 @@ def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                         sequenceB[lenB - 1:col - 1:-1])
         in_process += [(ali_seqA, ali_seqB, end, row, col, False,
                         trace_matrix[row][col])]
-    while in_process and len(tracebacks) < MAX_ALIGNMENTS:
+    while in_process:
         # Although we allow a gap in seqB to be followed by a gap in seqA,
         # we don't want to allow it the other way round, since this would
         # give redundant alignments of type: A-  vs.  -A
@@ -760,7 +1452,7 @@ def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                 row -= 1
                 ali_seqA += sequenceA[row]
                 ali_seqB += gap_char
-                col_gap = True
+                col_gap = not any_gap_order
             elif trace in (8, 24):  # = row extend = extend gap in seqA
                 trace -= 8
                 if col_gap:
@@ -775,7 +1467,7 @@ def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                     ali_seqA, ali_seqB, row, col, in_process, dead_end = x
             elif trace == 16:  # = col extend = extend gap in seqB
                 trace -= 16
-                col_gap = True
+                col_gap = not any_gap_order
                 x = _find_gap_open(sequenceA, sequenceB, ali_seqA, ali_seqB,
                                    end, row, col, col_gap, gap_char,
                                    score_matrix, trace_matrix, in_process,
@@ -790,11 +1482,133 @@ def _recover_alignments(sequenceA, sequenceB, starts, score_matrix,
                 begin = max(row, col)
                 trace = 0
         if not dead_end:
-            tracebacks.append((ali_seqA[::-1], ali_seqB[::-1], score, begin,
-                               end))
+            ali_seqA, ali_seqB = ali_seqA[::-1], ali_seqB[::-1]
+            if end is None:  # global alignment
+                end = len(ali_seqA)
+            elif end < 0:
+                end += len(ali_seqA)
+            if begin >= end:
+                # There's no alignment here
+                continue
+            if isinstance(ali_seqA, list):
+                key = (tuple(ali_seqA), tuple(ali_seqB), begin, end)
+            else:
+                key = (ali_seqA, ali_seqB, begin, end)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield ali_seqA, ali_seqB, score, begin, end
             if one_alignment_only:
                 break
-    return _clean_alignments(tracebacks)
+
+
+def _count_alignments(starts, score_matrix, trace_matrix, align_globally,
+                      gap_A_fn, gap_B_fn, any_gap_order=False):
+    """Count the alignments _recover_alignments would give (PRIVATE).
+
+    This follows the same rules as _recover_alignments, but rather than
+    recovering each alignment it counts them by dynamic programming over
+    the cells of the traceback matrix. As the same gap can be found by
+    more than one traceback (e.g. by opening it one step at a time, or
+    by looking for where the extended gap was opened), each run of gaps
+    is counted once using the set of cells where it can be opened. With
+    any_gap_order, a gap in sequence B may also be followed by a gap in
+    sequence A (as in _recover_alignments).
+    """
+    if not align_globally:
+        # Local alignments have to start with a match (and this is how
+        # _recover_alignments treats the starting cells)
+        local_starts = []
+        for score, (row, col) in starts:
+            if score > 0 and trace_matrix[row][col] & 2:
+                trace_matrix[row][col] = 2
+                local_starts.append((row, col))
+        starts = local_starts
+    else:
+        starts = [pos for score, pos in starts]
+
+    def is_stop(row, col):
+        # At the edge of the matrix, or the beginning of a local alignment?
+        return not trace_matrix[row][col] or \
+            (not align_globally and score_matrix[row][col] <= 0)
+
+    def gap_opens(row, col, trace, gap_fn, index, length, step):
+        # The cells before the first gap step back along a row (for a gap
+        # in sequence A) or up a column (for a gap in sequence B), as found
+        # by _find_gap_open for an extended gap:
+        opens = []
+        if trace & (1 if step == (0, 1) else 4):
+            opens.append((row - step[0], col - step[1]))
+        if trace & (8 if step == (0, 1) else 16):
+            target = rint(score_matrix[row][col])
+            # Like _find_gap_open, stop at the edge of the matrix, which is
+            # a dead end if the gap went past a cell outside the band
+            dead_end = not trace_matrix[row - step[0]][col - step[1]]
+            for n in range(2, length + 1):
+                x, y = row - n * step[0], col - n * step[1]
+                if rint(score_matrix[x][y] + gap_fn(index, n)) == target:
+                    if trace_matrix[x][y]:
+                        opens.append((x, y))
+                    else:
+                        if not dead_end:
+                            opens.append((x, y))
+                        break
+                if not trace_matrix[x][y]:
+                    dead_end = True
+        return opens
+
+    # Find the cells reached by any traceback, and where each can go next
+    diagonal, gaps_A, gaps_B = {}, {}, {}
+    stack = list(starts)
+    while stack:
+        row, col = cell = stack.pop()
+        if cell in diagonal:
+            continue
+        if (row == 0 and col == 0) or is_stop(row, col):
+            diagonal[cell] = None
+            continue
+        trace = trace_matrix[row][col]
+        diagonal[cell] = (row - 1, col - 1) if trace & 2 else None
+        gaps_A[cell] = gap_opens(row, col, trace, gap_A_fn, row, col, (0, 1))
+        gaps_B[cell] = gap_opens(row, col, trace, gap_B_fn, col, row, (1, 0))
+        if diagonal[cell] is not None:
+            stack.append(diagonal[cell])
+        stack.extend(gaps_A[cell])
+        stack.extend(gaps_B[cell])
+
+    # For each cell, count the tracebacks from there on after arriving by a
+    # match (count). For the cells at the end of a run of gaps, only count
+    # the tracebacks which don't continue the run (end_A and end_B, and
+    # a gap in sequence B can't be followed by a gap in sequence A unless
+    # any_gap_order is used). The cells where each run of gaps starting
+    # from a cell can end are collected in runs_A and runs_B.
+    count, end_A, end_B, runs_A, runs_B = {}, {}, {}, {}, {}
+    for cell in sorted(diagonal):
+        row, col = cell
+        if cell not in gaps_A:
+            # The end of a traceback. Like _recover_alignments, a gap in
+            # sequence B can't be followed by the rest of sequence B.
+            count[cell] = end_A[cell] = 1
+            end_B[cell] = 0 if col and not any_gap_order else 1
+            runs_A[cell] = runs_B[cell] = ()
+            continue
+        runs = set()
+        for x in gaps_A[cell]:
+            runs.add(x)
+            runs.update(runs_A[x])
+        runs_A[cell] = runs
+        runs = set()
+        for x in gaps_B[cell]:
+            runs.add(x)
+            runs.update(runs_B[x])
+        runs_B[cell] = runs
+        matches = 0 if diagonal[cell] is None else count[diagonal[cell]]
+        after_A = sum(end_A[x] for x in runs_A[cell])
+        after_B = sum(end_B[x] for x in runs_B[cell])
+        count[cell] = matches + after_A + after_B
+        end_A[cell] = matches + after_B
+        end_B[cell] = matches + after_A if any_gap_order else matches
+    return sum(count[cell] for cell in starts)
 
 
 def _find_start(score_matrix, align_globally):
@@ -882,6 +1696,334 @@ def _find_gap_open(sequenceA, sequenceB, ali_seqA, ali_seqB, end, row, col,
     return ali_seqA, ali_seqB, row, col, in_process, dead_end
 
 
+class _LinearSpaceAligner(object):
+    """Find one optimal alignment using linear memory (PRIVATE).
+
+    This uses Hirschberg's divide and conquer approach, as extended to affine
+    gap penalties by Myers and Miller (1988). The score of the best path from
+    the start to each cell of the middle row is calculated keeping only one
+    row at a time, likewise the best path from each cell of the middle row to
+    the end, giving the cell (and state) where the optimal alignment crosses
+    the middle row. The two halves are then aligned in the same way, until
+    they are small enough to use the full score matrices.
+
+    Alignments are built up from three kinds of step, which are also used as
+    the state of the last step to each cell (to know whether a gap is being
+    opened or extended): 0 = match/mismatch (or the start), 1 = gap in
+    sequence A and 2 = gap in sequence B.
+    """
+
+    # Use the full matrices once a sub-problem has this many cells or fewer
+    max_cells = 10000
+
+    def __init__(self, sequenceA, sequenceB, match_fn, gap_A_fn, gap_B_fn,
+                 penalize_end_gaps):
+        self.sequenceA = sequenceA
+        self.sequenceB = sequenceB
+        self.match_fn = match_fn
+        self.lenA = len(sequenceA)
+        self.lenB = lenB = len(sequenceB)
+        self.first_A_gap = calc_affine_penalty(
+            1, gap_A_fn.open, gap_A_fn.extend,
+            gap_A_fn.penalize_extend_when_opening)
+        self.extend_A = gap_A_fn.extend
+        self.free_end_gaps_A = not penalize_end_gaps[0]
+        # The cost of a gap in sequence B depends only on the column, as
+        # gaps at the start or end of sequence B may be free:
+        first_B_gap = calc_affine_penalty(
+            1, gap_B_fn.open, gap_B_fn.extend,
+            gap_B_fn.penalize_extend_when_opening)
+        self.open_B = [first_B_gap] * (lenB + 1)
+        self.extend_B = [gap_B_fn.extend] * (lenB + 1)
+        self.free_end_gaps_B = not penalize_end_gaps[1]
+        if self.free_end_gaps_B:
+            for col in (0, lenB):
+                self.open_B[col] = self.extend_B[col] = 0
+
+    def _gap_A_costs(self, row):
+        """Return the open and extend costs for a gap in A in this row."""
+        if self.free_end_gaps_A and (row == 0 or row == self.lenA):
+            return 0, 0
+        return self.first_A_gap, self.extend_A
+
+    def forward(self, row_start, row_end, col_start, col_end, start_state,
+                local=False):
+        """Yield each row of forward scores for the given region.
+
+        Each row is given as the row number and three lists with the best
+        score of an alignment from the start of the region (in the given
+        state) to each column of that row, ending in each state. For local
+        alignments, an alignment can also start at any cell (except on the
+        first row and column of the full matrix).
+        """
+        sequenceA, sequenceB, match_fn = \
+            self.sequenceA, self.sequenceB, self.match_fn
+        open_B, extend_B = self.open_B, self.extend_B
+        width = col_end - col_start
+        nogap = [_NEG_INF] * (width + 1)
+        gap_A = [_NEG_INF] * (width + 1)
+        gap_B = [_NEG_INF] * (width + 1)
+        (nogap, gap_A, gap_B)[start_state][0] = 0
+        # The first row can only be reached by gaps in sequence A
+        open_A, extend_A = self._gap_A_costs(row_start)
+        for i in range(1, width + 1):
+            gap_A[i] = max(nogap[i - 1] + open_A, gap_B[i - 1] + open_A,
+                           gap_A[i - 1] + extend_A)
+        yield row_start, nogap, gap_A, gap_B
+        for row in range(row_start + 1, row_end + 1):
+            charA = sequenceA[row - 1]
+            open_A, extend_A = self._gap_A_costs(row)
+            this_nogap = [_NEG_INF] * (width + 1)
+            this_gap_A = [_NEG_INF] * (width + 1)
+            this_gap_B = [_NEG_INF] * (width + 1)
+            col = col_start
+            this_gap_B[0] = max(nogap[0] + open_B[col], gap_A[0] + open_B[col],
+                                gap_B[0] + extend_B[col])
+            for i in range(1, width + 1):
+                col = col_start + i
+                score = max(nogap[i - 1], gap_A[i - 1], gap_B[i - 1]) + \
+                    match_fn(charA, sequenceB[col - 1])
+                if local and score < 0:
+                    score = 0
+                this_nogap[i] = score
+                this_gap_A[i] = max(this_nogap[i - 1] + open_A,
+                                    this_gap_B[i - 1] + open_A,
+                                    this_gap_A[i - 1] + extend_A)
+                this_gap_B[i] = max(nogap[i] + open_B[col],
+                                    gap_A[i] + open_B[col],
+                                    gap_B[i] + extend_B[col])
+            nogap, gap_A, gap_B = this_nogap, this_gap_A, this_gap_B
+            yield row, nogap, gap_A, gap_B
+
+    def backward(self, row_start, row_end, col_start, col_end, end_state):
+        """Yield each row of backward scores for the given region.
+
+        Starting from the last row, each row is given as the row number and
+        three lists with the best score of an alignment from each column of
+        that row (having arrived there in each state) to the end of the
+        region, ending in the given state (or any state if None).
+        """
+        sequenceA, sequenceB, match_fn = \
+            self.sequenceA, self.sequenceB, self.match_fn
+        open_B, extend_B = self.open_B, self.extend_B
+        width = col_end - col_start
+        nogap = [_NEG_INF] * (width + 1)
+        gap_A = [_NEG_INF] * (width + 1)
+        gap_B = [_NEG_INF] * (width + 1)
+        for state, scores in enumerate((nogap, gap_A, gap_B)):
+            if end_state is None or end_state == state:
+                scores[width] = 0
+        # The last row can only be left by gaps in sequence A
+        open_A, extend_A = self._gap_A_costs(row_end)
+        for i in range(width - 1, -1, -1):
+            nogap[i] = gap_B[i] = gap_A[i + 1] + open_A
+            gap_A[i] = gap_A[i + 1] + extend_A
+        yield row_end, nogap, gap_A, gap_B
+        for row in range(row_end - 1, row_start - 1, -1):
+            charA = sequenceA[row]
+            open_A, extend_A = self._gap_A_costs(row)
+            this_nogap = [_NEG_INF] * (width + 1)
+            this_gap_A = [_NEG_INF] * (width + 1)
+            this_gap_B = [_NEG_INF] * (width + 1)
+            col = col_end
+            this_nogap[width] = this_gap_A[width] = gap_B[width] + open_B[col]
+            this_gap_B[width] = gap_B[width] + extend_B[col]
+            for i in range(width - 1, -1, -1):
+                col = col_start + i
+                score = nogap[i + 1] + match_fn(charA, sequenceB[col])
+                next_gap_A = this_gap_A[i + 1]
+                next_gap_B = gap_B[i]
+                this_nogap[i] = max(score, next_gap_A + open_A,
+                                    next_gap_B + open_B[col])
+                this_gap_A[i] = max(score, next_gap_A + extend_A,
+                                    next_gap_B + open_B[col])
+                this_gap_B[i] = max(score, next_gap_A + open_A,
+                                    next_gap_B + extend_B[col])
+            nogap, gap_A, gap_B = this_nogap, this_gap_A, this_gap_B
+            yield row, nogap, gap_A, gap_B
+
+    def solve(self, row_start, row_end, col_start, col_end, start_state,
+              end_state, steps):
+        """Add the steps of an optimal alignment of the region to steps.
+
+        Returns the score of the alignment of this region.
+        """
+        rows = row_end - row_start
+        cols = col_end - col_start
+        if rows < 2 or cols < 2 or (rows + 1) * (cols + 1) <= self.max_cells:
+            return self._solve_directly(row_start, row_end, col_start,
+                                        col_end, start_state, end_state,
+                                        steps)
+        middle = (row_start + row_end) // 2
+        for row, nogap, gap_A, gap_B in self.forward(
+                row_start, middle, col_start, col_end, start_state):
+            pass
+        forward = (nogap, gap_A, gap_B)
+        for row, nogap, gap_A, gap_B in self.backward(
+                middle, row_end, col_start, col_end, end_state):
+            pass
+        backward = (nogap, gap_A, gap_B)
+        best_score = _NEG_INF
+        for i in range(cols + 1):
+            for state in (0, 1, 2):
+                score = forward[state][i] + backward[state][i]
+                if score > best_score:
+                    best_score = score
+                    best_col, best_state = col_start + i, state
+        self.solve(row_start, middle, col_start, best_col, start_state,
+                   best_state, steps)
+        self.solve(middle, row_end, best_col, col_end, best_state,
+                   end_state, steps)
+        return best_score
+
+    def _solve_directly(self, row_start, row_end, col_start, col_end,
+                        start_state, end_state, steps):
+        """Align a small region using full score and trace matrices."""
+        # Keep the forward scores of all rows, and for each cell and state
+        # the state of the previous cell in the best alignment.
+        score_rows = []
+        trace_rows = []
+        for row, nogap, gap_A, gap_B in self.forward(
+                row_start, row_end, col_start, col_end, start_state):
+            score_rows.append((nogap, gap_A, gap_B))
+        open_B, extend_B = self.open_B, self.extend_B
+        for row in range(row_start, row_end + 1):
+            open_A, extend_A = self._gap_A_costs(row)
+            this = score_rows[row - row_start]
+            prev = score_rows[row - row_start - 1]
+            trace_row = [None]
+            for i in range(1, col_end - col_start + 1):
+                col = col_start + i
+                if row == row_start:
+                    before_nogap = None
+                else:
+                    before_nogap = _argmax3(prev[0][i - 1], prev[1][i - 1],
+                                            prev[2][i - 1])
+                before_gap_A = _argmax3(this[0][i - 1] + open_A,
+                                        this[1][i - 1] + extend_A,
+                                        this[2][i - 1] + open_A)
+                if row == row_start:
+                    before_gap_B = None
+                else:
+                    before_gap_B = _argmax3(prev[0][i] + open_B[col],
+                                            prev[1][i] + open_B[col],
+                                            prev[2][i] + extend_B[col])
+                trace_row.append((before_nogap, before_gap_A, before_gap_B))
+            trace_rows.append(trace_row)
+        last = score_rows[-1]
+        if end_state is None:
+            end_state = _argmax3(last[0][-1], last[1][-1], last[2][-1])
+        score = last[end_state][-1]
+        # Now follow the trace back from the end of the region
+        path = []
+        row, col, state = row_end, col_end, end_state
+        while row > row_start or col > col_start:
+            path.append(state)
+            if col == col_start:
+                # Only gaps in sequence B are possible in the first column
+                previous = _argmax3(
+                    score_rows[row - row_start - 1][0][0] + open_B[col],
+                    score_rows[row - row_start - 1][1][0] + open_B[col],
+                    score_rows[row - row_start - 1][2][0] + extend_B[col])
+            else:
+                previous = trace_rows[row - row_start][col - col_start][state]
+            if state == 0:
+                row -= 1
+                col -= 1
+            elif state == 1:
+                col -= 1
+            else:
+                row -= 1
+            state = previous
+        steps.extend(reversed(path))
+        return score
+
+    def align(self, align_globally, gap_char):
+        """Return a list with one optimal alignment."""
+        sequenceA, sequenceB = self.sequenceA, self.sequenceB
+        lenA, lenB = self.lenA, self.lenB
+        steps = []
+        if align_globally:
+            score = self.solve(0, lenA, 0, lenB, 0, None, steps)
+            row_start = col_start = 0
+            row_end, col_end = lenA, lenB
+        else:
+            # Find where the best local alignment ends,
+            score = 0
+            for row, nogap, gap_A, gap_B in self.forward(0, lenA, 0, lenB, 0,
+                                                         local=True):
+                best = max(nogap)
+                if best > score:
+                    score = best
+                    row_end, col_end = row, nogap.index(best)
+            if score <= 0:
+                # Local alignments should have a positive score
+                return []
+            # then where it starts (any cell where the forward score could
+            # be zero, taking the last possible one),
+            target = rint(score)
+            row_start = None
+            for row, nogap, gap_A, gap_B in self.backward(0, row_end, 0,
+                                                          col_end, 0):
+                for col in range(col_end, -1, -1):
+                    if nogap[col] == _NEG_INF or rint(nogap[col]) != target:
+                        continue
+                    if (row and col) or (row == col == 0) or \
+                       (not row and self.free_end_gaps_A) or \
+                       (not col and self.free_end_gaps_B):
+                        row_start, col_start = row, col
+                        break
+                if row_start is not None:
+                    break
+            # and then recover the alignment in between.
+            self.solve(row_start, row_end, col_start, col_end, 0, 0, steps)
+        ali_seqA, ali_seqB = [], []
+        row, col = row_start, col_start
+        for state in steps:
+            if state == 0:
+                ali_seqA.append(sequenceA[row:row + 1])
+                ali_seqB.append(sequenceB[col:col + 1])
+                row += 1
+                col += 1
+            elif state == 1:
+                ali_seqA.append(gap_char)
+                ali_seqB.append(sequenceB[col:col + 1])
+                col += 1
+            else:
+                ali_seqA.append(sequenceA[row:row + 1])
+                ali_seqB.append(gap_char)
+                row += 1
+        # For local alignments, add the rest of the sequences with gaps
+        # before and after (as done in _recover_alignments):
+        begin = max(row_start, col_start)
+        ali_seqA.insert(0, gap_char * (begin - row_start) +
+                        sequenceA[:row_start])
+        ali_seqB.insert(0, gap_char * (begin - col_start) +
+                        sequenceB[:col_start])
+        end = begin + len(steps)
+        tail = max(lenA - row_end, lenB - col_end)
+        ali_seqA.append(sequenceA[row_end:] +
+                        gap_char * (tail - lenA + row_end))
+        ali_seqB.append(sequenceB[col_end:] +
+                        gap_char * (tail - lenB + col_end))
+        if isinstance(sequenceA, list):
+            ali_seqA = [x for piece in ali_seqA for x in piece]
+            ali_seqB = [x for piece in ali_seqB for x in piece]
+        else:
+            ali_seqA = "".join(ali_seqA)
+            ali_seqB = "".join(ali_seqB)
+        return _clean_alignments([(ali_seqA, ali_seqB, score, begin, end)])
+
+
+def _argmax3(score0, score1, score2):
+    """Return the index of the highest of three scores (the first if tied)."""
+    if score0 >= score1 and score0 >= score2:
+        return 0
+    elif score1 >= score2:
+        return 1
+    return 2
+
+
 _PRECISION = 1000
 
 
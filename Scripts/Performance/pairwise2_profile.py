@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""Compare timings of the pairwise2 score matrix functions.
+
+This times the NumPy query profile code (used with query_profile=True)
+against _make_score_matrix_fast (the C code if compiled, otherwise the
+pure Python fallback), for local alignments of random protein sequences
+using BLOSUM62, and of random DNA sequences with match/mismatch scores.
+"""
+from __future__ import print_function
+
+import random
+import time
+
+from Bio import pairwise2
+from Bio.SubsMat.MatrixInfo import blosum62
+
+
+def random_sequence(letters, length):
+    return "".join(random.choice(letters) for i in range(length))
+
+
+def time_function(function, *args):
+    start_time = time.time()
+    result = function(*args)
+    return time.time() - start_time, result
+
+
+random.seed(0)
+tests = [("protein, BLOSUM62", "ACDEFGHIKLMNPQRSTVWY",
+          pairwise2.dictionary_match(blosum62), -10, -1),
+         ("DNA, match/mismatch", "ACGT",
+          pairwise2.identity_match(2, -3), -5, -2)]
+print("Using %s" % pairwise2._make_score_matrix_fast)
+for name, letters, match_fn, open, extend in tests:
+    print(name)
+    for length in (100, 300, 1000):
+        seqA = random_sequence(letters, length)
+        seqB = random_sequence(letters, length)
+        for score_only in (True, False):
+            args = (seqA, seqB, match_fn, open, extend, open, extend,
+                    False, (False, False), False, score_only)
+            fast_time, fast = time_function(
+                pairwise2._make_score_matrix_fast, *args)
+            profile_time, profile = time_function(
+                pairwise2._make_score_matrix_profile, *args)
+            assert profile == fast
+            print("\tlength %i, score_only=%s: fast %0.3fs, profile %0.3fs"
+                  % (length, score_only, fast_time, profile_time))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""Measure the memory used by a large structure parsed with PDBParser.
+
+Builds a PDB file with about a million atoms (by default) from copies of
+the models in Tests/PDB/1A8O.pdb, parses it, and reports the memory still
+allocated for the resulting Structure object, using tracemalloc (Python 3).
+
+Usage: python pdb_memory.py [number of atoms]
+"""
+from __future__ import print_function
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+from Bio._py3k import StringIO
+from Bio.PDB import PDBParser
+
+
+pdb_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "..", "..", "Tests", "PDB", "1A8O.pdb")
+
+if len(sys.argv) > 1:
+    wanted = int(sys.argv[1])
+else:
+    wanted = 1000000
+
+with open(pdb_file) as handle:
+    atom_lines = [line for line in handle if line.startswith(("ATOM  ",
+                                                              "HETATM"))]
+
+# -- build the file, with one MODEL per copy of the atoms
+models = max(1, wanted // len(atom_lines))
+lines = []
+for model in range(1, models + 1):
+    lines.append("MODEL     %4i\n" % model)
+    lines.extend(atom_lines)
+    lines.append("ENDMDL\n")
+lines.append("END\n")
+text = "".join(lines)
+del lines
+print("%i atoms in %i models" % (models * len(atom_lines), models))
+
+# -- do the parsing and memory measurement
+gc.collect()
+tracemalloc.start()
+start_time = time.time()
+structure = PDBParser(QUIET=True).get_structure("big", StringIO(text))
+parse_time = time.time() - start_time
+gc.collect()
+current, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+atoms = sum(1 for atom in structure.get_atoms())
+print("Parsed %i atoms in %0.1f seconds (with tracemalloc running)"
+      % (atoms, parse_time))
+print("Structure uses %0.1f MB (%i bytes per atom), peak %0.1f MB"
+      % (current / 1e6, current / atoms, peak / 1e6))
@@ -148,11 +148,15 @@ DOCTEST_MODULES = [
 if is_numpy():
     DOCTEST_MODULES.extend([
         "Bio.Affy.CelFile",
+        "Bio.Alphabet.Encoding",
         "Bio.MaxEntropy",
+        "Bio.PDB.AtomTable",
         "Bio.PDB.Polypeptide",
         "Bio.PDB.Selection",
+        "Bio.PDB.parse_many",
         "Bio.SeqIO.PdbIO",
         "Bio.Statistics.lowess",
+        "Bio.SubsMat.DenseMatrix",
         "Bio.SVDSuperimposer",
     ])
 
@@ -14,6 +14,11 @@ from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio import AlignIO
 from Bio.SubsMat.FreqTable import FreqTable, FREQ
+from Bio.Align import AlignInfo
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from Bio.Align.AlignInfo import SummaryInfo
 import math
 
@@ -143,6 +148,61 @@ X  0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0 0.0
                                                1.290, 1.290, 0.80, 0.610, 0.390, 0.470, 0.040], places=2)
         self.assertAlmostEqual(ic, 7.546, places=3)
 
+    def test_vectorized(self):
+        """Check the NumPy and pure Python code give identical results."""
+        if AlignInfo.numpy is None:
+            self.skipTest("Install NumPy to test the vectorized code")
+        alpha = Gapped(unambiguous_dna, "-")
+        align = MultipleSeqAlignment([
+            SeqRecord(Seq("AACCACGTTTA-", alpha), id="ID001"),
+            SeqRecord(Seq("CACCAC--GGGT", alpha), id="ID002"),
+            SeqRecord(Seq("CACCACGTTCGC", alpha), id="ID003"),
+            SeqRecord(Seq("GCGCACGTGG-G", alpha), id="ID004"),
+            SeqRecord(Seq("TCGCACGTTGTG", alpha), id="ID005")], alpha)
+        align[1].annotations["weight"] = 0.3
+        align[3].annotations["weight"] = 2
+        expected = FreqTable({"A": 0.325, "G": 0.175, "T": 0.325, "C": 0.175},
+                             FREQ, unambiguous_dna)
+
+        def calculate():
+            summary = SummaryInfo(align)
+            consensus = summary.dumb_consensus(0.6, "N")
+            pssm = summary.pos_specific_score_matrix(consensus)
+            ic = summary.information_content(2, 11, expected,
+                                             chars_to_ignore=["-"],
+                                             pseudo_count=1)
+            return (str(consensus), str(summary.gap_consensus()),
+                    pssm.pssm, ic, summary.ic_vector)
+
+        results = calculate()
+        self.assertEqual(results[0], "NACCACGTTGNN")
+        align.as_array()
+        self.assertEqual(calculate(), results)
+        try:
+            AlignInfo.numpy = None
+            self.assertEqual(calculate(), results)
+        finally:
+            AlignInfo.numpy = numpy
+        # Explicit integer weights of one give integer scores, as before
+        for record in align:
+            record.annotations["weight"] = 1
+        pssm = calculate()[2]
+        self.assertEqual(pssm[0][1]["C"], 2)
+        self.assertIsInstance(pssm[0][1]["C"], int)
+        try:
+            AlignInfo.numpy = None
+            self.assertEqual(calculate()[2], pssm)
+        finally:
+            AlignInfo.numpy = numpy
+
+    def test_bad_residue(self):
+        align = MultipleSeqAlignment([
+            SeqRecord(Seq("ACGT", unambiguous_dna), id="ID001"),
+            SeqRecord(Seq("ACGU", unambiguous_dna), id="ID002")])
+        summary = SummaryInfo(align)
+        self.assertRaises(ValueError, summary.pos_specific_score_matrix)
+        self.assertRaises(ValueError, summary.information_content)
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
@@ -0,0 +1,124 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the array storage of Bio.Align.MultipleSeqAlignment."""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use MultipleSeqAlignment.as_array.")
+
+from Bio import AlignIO
+from Bio.Align import MultipleSeqAlignment
+from Bio.Alphabet import generic_dna
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+
+class TestAlignArray(unittest.TestCase):
+
+    def setUp(self):
+        self.alignment = AlignIO.read("Clustalw/opuntia.aln", "clustal")
+        self.copy = AlignIO.read("Clustalw/opuntia.aln", "clustal")
+        self.copy.as_array()
+
+    def check_same(self, align1, align2):
+        self.assertEqual(len(align1), len(align2))
+        self.assertEqual(align1.get_alignment_length(),
+                         align2.get_alignment_length())
+        for record1, record2 in zip(align1, align2):
+            self.assertEqual(record1.id, record2.id)
+            self.assertEqual(str(record1.seq), str(record2.seq))
+        if align2._array is not None:
+            self.assertEqual(align2.as_array().shape,
+                             (len(align2), align2.get_alignment_length()))
+            for record, row in zip(align2, align2.as_array()):
+                self.assertEqual(str(record.seq),
+                                 row.tobytes().decode("latin-1"))
+
+    def test_array(self):
+        array = self.copy.as_array()
+        self.assertEqual(array.dtype, numpy.uint8)
+        self.assertEqual(array.shape, (7, 156))
+        self.assertFalse(array.flags.writeable)
+        self.assertIs(self.copy.as_array(), array)
+        self.assertEqual(self.copy.get_alignment_length(), 156)
+        a = SeqRecord(Seq("AAAACGT", generic_dna), id="Alpha")
+        b = SeqRecord(Seq("AAA-CGT", generic_dna), id="Beta")
+        c = SeqRecord(Seq("AAAAGGT", generic_dna), id="Gamma")
+        array = MultipleSeqAlignment([a, b, c]).as_array()
+        self.assertEqual(array.shape, (3, 7))
+        self.assertEqual(array[:, 3].tobytes(), b"A-A")
+        empty = MultipleSeqAlignment([], generic_dna)
+        self.assertEqual(empty.as_array().shape, (0, 0))
+        self.assertEqual(empty.get_alignment_length(), 0)
+
+    def test_getitem(self):
+        alignment = self.alignment
+        copy = self.copy
+        for index in (slice(None), slice(2, 5), slice(None, None, -2)):
+            self.check_same(alignment[index], copy[index])
+            self.assertIsNotNone(copy[index]._array)
+        for column in (0, 1, 77, -1):
+            self.assertEqual(alignment[:, column], copy[:, column])
+            self.assertEqual(alignment[1:6:2, column],
+                             copy[1:6:2, column])
+        self.assertEqual(alignment[3, 5], copy[3, 5])
+        self.assertEqual(str(alignment[3, 5:9].seq), str(copy[3, 5:9].seq))
+        for rows, cols in ((slice(None), slice(10, 20)),
+                           (slice(1, 5), slice(None, None, 3)),
+                           (slice(None, None, -1), slice(-10, None))):
+            sub_alignment = copy[rows, cols]
+            self.check_same(alignment[rows, cols], sub_alignment)
+            # The sub-alignment uses a view of the same letters
+            self.assertTrue(numpy.shares_memory(sub_alignment._array,
+                                                copy._array))
+        self.assertRaises(IndexError, copy.__getitem__, (slice(None), 156))
+        # The rows of sub-alignments are only sliced when needed
+        sub_alignment = copy[1:, 10:40][::2, 5:]
+        self.assertIsNotNone(sub_alignment._lazy_rows)
+        self.assertEqual(len(sub_alignment), 3)
+        self.assertEqual(sub_alignment.get_alignment_length(), 25)
+        self.assertEqual(sub_alignment[:, 0], alignment[1::2, 15])
+        self.assertIsNotNone(sub_alignment._lazy_rows)
+        self.check_same(alignment[1:, 10:40][::2, 5:], sub_alignment)
+        self.assertIsNone(sub_alignment._lazy_rows)
+        # Selecting no rows gives an empty alignment, with no columns
+        for index in (slice(7, 9), (slice(7, 9), slice(1, 4))):
+            self.check_same(alignment[index], copy[index])
+            self.assertEqual(copy[index].get_alignment_length(), 0)
+
+    def test_add(self):
+        combined = self.copy[:, :10] + self.copy[:, -10:]
+        self.check_same(self.alignment[:, :10] + self.alignment[:, -10:],
+                        combined)
+        self.assertIsNotNone(combined._array)
+
+    def test_sort(self):
+        for key, reverse in ((None, False), (None, True),
+                             (lambda r: str(r.seq), False),
+                             (lambda r: str(r.seq), True)):
+            self.alignment.sort(key, reverse)
+            self.copy.sort(key, reverse)
+            self.check_same(self.alignment, self.copy)
+
+    def test_changes(self):
+        copy = self.copy
+        record = SeqRecord(Seq("N" * 156), id="dummy")
+        copy.append(record)
+        self.assertIsNone(copy._array)
+        self.assertEqual(copy[:, 0], "TTTTTTTN")
+        self.assertEqual(copy.as_array().shape, (8, 156))
+        copy.add_sequence("dummy2", "A" * 156)
+        self.assertIsNone(copy._array)
+        self.assertEqual(copy.as_array()[-1, 0], ord("A"))
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,91 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the integer encoding of alphabets in Bio.Alphabet.Encoding."""
+
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.Alphabet.Encoding.")
+
+from Bio import Alphabet
+from Bio.Alphabet import IUPAC
+from Bio.Alphabet.Encoding import Encoding, get_encoding
+from Bio.Seq import Seq, MutableSeq, BufferSeq
+from Bio.SubsMat import SeqMat
+from Bio.SubsMat.MatrixInfo import blosum62
+
+
+class TestEncoding(unittest.TestCase):
+
+    def test_encode_decode(self):
+        encoding = Encoding("ACGT")
+        self.assertEqual(len(encoding), 4)
+        self.assertEqual(encoding.unknown, 4)
+        codes = encoding.encode("ACGTNacgt")
+        self.assertEqual(codes.dtype, numpy.uint8)
+        self.assertEqual(codes.tolist(), [0, 1, 2, 3, 4, 0, 1, 2, 3])
+        self.assertEqual(encoding.decode(codes), "ACGT?ACGT")
+        self.assertEqual(encoding.encode("").tolist(), [])
+
+    def test_mixed_case(self):
+        encoding = Encoding("Aa")
+        self.assertEqual(encoding.encode("aAB").tolist(), [1, 0, 2])
+
+    def test_bad_letters(self):
+        self.assertRaises(ValueError, Encoding, "ACGA")
+        self.assertRaises(ValueError, get_encoding,
+                          Alphabet.ThreeLetterProtein())
+        self.assertEqual(get_encoding(Alphabet.generic_dna).letters,
+                         "GATCRYWSMKHBVDN")
+
+    def test_alphabets(self):
+        self.assertEqual(get_encoding(IUPAC.unambiguous_dna).letters, "GATC")
+        self.assertEqual(get_encoding(Alphabet.generic_protein).letters,
+                         "ACDEFGHIKLMNPQRSTVWYBXZJUO")
+        alphabet = Alphabet.HasStopCodon(Alphabet.Gapped(IUPAC.protein))
+        self.assertEqual(get_encoding(alphabet).letters,
+                         "ACDEFGHIKLMNPQRSTVWY-*")
+        self.assertIs(get_encoding("ACGT"), get_encoding("ACGT"))
+
+    def test_seq_encoded(self):
+        expected = [0, 1, 2, 2, 1, 3, 1, 4]
+        seq = Seq("GATTACAN", IUPAC.unambiguous_dna)
+        self.assertEqual(seq.encoded().tolist(), expected)
+        self.assertEqual(seq.tomutable().encoded().tolist(), expected)
+        seq = MutableSeq("GATTACAN", IUPAC.unambiguous_dna)
+        self.assertEqual(seq.encoded().tolist(), expected)
+        seq = Seq("GATTACAN", Alphabet.generic_dna)
+        self.assertEqual(seq.encoded().tolist(), [0, 1, 2, 2, 1, 3, 1, 14])
+        seq = BufferSeq(b"NNGATTACANN", IUPAC.unambiguous_dna, 2, -2)
+        self.assertEqual(seq.encoded().tolist(), expected[:-1])
+
+    def test_score_array(self):
+        encoding = get_encoding(IUPAC.protein)
+        scores = encoding.score_array(blosum62)
+        self.assertEqual(scores.shape, (20, 20))
+        self.assertTrue((scores == scores.T).all())
+        codes = encoding.encode("ACW")
+        for i, a in enumerate("ACW"):
+            for j, b in enumerate("ACW"):
+                expected = blosum62.get((a, b), blosum62.get((b, a)))
+                self.assertEqual(scores[codes[i], codes[j]], expected)
+        encoding = Encoding("AC-")
+        self.assertRaises(ValueError, encoding.score_array, blosum62)
+        scores = encoding.score_array(blosum62, default=-4)
+        self.assertEqual(scores.tolist(), [[4, 0, -4], [0, 9, -4],
+                                           [-4, -4, -4]])
+
+    def test_seqmat_score_array(self):
+        matrix = SeqMat({("A", "A"): 1, ("A", "C"): -1, ("C", "C"): 2})
+        self.assertEqual(matrix.score_array().tolist(), [[1, -1], [-1, 2]])
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
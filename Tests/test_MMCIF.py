@@ -28,7 +28,10 @@ from Bio.Seq import Seq
 from Bio.Alphabet import generic_protein
 from Bio.PDB.PDBExceptions import PDBConstructionException, PDBConstructionWarning
 
-from Bio.PDB import PPBuilder, CaPPBuilder
+from Bio._py3k import StringIO
+from Bio.PDB import PPBuilder, CaPPBuilder, Selection
+from Bio.PDB.AtomTable import build_structure
+from Bio.PDB.MMCIF2Dict import MMCIF2Dict
 from Bio.PDB.MMCIFParser import MMCIFParser, FastMMCIFParser
 from Bio.PDB import PDBParser, PDBIO
 
@@ -255,6 +258,93 @@ class ParseReal(unittest.TestCase):
             0.17, 2, "Residue 1 serine occupancy correcy")
 
 
+class AtomTableTests(unittest.TestCase):
+    """Testing the _atom_site reader and selected categories."""
+
+    def test_same_as_parser(self):
+        """Compare FastMMCIFParser with MMCIFParser."""
+        for filename in ("PDB/1LCD.cif", "PDB/3JQH.cif", "PDB/4ZHL.cif"):
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', PDBConstructionWarning)
+                structure = MMCIFParser().get_structure("X", filename)
+                f_structure = FastMMCIFParser().get_structure("X", filename)
+            self.assertEqual([m.serial_num for m in structure],
+                             [m.serial_num for m in f_structure])
+            atoms = Selection.unfold_entities(structure, "A")
+            f_atoms = Selection.unfold_entities(f_structure, "A")
+            self.assertEqual(len(atoms), len(f_atoms))
+            for atom, f_atom in zip(atoms, f_atoms):
+                self.assertEqual(atom.get_full_id(), f_atom.get_full_id())
+                self.assertEqual(atom.element, f_atom.element)
+                self.assertEqual(atom.occupancy, f_atom.occupancy)
+                self.assertEqual(atom.bfactor, f_atom.bfactor)
+                self.assertTrue(numpy.array_equal(atom.coord, f_atom.coord))
+
+    def test_atom_table(self):
+        """Read the atoms of 1LCD.cif as a table."""
+        parser = FastMMCIFParser()
+        table = parser.get_atom_table("PDB/1LCD.cif")
+        self.assertEqual(len(table), 3384)
+        self.assertEqual(sorted(set(table["model_serial"])), [1, 2, 3])
+        row = table[0]
+        self.assertEqual(row["serial_number"], 1)
+        self.assertEqual(row["name"], "O5'")
+        self.assertEqual(row["resname"], "DA")
+        self.assertEqual(row["chain"], "B")
+        self.assertEqual(row["element"], "O")
+        # Reading the loop in small chunks gives the same table
+        with open("PDB/1LCD.cif") as handle:
+            chunked, anisou = parser._parse_atom_site(handle, chunk_size=7)
+        self.assertIsNone(anisou)
+        self.assertTrue((chunked == table).all())
+        structure = build_structure("X", table[table["model"] == 1])
+        self.assertEqual(len(structure), 1)
+        self.assertEqual(structure[1].serial_num, 2)
+
+    def test_errors(self):
+        """Invalid values in the _atom_site loop."""
+        text = """data_TEST
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.label_atom_id
+_atom_site.label_alt_id
+_atom_site.label_comp_id
+_atom_site.auth_asym_id
+_atom_site.auth_seq_id
+_atom_site.pdbx_PDB_ins_code
+_atom_site.Cartn_x
+_atom_site.Cartn_y
+_atom_site.Cartn_z
+_atom_site.occupancy
+_atom_site.B_iso_or_equiv
+ATOM 1 CA . GLY A 1 ? 1.000 2.000 %s 1.00 10.00
+#
+"""
+        parser = FastMMCIFParser()
+        table = parser.get_atom_table(StringIO(text % "3.000"))
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table["icode"][0], " ")
+        self.assertEqual(table["model_serial"][0], 0)
+        self.assertRaises(PDBConstructionException, parser.get_atom_table,
+                          StringIO(text % "x"))
+        self.assertRaises(PDBConstructionException, parser.get_atom_table,
+                          StringIO(text % ""))
+
+    def test_categories(self):
+        """Read only some categories with MMCIF2Dict."""
+        mmcif_dict = MMCIF2Dict("PDB/1A8O.cif")
+        categories = ("_cell", "_atom_site", "_entity_poly")
+        selected = MMCIF2Dict("PDB/1A8O.cif", categories)
+        self.assertEqual(selected["data_"], "1A8O")
+        self.assertEqual(len(selected["_atom_site.id"]), 644)
+        for key, value in mmcif_dict.items():
+            if key.split(".")[0] in categories:
+                self.assertEqual(selected[key], value)
+            elif key != "data_":
+                self.assertNotIn(key, selected)
+
+
 class CIFtoPDB(unittest.TestCase):
     """Testing conversion between formats: CIF to PDB"""
 
@@ -421,6 +421,78 @@ if sqlite3:
                               self.idx.get_spliced,
                               (3009319,), (3009900,), 1)
 
+    class TestSplicedManyGoodMAF(unittest.TestCase):
+        """Test splicing many regions at once"""
+
+        def setUp(self):
+            self.idx = MafIndex("MAF/ucsc_mm9_chr10.mafindex",
+                                "MAF/ucsc_mm9_chr10.maf", "mm9.chr10",
+                                cache_size=0)
+            self.regions = [((3014742, 3018161), (3015028, 3018644), 1),
+                            ((3009319, 3021421), (3012566, 3021536), -1),
+                            ((3012076, 3012376), (3012176, 3012476), 1),
+                            ((0, 1000), (500, 1500), 1),
+                            ((3014800,), (3015000,), -1)]
+
+        def test_same_as_get_spliced(self):
+            results = list(self.idx.get_spliced_many(self.regions))
+            self.assertEqual([index for index, alignment in results],
+                             [3, 1, 2, 0, 4])
+            for index, alignment in results:
+                expected = self.idx.get_spliced(*self.regions[index])
+                self.assertEqual(len(alignment), len(expected))
+                for record, expected_record in zip(alignment, expected):
+                    self.assertEqual(record.id, expected_record.id)
+                    self.assertEqual(str(record.seq),
+                                     str(expected_record.seq))
+
+        def test_blocks_read_once(self):
+            offsets = []
+            get_record = self.idx._get_record
+
+            def counting_get_record(offset):
+                offsets.append(offset)
+                return get_record(offset)
+
+            self.idx._get_record = counting_get_record
+            for index, alignment in self.idx.get_spliced_many(self.regions):
+                pass
+            self.assertEqual(len(offsets), 20)
+            self.assertEqual(len(offsets), len(set(offsets)))
+
+        def test_invalid_regions(self):
+            regions = self.regions + [((0,), (1000,), ".")]
+            self.assertRaises(ValueError, next,
+                              self.idx.get_spliced_many(regions))
+            regions = self.regions + [((1000,), (500,), 1)]
+            self.assertRaises(ValueError, next,
+                              self.idx.get_spliced_many(regions))
+
+    class TestRecordCache(unittest.TestCase):
+        """Test caching of the most recently parsed records"""
+
+        def test_cache(self):
+            idx = MafIndex("MAF/ucsc_mm9_chr10.mafindex",
+                           "MAF/ucsc_mm9_chr10.maf", "mm9.chr10", cache_size=2)
+            first = list(idx.search((3014742,), (3015028,)))
+            self.assertEqual(len(first), 6)
+            # Only the last two records are kept
+            offsets = list(idx._cache)
+            self.assertEqual(len(offsets), 2)
+            self.assertIs(idx._get_record(offsets[0]), first[4])
+            self.assertIs(idx._get_record(offsets[1]), first[5])
+
+        def test_no_cache(self):
+            # No cache by default
+            idx = MafIndex("MAF/ucsc_mm9_chr10.mafindex",
+                           "MAF/ucsc_mm9_chr10.maf", "mm9.chr10")
+            first = list(idx.search((3014742,), (3015028,)))
+            second = list(idx.search((3014742,), (3015028,)))
+            self.assertEqual(len(idx._cache), 0)
+            for record1, record2 in zip(first, second):
+                self.assertIsNot(record1, record2)
+                self.assertTrue(compare_record(record1[0], record2[0]))
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
     unittest.main(testRunner=runner)
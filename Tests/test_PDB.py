@@ -14,6 +14,7 @@ from __future__ import print_function
 
 from copy import deepcopy
 import os
+import pickle
 import sys
 import tempfile
 import unittest
@@ -42,6 +43,7 @@ from Bio.PDB import rotmat, Vector, refmat, calc_angle, calc_dihedral, rotaxis,
 from Bio.PDB import Residue, Atom, StructureAlignment, Superimposer, Selection
 from Bio.PDB import make_dssp_dict
 from Bio.PDB import DSSP
+from Bio.PDB.AtomTable import atom_table_dtype, build_structure
 from Bio.PDB.NACCESS import process_asa_data, process_rsa_data
 from Bio.PDB.ResidueDepth import _get_atom_radius
 
@@ -1263,6 +1265,94 @@ class TransformTests(unittest.TestCase):
                         "Want %r and %r to be almost equal" % (axis.get_array(), caxis.get_array()))
 
 
+class CoordsTests(unittest.TestCase):
+    """Test the coordinate array of structures."""
+
+    def setUp(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", PDBConstructionWarning)
+            self.s = PDBParser(PERMISSIVE=True).get_structure(
+                'X', "PDB/a_structure.pdb")
+
+    def test_get_coords(self):
+        atoms = list(self.s.get_atoms())
+        expected = numpy.array([atom.coord for atom in atoms])
+        coords = self.s.get_coords()
+        self.assertEqual(coords.shape, (756, 3))
+        self.assertTrue(numpy.allclose(coords, expected))
+        # The atoms now use views of the same array
+        self.assertIs(atoms[0].coord.base, atoms[-1].coord.base)
+        model = self.s[1]
+        self.assertTrue(numpy.allclose(model.get_coords(), expected[9:]))
+        residue = model["A"][(" ", 3, " ")]
+        self.assertTrue(numpy.allclose(residue.get_coords(),
+                                       [atom.coord for atom in residue]))
+        # A copy is returned
+        coords[:] = 0.0
+        self.assertTrue(numpy.allclose(self.s.get_coords(), expected))
+
+    def test_set_coords(self):
+        coords = self.s.get_coords() + 1.0
+        self.s.set_coords(coords)
+        atoms = list(self.s.get_atoms())
+        self.assertTrue(numpy.allclose([atom.coord for atom in atoms], coords))
+        # Changing an atom changes the array
+        atoms[5].set_coord(numpy.array((1.0, 2.0, 3.0), "f"))
+        atoms[6].transform(numpy.identity(3), numpy.array((1.0, 0.0, 0.0)))
+        coords[5] = (1.0, 2.0, 3.0)
+        coords[6, 0] += 1.0
+        self.assertTrue(numpy.allclose(self.s.get_coords(), coords))
+        chain = self.s[1]["A"]
+        chain.set_coords(numpy.zeros((615, 3)))
+        self.assertTrue(numpy.allclose(atoms[9].coord, 0.0))
+        self.assertRaises(ValueError, chain.set_coords, numpy.zeros((3, 3)))
+
+    def test_changes(self):
+        coords = self.s.get_coords()
+        residue = self.s[1]["A"][(" ", 3, " ")]
+        atom = residue["N"]
+        # Select the other location of a disordered atom
+        altlocs = atom.disordered_get_id_list()
+        altlocs.remove(atom.get_altloc())
+        atom.disordered_get(altlocs[0]).set_coord(numpy.array((9.0, 9.0, 9.0)))
+        index = list(self.s.get_atoms()).index(atom)
+        self.assertTrue(numpy.allclose(self.s.get_coords(), coords))
+        atom.disordered_select(altlocs[0])
+        self.assertTrue(numpy.allclose(self.s.get_coords()[index], 9.0))
+        residue.detach_child("CA")
+        self.assertEqual(self.s.get_coords().shape, (755, 3))
+        new_atom = Atom.Atom("X", numpy.array((1.0, 2.0, 3.0)), 0.0, 1.0,
+                             " ", " X  ", 0, "C")
+        residue.add(new_atom)
+        coords = self.s.get_coords()
+        self.assertEqual(coords.shape, (756, 3))
+        index = list(self.s.get_atoms()).index(new_atom)
+        self.assertTrue(numpy.allclose(coords[index], (1.0, 2.0, 3.0)))
+
+    def test_copies(self):
+        coords = self.s.get_coords()
+        for other in (self.s.copy(), deepcopy(self.s)):
+            other.set_coords(coords + 5.0)
+            self.assertTrue(numpy.allclose(self.s.get_coords(), coords))
+            self.assertTrue(numpy.allclose(other.get_coords(), coords + 5.0))
+            self.assertTrue(numpy.allclose(
+                [atom.coord for atom in other.get_atoms()], coords + 5.0))
+        atom = next(self.s.get_atoms()).copy()
+        atom.set_coord(numpy.array((1.0, 2.0, 3.0)))
+        self.assertTrue(numpy.allclose(self.s.get_coords(), coords))
+
+    def test_transform(self):
+        coords = self.s.get_coords()
+        rotation = rotmat(Vector(1, 3, 5), Vector(1, 0, 0))
+        translation = numpy.array((2.4, 0, 1), 'f')
+        self.s[1].transform(rotation, translation)
+        expected = coords.copy()
+        expected[9:] = numpy.dot(coords[9:], rotation) + translation
+        self.assertTrue(numpy.allclose(self.s.get_coords(), expected))
+        self.assertTrue(numpy.allclose(
+            [atom.coord for atom in self.s.get_atoms()], expected))
+
+
 class StructureAlignTests(unittest.TestCase):
 
     def test_StructAlign(self):
@@ -1368,7 +1458,11 @@ class SuperimposerTests(unittest.TestCase):
                      'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O',
                      'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O', 'O',
                      'O', 'O', 'O', 'O', 'O', 'O']
+        s3 = s2.copy()
         sup.apply(moving)
+        # Moving a whole structure at once gives the same coordinates
+        sup.apply(s3)
+        self.assertTrue(numpy.allclose(s3.get_coords(), s2.get_coords()))
         atom_moved = []
         for aa in moving:
             atom_moved.append(aa.element)
@@ -1400,6 +1494,149 @@ class CopyTests(unittest.TestCase):
             self.assertFalse(e.get_list()[0] is ee.get_list()[0])
 
 
+class SlotsTests(unittest.TestCase):
+    """Test the compact memory layout of atoms and residues."""
+
+    def setUp(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", PDBConstructionWarning)
+            self.s = PDBParser(PERMISSIVE=True).get_structure(
+                'X', "PDB/a_structure.pdb")
+
+    def test_atom(self):
+        atoms = list(self.s[1].get_atoms())
+        atom = atoms[0]
+        self.assertFalse(hasattr(atom, "__dict__"))
+        self.assertFalse(hasattr(atom.get_parent(), "__dict__"))
+        self.assertEqual(atom.get_level(), "A")
+        self.assertEqual(atom.get_parent().get_level(), "R")
+        self.assertEqual(atom.full_id, atom.get_full_id())
+        self.assertIsNone(atom.copy().full_id)
+        self.assertIsNone(atom._xtra)
+        atom.xtra["test"] = 1
+        self.assertEqual(atom.copy().xtra, {"test": 1})
+        # Atom names and elements are shared
+        names = [a.get_name() for a in atoms if a.get_name() == "CA"]
+        self.assertTrue(len(names) > 1)
+        self.assertTrue(all(name is names[0] for name in names))
+        elements = [a.element for a in atoms if a.element == "C"]
+        self.assertTrue(all(element is elements[0] for element in elements))
+
+    def test_pickle(self):
+        atom = next(self.s.get_atoms())
+        atom.xtra["test"] = 1
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            other = pickle.loads(pickle.dumps(self.s, protocol))
+            self.assertEqual(other.header, self.s.header)
+            other_atoms = list(other.get_atoms())
+            self.assertEqual(len(other_atoms), 756)
+            self.assertEqual(other_atoms[0].xtra, {"test": 1})
+            self.assertEqual(other_atoms[0].get_full_id(),
+                             atom.get_full_id())
+            self.assertTrue(numpy.allclose(other.get_coords(),
+                                           self.s.get_coords()))
+
+
+class AtomTableTests(unittest.TestCase):
+    """Test parsing PDB files into atom tables."""
+
+    def check_same(self, structure1, structure2):
+        self.assertEqual([m.serial_num for m in structure1],
+                         [m.serial_num for m in structure2])
+        residues1 = list(structure1.get_residues())
+        residues2 = list(structure2.get_residues())
+        self.assertEqual([(r.get_full_id(), r.resname, r.segid)
+                          for r in residues1],
+                         [(r.get_full_id(), r.resname, r.segid)
+                          for r in residues2])
+        atoms1 = Selection.unfold_entities(residues1, "A")
+        atoms2 = Selection.unfold_entities(residues2, "A")
+        self.assertEqual(len(atoms1), len(atoms2))
+        for atom1, atom2 in zip(atoms1, atoms2):
+            self.assertEqual(atom1.get_full_id(), atom2.get_full_id())
+            self.assertEqual(atom1.fullname, atom2.fullname)
+            self.assertEqual(atom1.serial_number, atom2.serial_number)
+            self.assertEqual(atom1.element, atom2.element)
+            self.assertEqual(atom1.occupancy, atom2.occupancy)
+            self.assertEqual(atom1.bfactor, atom2.bfactor)
+            self.assertTrue(numpy.array_equal(atom1.coord, atom2.coord))
+
+    def test_same_as_structure(self):
+        for filename in ("PDB/a_structure.pdb", "PDB/1LCD.pdb",
+                         "PDB/1A8O.pdb", "PDB/occupancy.pdb"):
+            parser = PDBParser(QUIET=True)
+            structure = parser.get_structure("X", filename)
+            table = parser.get_atom_table(filename)
+            self.assertEqual(table.dtype, atom_table_dtype)
+            self.check_same(structure, build_structure("X", table))
+
+    def test_columns(self):
+        table = PDBParser(QUIET=True).get_atom_table("PDB/a_structure.pdb")
+        # Including all the alternative locations of disordered atoms
+        self.assertEqual(len(table), 821)
+        self.assertEqual(sorted(set(table["model"])), [0, 1])
+        row = table[0]
+        self.assertEqual(row["model_serial"], 0)
+        self.assertEqual(row["hetero"], "H")
+        self.assertEqual(row["serial_number"], 1)
+        self.assertEqual(row["name"], "N")
+        self.assertEqual(row["fullname"], " N  ")
+        self.assertEqual(row["resname"], "PCA")
+        self.assertEqual(row["chain"], "A")
+        self.assertEqual(row["resseq"], 1)
+        self.assertEqual(row["segid"], "A")
+        self.assertEqual(row["element"], "")
+        self.assertTrue(numpy.allclose(row["coord"], (0.525, 2.69, 13.317)))
+        self.assertEqual(row["occupancy"], 1.0)
+        self.assertEqual(row["bfactor"], 20.26)
+        self.assertEqual(set(table["hetero"]), set(" HW"))
+        waters = table[table["hetero"] == "W"]
+        self.assertTrue(len(waters) > 0)
+        self.assertEqual(set(waters["resname"]), set(["HOH"]))
+
+    def test_errors(self):
+        atom = "ATOM      1  CA  GLY A   1       1.000   2.000   3.000" \
+            "%s%s           C\n"
+        parser = PDBParser(PERMISSIVE=True)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always", PDBConstructionWarning)
+            table = parser.get_atom_table(
+                StringIO(atom % ("  1.00", " BAD  ")))
+        self.assertEqual(len(w), 1)
+        self.assertIn("Invalid or missing B factor at line 1",
+                      str(w[0].message))
+        self.assertEqual(table["bfactor"][0], 0.0)
+        table = PDBParser(QUIET=True).get_atom_table(
+            StringIO(atom % ("      ", "  1.00")))
+        self.assertTrue(numpy.isnan(table["occupancy"][0]))
+        first_atom = next(build_structure("X", table).get_atoms())
+        self.assertIsNone(first_atom.occupancy)
+        parser = PDBParser(PERMISSIVE=False)
+        self.assertRaises(PDBConstructionException, parser.get_atom_table,
+                          StringIO(atom % ("      ", "  1.00")))
+        bad_coord = atom.replace("2.000", "2.0x0")
+        self.assertRaises(PDBConstructionException, parser.get_atom_table,
+                          StringIO(bad_coord % ("  1.00", "  1.00")))
+        # Residue numbers must be integers, as in get_structure
+        bad_resseq = atom.replace("A   1", "A 1.5")
+        self.assertRaises(PDBConstructionException, parser.get_atom_table,
+                          StringIO(bad_resseq % ("  1.00", "  1.00")))
+
+    def test_selection(self):
+        table = PDBParser(QUIET=True).get_atom_table("PDB/1LCD.pdb")
+        ca_table = table[table["name"] == "CA"]
+        structure = build_structure("X", ca_table)
+        self.assertEqual(len(structure), 3)
+        atoms = list(structure.get_atoms())
+        self.assertEqual(len(atoms), len(ca_table))
+        self.assertTrue(all(atom.get_id() == "CA" for atom in atoms))
+        self.assertTrue(numpy.allclose(structure.get_coords(),
+                                       ca_table["coord"]))
+        empty = PDBParser().get_atom_table(StringIO("HEADER\nEND\n"))
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(len(build_structure("X", empty)), 0)
+
+
 def eprint(*args, **kwargs):
     """Helper function that prints to stderr."""
     print(*args, file=sys.stderr, **kwargs)
@@ -0,0 +1,96 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for parsing many structure files with Bio.PDB.parse_many."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    import numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.PDB.")
+
+from Bio.PDB import parse_many, FastMMCIFParser
+
+
+def summarize(structure):
+    """Return the structure id, number of models and atoms."""
+    return (structure.id, len(structure),
+            len(list(structure.get_atoms())))
+
+
+def count_rows(table):
+    """Return the number of atoms in an atom table."""
+    return len(table)
+
+
+class ParseManyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        subdirectory = os.path.join(self.directory, "a8")
+        os.mkdir(subdirectory)
+        shutil.copy("PDB/1LCD.pdb", self.directory)
+        with open("PDB/1A8O.pdb", "rb") as handle:
+            data = handle.read()
+        with gzip.open(os.path.join(subdirectory, "pdb1a8o.ent.gz"),
+                       "wb") as handle:
+            handle.write(data)
+        shutil.copy("PDB/1A8O.cif", subdirectory)
+        with open(os.path.join(self.directory, "notes.txt"), "w") as handle:
+            handle.write("Not a structure\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_directory(self):
+        for processes in (1, 2):
+            results = list(parse_many(self.directory, extract=summarize,
+                                      processes=processes))
+            self.assertEqual(results, [
+                (os.path.join(self.directory, "1LCD.pdb"), ("1LCD", 3, 3384)),
+                (os.path.join(self.directory, "a8", "1A8O.cif"),
+                 ("1A8O", 1, 644)),
+                (os.path.join(self.directory, "a8", "pdb1a8o.ent.gz"),
+                 ("1a8o", 1, 644))])
+
+    def test_atom_table(self):
+        paths = [os.path.join(self.directory, "a8", "pdb1a8o.ent.gz"),
+                 "PDB/1A8O.cif"]
+        results = dict(parse_many(paths, atom_table=True, processes=2))
+        table = results[paths[0]]
+        self.assertEqual(len(table), 644)
+        self.assertTrue(numpy.allclose(table["coord"],
+                                       results[paths[1]]["coord"]))
+        results = list(parse_many(paths[1:], parser=FastMMCIFParser(),
+                                  extract=count_rows, atom_table=True))
+        self.assertEqual(results, [(paths[1], 644)])
+
+    def test_errors(self):
+        paths = ["PDB/1A8O.pdb", "PDB/missing.pdb"]
+        self.assertRaises(ValueError, parse_many, paths, processes=0)
+        # Whole structures are not sent back from worker processes
+        self.assertRaises(ValueError, parse_many, paths, processes=2)
+        for processes in (1, 2):
+            results = parse_many(paths, extract=summarize,
+                                 processes=processes)
+            self.assertEqual(next(results), (paths[0], ("1A8O", 1, 644)))
+            self.assertRaises(IOError, next, results)
+            results = list(parse_many(paths, extract=summarize,
+                                      processes=processes,
+                                      return_exceptions=True))
+            self.assertEqual(results[0], (paths[0], ("1A8O", 1, 644)))
+            self.assertEqual(results[1][0], paths[1])
+            self.assertIsInstance(results[1][1], IOError)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -7,7 +7,7 @@
 
 import unittest
 
-from search_tests_common import CheckRaw, CheckIndex
+from search_tests_common import CheckRaw, CheckIndex, sqlite3
 
 
 class BlastXmlRawCases(CheckRaw):
@@ -761,6 +761,27 @@ class BlastXmlIndexCases(CheckIndex):
         filename = 'Blast/xml_2226_tblastn_004.xml'
         self.check_index(filename, self.fmt)
 
+    def test_blastxml_index_db_processes(self):
+        """Test blast-xml index_db of several files using worker processes"""
+        if sqlite3 is None:
+            self.skipTest("Python was compiled without sqlite3")
+        from Bio import SearchIO
+        filenames = ['Blast/xml_2226_blastp_004.xml', 'Blast/mirna.xml',
+                     'Blast/wnts.xml', 'Blast/xml_2226_blastn_004.xml']
+        done = []
+        serial = SearchIO.index_db(':memory:', filenames, self.fmt)
+        parallel = SearchIO.index_db(':memory:', filenames, self.fmt,
+                                     processes=2, batch_size=3,
+                                     progress=lambda *args: done.append(args))
+        self.assertEqual(sorted(serial), sorted(parallel))
+        self.assertEqual([(1, 4), (2, 4), (3, 4), (4, 4)],
+                         [args[:2] for args in done])
+        self.assertEqual(len(serial), done[-1][2])
+        for key in serial:
+            self.assertEqual(serial.get_raw(key), parallel.get_raw(key))
+        serial.close()
+        parallel.close()
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
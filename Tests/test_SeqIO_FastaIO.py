@@ -7,10 +7,17 @@
 from __future__ import print_function
 
 import unittest
+from io import BytesIO
 from Bio._py3k import StringIO
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from Bio import SeqIO
-from Bio.SeqIO.FastaIO import FastaIterator
+from Bio.SeqIO.FastaIO import FastaIterator, SimpleFastaParser
+from Bio.SeqIO.FastaIO import FastaBlockIterator
 from Bio.Alphabet import generic_nucleotide, generic_dna
 
 
@@ -118,6 +125,60 @@ class TitleFunctions(unittest.TestCase):
         self.assertEqual("", record.description)
 
 
+class BlockTests(unittest.TestCase):
+    """Test parsing FASTA files in blocks."""
+
+    def setUp(self):
+        if numpy is None:
+            self.skipTest("NumPy not installed")
+
+    def check_blocks(self, data, batch_size, chunk_size):
+        expected = list(SimpleFastaParser(StringIO(data.decode())))
+        blocks = list(FastaBlockIterator(BytesIO(data), batch_size,
+                                         chunk_size))
+        for block in blocks[:-1]:
+            self.assertEqual(batch_size, len(block))
+        if blocks:
+            self.assertTrue(0 < len(blocks[-1]) <= batch_size)
+        records = [(title.decode(), seq.decode()) for block in blocks
+                   for title, seq in block]
+        self.assertEqual(expected, records)
+        lengths = [len(seq) for title, seq in expected]
+        self.assertEqual(lengths, [n for block in blocks
+                                   for n in block.seq_lengths().tolist()])
+
+    def test_files(self):
+        for filename in single_nucleic_files + multi_dna_files + \
+                single_amino_files + multi_amino_files + ["Fasta/dups.fasta"]:
+            with open(filename, "rb") as handle:
+                data = handle.read()
+            for batch_size in (1, 2, 7, 10000):
+                for chunk_size in (1, 5, 64, 4194304):
+                    self.check_blocks(data, batch_size, chunk_size)
+                    self.check_blocks(data.replace(b"\n", b"\r\n"),
+                                      batch_size, chunk_size)
+
+    def test_example(self):
+        with open("Fasta/dups.fasta", "rb") as handle:
+            blocks = [[seq.decode() for seq in block.sequences()] for block
+                      in FastaBlockIterator(handle, batch_size=3)]
+        self.assertEqual([["ACGTA", "CGTC", "CCGCC"], ["ACGTA", "CGCGC"]],
+                         blocks)
+
+    def test_odd_files(self):
+        for data in [b"", b"\n\n", b"Header\nlines\n>a\nAC\nGT\n>b\n>c",
+                     b">\nACGT", b">x y \nAC GT\n\n>z\n\n",
+                     b"no records here"]:
+            for chunk_size in (1, 3, 100):
+                self.check_blocks(data, 2, chunk_size)
+
+    def test_text_mode(self):
+        self.assertRaises(ValueError, list,
+                          FastaBlockIterator(StringIO(">a\nACGT\n")))
+        self.assertRaises(ValueError, list,
+                          FastaBlockIterator(BytesIO(b">a\nACGT\n"), 0))
+
+
 single_nucleic_files = ['Fasta/lupine.nu', 'Fasta/elderberry.nu',
                         'Fasta/phlox.nu', 'Fasta/centaurea.nu',
                         'Fasta/wisteria.nu', 'Fasta/sweetpea.nu',
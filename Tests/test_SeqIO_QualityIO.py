@@ -24,6 +24,11 @@ from Bio.Seq import Seq, UnknownSeq, MutableSeq
 from Bio.SeqRecord import SeqRecord
 from Bio.Data.IUPACData import ambiguous_dna_letters, ambiguous_rna_letters
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 BINARY_FORMATS = ["sff", "sff-trim"]
 
 
@@ -167,9 +172,19 @@ class TestFastqErrors(unittest.TestCase):
         self.assertEqual(count, record_count)
         handle.close()
 
+    def check_raw_fails(self, filename, good_count):
+        if numpy is None:
+            return
+        with open(filename, "rb") as handle:
+            tuples = QualityIO.FastqRawIterator(handle)
+            for i in range(good_count):
+                title, seq, qual = next(tuples)  # Make sure no errors!
+            self.assertRaises(ValueError, next, tuples)
+
     def check_all_fail(self, filename, count):
         self.check_fails(filename, count)
         self.check_general_fails(filename, count)
+        self.check_raw_fails(filename, count)
 
     def check_qual_char(self, filename, good_count, count):
         self.check_fails(filename, good_count)
@@ -221,6 +236,191 @@ for base_name, good_count, full_count in tests:
     del funct
 
 
+class TestFastqRaw(unittest.TestCase):
+    """Test the NumPy based FASTQ parser and quality functions."""
+
+    def setUp(self):
+        if numpy is None:
+            self.skipTest("NumPy not installed")
+
+    def check_raw(self, filename, format="fastq", offset=33):
+        with open(filename, "rb") as handle:
+            raw = list(QualityIO.FastqRawIterator(handle, offset))
+        records = list(SeqIO.parse(filename, format))
+        self.assertEqual(len(records), len(raw))
+        for record, (title, seq, qual) in zip(records, raw):
+            self.assertEqual(record.description, title.decode())
+            self.assertEqual(str(record.seq), seq.decode())
+            self.assertEqual(numpy.uint8, qual.dtype)
+            if format == "fastq-solexa":
+                self.assertEqual(record.letter_annotations["solexa_quality"],
+                                 (qual.astype(int) - 64).tolist())
+            else:
+                self.assertEqual(record.letter_annotations["phred_quality"],
+                                 qual.tolist())
+        return raw
+
+    def test_sanger(self):
+        for name in ["example", "example_dos", "tricky", "zero_length",
+                     "sanger_93", "wrapping_original_sanger",
+                     "sanger_full_range_original_sanger"]:
+            self.check_raw("Quality/%s.fastq" % name)
+
+    def test_illumina(self):
+        self.check_raw("Quality/illumina_full_range_original_illumina.fastq",
+                       "fastq-illumina", 64)
+        self.assertRaises(ValueError, self.check_raw,
+                          "Quality/sanger_full_range_original_sanger.fastq",
+                          "fastq-illumina", 64)
+
+    def test_example(self):
+        with open("Quality/example.fastq", "rb") as handle:
+            reads = [(title.decode(), len(seq), qual.min())
+                     for title, seq, qual
+                     in QualityIO.FastqRawIterator(handle)]
+        self.assertEqual([("EAS54_6_R1_2_1_413_324", 25, 18),
+                          ("EAS54_6_R1_2_1_540_792", 25, 12),
+                          ("EAS54_6_R1_2_1_443_348", 25, 13)], reads)
+
+    def test_solexa(self):
+        filename = "Quality/solexa_full_range_original_solexa.fastq"
+        raw = self.check_raw(filename, "fastq-solexa", 0)
+        solexa = raw[0][2].astype(int) - 64
+        phred = QualityIO.phred_quality_array_from_solexa(solexa)
+        self.assertTrue(numpy.allclose(
+            [QualityIO.phred_quality_from_solexa(q) for q in solexa.tolist()],
+            phred))
+
+    def test_text_mode(self):
+        with open("Quality/example.fastq") as handle:
+            self.assertRaises(ValueError, next,
+                              QualityIO.FastqRawIterator(handle))
+
+    def test_conversions(self):
+        phred = numpy.arange(0, 94)
+        self.assertTrue(numpy.allclose(
+            [QualityIO.solexa_quality_from_phred(q) for q in range(0, 94)],
+            QualityIO.solexa_quality_array_from_phred(phred)))
+        solexa = numpy.arange(-5, 63)
+        self.assertTrue(numpy.allclose(
+            [QualityIO.phred_quality_from_solexa(q) for q in range(-5, 63)],
+            QualityIO.phred_quality_array_from_solexa(solexa)))
+        self.assertRaises(ValueError,
+                          QualityIO.solexa_quality_array_from_phred, [5, -1])
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always", BiopythonWarning)
+            QualityIO.phred_quality_array_from_solexa([-6])
+            self.assertEqual(1, len(w))
+        # The examples from the docstrings
+        self.assertEqual([-5, -5, -2.33, 9.54, 40],
+                         QualityIO.solexa_quality_array_from_phred(
+                             [0, 1, 2, 10, 40]).round(2).tolist())
+        self.assertEqual([1.19, 2.12, 3.01, 10.41, 40],
+                         QualityIO.phred_quality_array_from_solexa(
+                             [-5, -2, 0, 10, 40]).round(2).tolist())
+
+    def test_batch_functions(self):
+        with open("Quality/tricky.fastq", "rb") as handle:
+            quals = [qual for title, seq, qual
+                     in QualityIO.FastqRawIterator(handle)]
+        quals.insert(2, numpy.zeros(0, numpy.uint8))
+        quals.append(numpy.array([1, 2, 3], numpy.uint8))
+        means = QualityIO.mean_qualities(quals)
+        trims = QualityIO.quality_trim_lengths(quals, 30)
+        self.assertEqual(len(quals), len(means))
+        for q, mean, trim in zip(quals, means, trims):
+            if len(q):
+                self.assertAlmostEqual(sum(q.tolist()) / float(len(q)), mean)
+            else:
+                self.assertTrue(numpy.isnan(mean))
+            good = [i + 1 for i, v in enumerate(q.tolist()) if v >= 30]
+            self.assertEqual(max(good + [0]), trim)
+        empty = numpy.zeros(0, numpy.uint8)
+        self.assertEqual([0, 0], QualityIO.quality_trim_lengths(
+            [empty, empty]).tolist())
+        # Fixed length reads can be given as a 2D array
+        block = numpy.array([[40, 40, 2], [40, 2, 40]])
+        self.assertEqual([2, 3],
+                         QualityIO.quality_trim_lengths(block).tolist())
+        self.assertEqual(0, len(QualityIO.mean_qualities([])))
+        # The examples from the docstrings
+        self.assertEqual([35, 10], QualityIO.mean_qualities(
+            [numpy.array([30, 40]), numpy.array([10])]).tolist())
+        reads = [numpy.array([30, 40, 5, 31, 2, 3]), numpy.array([2, 3])]
+        self.assertEqual([4, 0],
+                         QualityIO.quality_trim_lengths(reads, 20).tolist())
+
+    def check_blocks(self, data, batch_size, chunk_size):
+        expected = list(QualityIO.FastqGeneralIterator(
+            StringIO(data.decode("latin1"))))
+        blocks = list(QualityIO.FastqBlockIterator(BytesIO(data), batch_size,
+                                                   chunk_size))
+        for block in blocks[:-1]:
+            self.assertEqual(batch_size, len(block))
+        records = [tuple(x.decode("latin1") for x in values)
+                   for block in blocks for values in block]
+        self.assertEqual(expected, records)
+        quals = [q for block in blocks for q in block.qualities()]
+        self.assertEqual([[ord(c) - 33 for c in qual]
+                          for title, seq, qual in expected],
+                         [q.tolist() for q in quals])
+
+    def test_blocks(self):
+        for name in ["example", "example_dos", "zero_length", "sanger_93",
+                     "sanger_full_range_original_sanger",
+                     "misc_dna_original_sanger"]:
+            with open("Quality/%s.fastq" % name, "rb") as handle:
+                data = handle.read()
+            for batch_size in (1, 3, 10000):
+                for chunk_size in (1, 7, 100, 4194304):
+                    self.check_blocks(data, batch_size, chunk_size)
+        for data in [b"", b"\n", b"junk\n@a\nAC\n+a\n!!\n\n",
+                     b"@a\nAC\n+\n!!\n@b\n\n+\n\n@c\nG\n+\n@"]:
+            for chunk_size in (1, 3, 100):
+                self.check_blocks(data, 2, chunk_size)
+
+    def test_block_example(self):
+        with open("Quality/example.fastq", "rb") as handle:
+            blocks = [(block.seq_lengths().tolist(),
+                       QualityIO.mean_qualities(block.qualities()))
+                      for block in QualityIO.FastqBlockIterator(handle, 2)]
+        self.assertEqual([[25, 25], [25]], [b[0] for b in blocks])
+        self.assertEqual([[25.3, 24.5], [23.4]],
+                         [b[1].round(1).tolist() for b in blocks])
+
+    def test_block_errors(self):
+        # Errors are found when the chunk with the bad record is parsed,
+        # which may be before the earlier records are returned
+        for name in ["diff_ids", "no_qual", "long_qual", "short_qual",
+                     "double_seq", "double_qual", "tabs", "spaces",
+                     "trunc_in_title",
+                     "trunc_in_seq", "trunc_in_plus", "trunc_in_qual",
+                     "trunc_at_seq", "trunc_at_plus", "trunc_at_qual"]:
+            for chunk_size in (5, 4194304):
+                with open("Quality/error_%s.fastq" % name, "rb") as handle:
+                    self.assertRaises(ValueError, list,
+                                      QualityIO.FastqBlockIterator(
+                                          handle, 1, chunk_size))
+        with open("Quality/wrapping_original_sanger.fastq", "rb") as handle:
+            self.assertRaises(ValueError, list,
+                              QualityIO.FastqBlockIterator(handle))
+        with open("Quality/example.fastq") as handle:
+            self.assertRaises(ValueError, list,
+                              QualityIO.FastqBlockIterator(handle))
+        # Scores below the offset are an error, as in FastqRawIterator
+        data = b"@a\nACG\n+\nIII\n@b\nAC\n+\nI5\n@c\nA\n+\nI\n"
+        block = next(QualityIO.FastqBlockIterator(BytesIO(data)))
+        self.assertEqual([[40, 40, 40], [40, 20], [40]],
+                         [q.tolist() for q in block.qualities()])
+        self.assertEqual([[73, 73, 73], [73, 53], [73]],
+                         [q.tolist() for q in block.qualities(0)])
+        # The second record has a score below zero using offset 64
+        with self.assertRaises(ValueError) as cm:
+            block.qualities(64)
+        self.assertIn("using offset 64 in record %r" % b"b",
+                      str(cm.exception))
+
+
 class TestReferenceSffConversions(unittest.TestCase):
     def check(self, sff_name, sff_format, out_name, format):
         wanted = list(SeqIO.parse(out_name, format))
@@ -32,6 +32,8 @@ except NameError:
 
 from Bio.SeqRecord import SeqRecord
 from Bio import SeqIO
+from Bio import bgzf
+from Bio.SeqIO import FastaIO
 from Bio.SeqIO._index import _FormatToRandomAccess
 from Bio.Alphabet import generic_protein, generic_nucleotide, generic_dna
 
@@ -466,6 +468,11 @@ class IndexDictTests(unittest.TestCase):
             pass
         self.assertEqual(rec_dict.get(chr(0)), None)
         self.assertEqual(rec_dict.get(chr(0), chr(1)), chr(1))
+        # Bulk access should give records in file order, without repeats
+        many = list(rec_dict.get_many(list(reversed(keys)) + keys[:2]))
+        self.assertEqual(keys, [key for key, rec in many])
+        self.assertEqual(ids, [rec.id for key, rec in many])
+        self.assertRaises(KeyError, list, rec_dict.get_many(keys + [chr(0)]))
         if hasattr(dict, "iteritems"):
             # Python 2.x
             for key, rec in rec_dict.items():
@@ -589,6 +596,48 @@ class IndexDictTests(unittest.TestCase):
             self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
                               ["Fasta/dups.fasta"], "fasta")
 
+        def test_index_db_small_batches(self):
+            """Index several files with index_db() in small batches"""
+            from Bio.File import _SQLiteManySeqFilesDict
+            filenames = ["Roche/E3MFGYR02_no_manifest.sff", "Roche/greek.sff",
+                         "Roche/paired.sff"]
+            ids = [rec.id for f in filenames for rec in SeqIO.parse(f, "sff")]
+
+            def proxy_factory(format, filename=None):
+                if filename:
+                    return _FormatToRandomAccess[format](filename, format,
+                                                         None)
+                return format in _FormatToRandomAccess
+
+            rec_dict = _SQLiteManySeqFilesDict(":memory:", filenames,
+                                               proxy_factory, "sff", None,
+                                               "", max_open=2, batch_size=7)
+            self.assertEqual(54, len(rec_dict))
+            many = list(rec_dict.get_many(sorted(ids)))
+            self.assertEqual(ids, [key for key, rec in many])
+            self.assertEqual(ids, [rec.id for key, rec in many])
+            rec_dict.close()
+            rec_dict = SeqIO.index_db(":memory:", filenames, "sff",
+                                      batch_size=7)
+            self.assertEqual(7, rec_dict._batch_size)
+            self.assertEqual(ids, [key for key, rec
+                                   in rec_dict.get_many(sorted(ids))])
+            rec_dict.close()
+
+        def test_index_db_processes(self):
+            """Index several files with index_db() using worker processes"""
+            filenames = ["Roche/E3MFGYR02_no_manifest.sff", "Roche/greek.sff",
+                         "Roche/paired.sff"]
+            ids = [rec.id for f in filenames for rec in SeqIO.parse(f, "sff")]
+            done = []
+            rec_dict = SeqIO.index_db(":memory:", filenames, "sff",
+                                      key_function=add_prefix, processes=2,
+                                      progress=lambda *args: done.append(args))
+            self.assertEqual([(1, 3, 10), (2, 3, 34), (3, 3, 54)], done)
+            keys = [add_prefix(i) for i in ids]
+            self.check_dict_methods(rec_dict, keys, ids)
+            rec_dict.close()
+
     def test_duplicates_index(self):
         """Index file with duplicate identifers with Bio.SeqIO.index()"""
         self.assertRaises(ValueError, SeqIO.index, "Fasta/dups.fasta", "fasta")
@@ -601,6 +650,224 @@ class IndexDictTests(unittest.TestCase):
         handle.close()
 
 
+class LazyFastaIndexTests(unittest.TestCase):
+    """Tests for Bio.SeqIO.index(..., lazy=True) with FASTA files."""
+    filenames = ["GenBank/NC_005816.fna", "GenBank/NC_005816.faa",
+                 "GenBank/NC_000932.faa", "SwissProt/multi_ex.fasta",
+                 "Fasta/fa01", "Quality/example.fasta"]
+
+    def setUp(self):
+        os.chdir(CUR_DIR)
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.chdir(CUR_DIR)
+        for name in os.listdir(self.tmp_dir):
+            os.remove(os.path.join(self.tmp_dir, name))
+        os.rmdir(self.tmp_dir)
+
+    def compare_lazy(self, filename, original=None):
+        expected = SeqIO.to_dict(SeqIO.parse(original or filename, "fasta"))
+        rec_dict = SeqIO.index(filename, "fasta", lazy=True)
+        self.assertEqual(sorted(expected), sorted(rec_dict))
+        for key, record in expected.items():
+            lazy = rec_dict[key]
+            self.assertIsInstance(lazy.seq, FastaIO.IndexedFastaSeq)
+            self.assertEqual(record.description, lazy.description)
+            self.assertEqual(str(record.seq), str(lazy.seq))
+            self.assertEqual(str(record.seq[7:-3]), str(lazy.seq[7:-3]))
+            self.assertEqual(str(record.seq[5:30][2:9]),
+                             str(lazy.seq[5:30][2:9]))
+            self.assertEqual(str(record.seq[::-3]), str(lazy.seq[::-3]))
+            if len(record):
+                self.assertEqual(record.seq[-1], lazy.seq[-1])
+            self.assertEqual(record.seq.find("AC"), lazy.seq.find("AC"))
+        rec_dict.close()
+
+    def test_lazy(self):
+        for filename in self.filenames:
+            self.compare_lazy(filename)
+
+    def test_lazy_with_fai(self):
+        for filename in self.filenames:
+            tmp = os.path.join(self.tmp_dir, os.path.basename(filename))
+            with open(filename, "rb") as in_handle:
+                data = in_handle.read()
+            with open(tmp, "wb") as out_handle:
+                out_handle.write(data)
+            with open(tmp, "rb") as in_handle:
+                entries = list(FastaIO.fai_entries(in_handle))
+            with open(tmp + ".fai", "w") as out_handle:
+                self.assertEqual(len(entries),
+                                 FastaIO.write_fai(entries, out_handle))
+            with open(tmp + ".fai") as in_handle:
+                self.assertEqual(entries,
+                                 list(FastaIO.SimpleFaiParser(in_handle)))
+            self.compare_lazy(tmp, filename)
+
+    def test_lazy_get_raw(self):
+        rec_dict = SeqIO.index("GenBank/NC_005816.faa", "fasta", lazy=True)
+        for record in SeqIO.parse("GenBank/NC_005816.faa", "fasta"):
+            raw = rec_dict.get_raw(record.id)
+            self.assertTrue(raw.startswith(b">" + record.id.encode()))
+            self.assertEqual(str(record.seq),
+                             str(SeqIO.read(StringIO(_bytes_to_string(raw)),
+                                            "fasta").seq))
+        rec_dict.close()
+
+    def test_lazy_bgzf(self):
+        filename = "GenBank/NC_000932.faa"
+        tmp = os.path.join(self.tmp_dir, "NC_000932.faa.bgz")
+        with open(filename, "rb") as in_handle:
+            data = in_handle.read()
+        # Use a few copies with new names to get more than one BGZF block
+        handle = bgzf.BgzfWriter(tmp, "wb")
+        for i in range(5):
+            handle.write(data.replace(b">gi|", (">%i|" % i).encode()))
+        handle.close()
+        expected = {}
+        for i in range(5):
+            for record in SeqIO.parse(filename, "fasta"):
+                record.id = record.id.replace("gi|", "%i|" % i)
+                expected[record.id] = record
+        for use_gzi in (False, True):
+            if use_gzi:
+                with open(tmp, "rb") as in_handle:
+                    blocks = [(start, data_start) for start, raw_length,
+                              data_start, data_length
+                              in bgzf.BgzfBlocks(in_handle)]
+                self.assertTrue(len(blocks) > 2)
+                with open(tmp + ".gzi", "wb") as out_handle:
+                    bgzf.write_gzi(out_handle, blocks)
+            rec_dict = SeqIO.index(tmp, "fasta", lazy=True)
+            self.assertEqual(len(expected), len(rec_dict))
+            for key, record in expected.items():
+                lazy = rec_dict[key]
+                self.assertEqual(str(record.seq), str(lazy.seq))
+                self.assertEqual(str(record.seq[20:-5]), str(lazy.seq[20:-5]))
+                self.assertTrue(
+                    rec_dict.get_raw(key).startswith(b">" + key.encode()))
+            rec_dict.close()
+
+    def test_lazy_title_with_gt(self):
+        tmp = os.path.join(self.tmp_dir, "titles.fasta")
+        with open(tmp, "w") as handle:
+            handle.write(">seq1 5'->3' strand\nACGT\nAC\n"
+                         ">seq2 a>b\r\nGGCC\r\n>seq3 >\n")
+        self.compare_lazy(tmp)
+        rec_dict = SeqIO.index(tmp, "fasta", lazy=True)
+        self.assertEqual(b">seq1 5'->3' strand\nACGT\nAC\n",
+                         rec_dict.get_raw("seq1"))
+        self.assertEqual(b">seq3 >\n", rec_dict.get_raw("seq3"))
+        rec_dict.close()
+
+    def test_inconsistent_lines(self):
+        tmp = os.path.join(self.tmp_dir, "bad.fasta")
+        with open(tmp, "w") as handle:
+            handle.write(">alpha\nACGT\nAC\nACGT\n")
+        self.assertRaises(ValueError, SeqIO.index, tmp, "fasta", lazy=True)
+
+    def test_lazy_not_fasta(self):
+        self.assertRaises(ValueError, SeqIO.index, "Quality/example.fastq",
+                          "fastq", lazy=True)
+
+
+class IndexFileTests(unittest.TestCase):
+    """Tests for Bio.SeqIO.index(..., index_filename=...)."""
+
+    def setUp(self):
+        os.chdir(CUR_DIR)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index_filename = os.path.join(self.tmp_dir, "offsets.idx")
+
+    def tearDown(self):
+        os.chdir(CUR_DIR)
+        for name in os.listdir(self.tmp_dir):
+            os.remove(os.path.join(self.tmp_dir, name))
+        os.rmdir(self.tmp_dir)
+
+    def check_reuse(self, filename, format, key_function=None):
+        expected = SeqIO.index(filename, format, key_function=key_function)
+        for attempt in range(2):
+            rec_dict = SeqIO.index(filename, format,
+                                   key_function=key_function,
+                                   index_filename=self.index_filename)
+            self.assertTrue(os.path.isfile(self.index_filename))
+            self.assertEqual(sorted(expected), sorted(rec_dict))
+            self.assertEqual(expected._offsets, rec_dict._offsets)
+            for key in rec_dict:
+                # Native strings, not unicode on Python 2
+                self.assertIsInstance(key, str)
+            for key in expected:
+                self.assertEqual(expected.get_raw(key),
+                                 rec_dict.get_raw(key))
+            rec_dict.close()
+        expected.close()
+
+    def test_reuse(self):
+        for filename, format in [("Quality/example.fastq", "fastq"),
+                                 ("Quality/example.fastq.bgz", "fastq"),
+                                 ("GenBank/NC_005816.gb", "gb"),
+                                 ("Roche/greek.sff", "sff"),
+                                 ("Quality/zero_length.fastq", "fastq")]:
+            self.check_reuse(filename, format)
+            os.remove(self.index_filename)
+
+    def test_reuse_key_function(self):
+        self.check_reuse("GenBank/NC_005816.faa", "fasta",
+                         lambda name: name.split("|")[3])
+
+    def test_stale(self):
+        filename = os.path.join(self.tmp_dir, "example.fastq")
+        with open("Quality/example.fastq", "rb") as handle:
+            data = handle.read()
+        with open(filename, "wb") as handle:
+            handle.write(data)
+        rec_dict = SeqIO.index(filename, "fastq",
+                               index_filename=self.index_filename)
+        self.assertEqual(3, len(rec_dict))
+        rec_dict.close()
+        # Replace the file with one of the same size and mtime,
+        # the checksum should spot the change:
+        stat = os.stat(filename)
+        with open(filename, "wb") as handle:
+            handle.write(data.replace(b"@EAS54_6_R1_2_1_413_324",
+                                      b"@EAS54_6_R1_2_1_413_999"))
+        os.utime(filename, (stat.st_atime, stat.st_mtime))
+        rec_dict = SeqIO.index(filename, "fastq",
+                               index_filename=self.index_filename)
+        self.assertIn("EAS54_6_R1_2_1_413_999", rec_dict)
+        self.assertNotIn("EAS54_6_R1_2_1_413_324", rec_dict)
+        rec_dict.close()
+        # A truncated index file should be replaced:
+        with open(self.index_filename, "rb") as handle:
+            data = handle.read()
+        with open(self.index_filename, "wb") as handle:
+            handle.write(data[:-20])
+        rec_dict = SeqIO.index(filename, "fastq",
+                               index_filename=self.index_filename)
+        self.assertEqual(3, len(rec_dict))
+        rec_dict.close()
+        with open(self.index_filename, "rb") as handle:
+            self.assertEqual(data, handle.read())
+        # Now a different format, offsets must be recalculated:
+        rec_dict = SeqIO.index(filename, "fastq-sanger",
+                               index_filename=self.index_filename)
+        self.assertIn("EAS54_6_R1_2_1_413_999", rec_dict)
+        rec_dict.close()
+
+    def test_not_index_file(self):
+        with open(self.index_filename, "w") as handle:
+            handle.write("Important data\n")
+        self.assertRaises(ValueError, SeqIO.index, "Quality/example.fastq",
+                          "fastq", index_filename=self.index_filename)
+        with open(self.index_filename) as handle:
+            self.assertEqual("Important data\n", handle.read())
+        self.assertRaises(ValueError, SeqIO.index, "Quality/example.fasta",
+                          "fasta", lazy=True,
+                          index_filename=self.index_filename)
+
+
 tests = [
     ("Ace/contig1.ace", "ace", generic_dna),
     ("Ace/consed_sample.ace", "ace", None),
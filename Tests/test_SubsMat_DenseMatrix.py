@@ -0,0 +1,104 @@
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Tests for the NumPy based Bio.SubsMat.DenseMatrix module."""
+
+import os
+import pickle
+import unittest
+
+try:
+    import numpy
+    del numpy
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError(
+        "Install NumPy if you want to use Bio.SubsMat.DenseMatrix.")
+
+from Bio import SubsMat
+from Bio.SubsMat.DenseMatrix import DenseMatrix
+
+
+def load_acc_rep_mat():
+    with open(os.path.join("SubsMat", "acc_rep_mat.pik"), "rb") as handle:
+        return SubsMat.AcceptedReplacementsMatrix(pickle.load(handle))
+
+
+class TestDenseMatrix(unittest.TestCase):
+
+    def assertSameMatrix(self, dense, matrix, places=7):
+        self.assertEqual(sorted(dense.to_seqmat()), sorted(matrix))
+        for pair, value in matrix.items():
+            self.assertAlmostEqual(dense[pair], value, places=places)
+            self.assertAlmostEqual(dense[pair[::-1]], value, places=places)
+
+    def test_from_pairs(self):
+        pairs = [("ACGT-A", "ACGAAA"), ("TTNG", "TAGG")]
+        arm = DenseMatrix.from_pairs("ACGT", pairs)
+        self.assertEqual(arm.letters, "ACGT")
+        expected = {("A", "A"): 2, ("C", "C"): 1, ("G", "G"): 2,
+                    ("T", "T"): 1, ("A", "T"): 2}
+        for i, a in enumerate("ACGT"):
+            for b in "ACGT"[i:]:
+                self.assertEqual(arm[a, b], expected.get((a, b), 0))
+        self.assertRaises(KeyError, arm.__getitem__, ("A", "N"))
+        self.assertRaises(ValueError, DenseMatrix.from_pairs, "ACGT",
+                          [("ACGT", "ACG")])
+
+    def test_seqmat_round_trip(self):
+        acc_rep_mat = load_acc_rep_mat()
+        dense = DenseMatrix.from_seqmat(acc_rep_mat)
+        self.assertEqual(dense.letters, "".join(acc_rep_mat.ab_list))
+        self.assertSameMatrix(dense, acc_rep_mat)
+        matrix = dense.to_seqmat(SubsMat.AcceptedReplacementsMatrix)
+        self.assertIsInstance(matrix, SubsMat.AcceptedReplacementsMatrix)
+        self.assertEqual(matrix, acc_rep_mat)
+
+    def test_log_odds(self):
+        acc_rep_mat = load_acc_rep_mat()
+        dense = DenseMatrix.from_seqmat(acc_rep_mat)
+        for round_digit in (1, 9):
+            lo_mat = SubsMat.make_log_odds_matrix(acc_rep_mat,
+                                                  round_digit=round_digit)
+            self.assertSameMatrix(dense.log_odds(round_digit=round_digit),
+                                  lo_mat)
+        obs_freq_mat = SubsMat._build_obs_freq_mat(acc_rep_mat)
+        exp_freq_table = SubsMat._exp_freq_table_from_obs_freq(obs_freq_mat)
+        dense_obs = DenseMatrix.from_seqmat(obs_freq_mat)
+        frequencies = dense_obs.letter_frequencies()
+        for letter, frequency in zip(dense.letters, frequencies):
+            self.assertAlmostEqual(exp_freq_table[letter], frequency)
+        lo_mat = SubsMat.make_log_odds_matrix(acc_rep_mat, exp_freq_table,
+                                              logbase=10, factor=10.0)
+        self.assertSameMatrix(dense.log_odds(exp_freq_table, logbase=10,
+                                             factor=10.0), lo_mat)
+
+    def test_comparisons(self):
+        acc_rep_mat = load_acc_rep_mat()
+        lo_mat = SubsMat.make_log_odds_matrix(acc_rep_mat)
+        obs_freq_mat = SubsMat._build_obs_freq_mat(acc_rep_mat)
+        dense_lo = DenseMatrix.from_seqmat(lo_mat)
+        dense_obs = DenseMatrix.from_seqmat(obs_freq_mat)
+        self.assertAlmostEqual(dense_obs.correlation(dense_lo),
+                               SubsMat.two_mat_correlation(obs_freq_mat,
+                                                           lo_mat))
+        dense_arm = DenseMatrix.from_seqmat(acc_rep_mat)
+        for diag in (SubsMat.diagALL, SubsMat.diagNO, SubsMat.diagONLY):
+            expected = SubsMat.two_mat_relative_entropy(obs_freq_mat,
+                                                        acc_rep_mat,
+                                                        diag=diag)
+            self.assertAlmostEqual(dense_obs.relative_entropy(dense_arm,
+                                                              diag=diag),
+                                   expected)
+        self.assertRaises(ValueError, dense_obs.correlation,
+                          DenseMatrix("AC", [[1, 0], [0, 1]]))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, DenseMatrix, "AC", [[1, 2], [3, 4]])
+        self.assertRaises(ValueError, DenseMatrix, "ACG", [[1, 2], [2, 4]])
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity=2)
+    unittest.main(testRunner=runner)
@@ -416,6 +416,116 @@ class BgzfTests(unittest.TestCase):
 
         h.close()
 
+    def test_gzi(self):
+        """Check writing and reading a BGZF block index (.gzi)"""
+        temp_file = self.temp_file
+        with open("SamBam/ex1.bam", "rb") as h:
+            blocks = [(start, data_start) for start, raw_len, data_start,
+                      data_len in bgzf.BgzfBlocks(h)]
+        with open(temp_file, "wb") as h:
+            self.assertEqual(len(blocks) - 1, bgzf.write_gzi(h, blocks))
+        with open(temp_file, "rb") as h:
+            self.assertEqual(blocks, bgzf.read_gzi(h))
+        with open(temp_file, "rb") as h:
+            data = h.read()
+        with open(temp_file, "wb") as h:
+            h.write(data[:-4])
+        with open(temp_file, "rb") as h:
+            self.assertRaises(ValueError, bgzf.read_gzi, h)
+
+    def test_uncompressed_offsets(self):
+        """Check random access using offsets in the decompressed data"""
+        h = gzip.open("SamBam/ex1.bam", "rb")
+        old = h.read()
+        h.close()
+        with open("SamBam/ex1.bam", "rb") as h:
+            blocks = [(start, data_start) for start, raw_len, data_start,
+                      data_len in bgzf.BgzfBlocks(h)]
+        h = bgzf.BgzfReader("SamBam/ex1.bam", "rb")
+        for offset in [0, 1, 65535, 65536, 65537, 200000, 400000]:
+            h.seek(bgzf.uncompressed_to_virtual_offset(blocks, offset))
+            self.assertEqual(old[offset:offset + 70000], h.read(70000))
+        h.close()
+        self.assertRaises(ValueError, bgzf.uncompressed_to_virtual_offset,
+                          blocks, -1)
+
+    def test_lru_cache(self):
+        """Check the block cache limits and least recently used order"""
+        with open("SamBam/ex1.bam", "rb") as h:
+            starts = [start for start, raw_len, data_start, data_len
+                      in bgzf.BgzfBlocks(h)]
+        h = bgzf.BgzfReader("SamBam/ex1.bam", "rb", max_cache_bytes=150000)
+        for start in starts[:3]:
+            h.seek(bgzf.make_virtual_offset(start, 0))
+        # Three 64kb blocks won't fit in 150000 bytes:
+        self.assertEqual(starts[1:3], list(h._buffers))
+        self.assertTrue(h._cache_bytes <= 150000)
+        # Using the older block makes it the most recently used
+        h.seek(bgzf.make_virtual_offset(starts[1], 0))
+        h.seek(bgzf.make_virtual_offset(starts[3], 0))
+        self.assertEqual([starts[1], starts[3]], list(h._buffers))
+        h.close()
+
+        h = bgzf.BgzfReader("SamBam/ex1.bam", "rb", max_cache=2)
+        for start in starts[:4]:
+            h.seek(bgzf.make_virtual_offset(start, 0))
+        self.assertEqual(starts[2:4], list(h._buffers))
+        h.close()
+        self.assertRaises(ValueError, bgzf.BgzfReader, "SamBam/ex1.bam",
+                          "rb", max_cache_bytes=1000)
+
+    def test_threaded_write(self):
+        """Check writing with threads gives identical BGZF output"""
+        with gzip.open("GenBank/cor6_6.gb.bgz", "rb") as h:
+            data = h.read() * 20
+        offsets = []
+        for threads in (1, 3):
+            with bgzf.BgzfWriter(self.temp_file, "wb", threads=threads) as h:
+                for i in range(0, len(data), 30000):
+                    h.write(data[i:i + 30000])
+                    offsets.append(h.tell())
+            with open(self.temp_file, "rb") as h:
+                if threads == 1:
+                    expected = h.read()
+                else:
+                    self.assertEqual(expected, h.read())
+        self.assertEqual(offsets[:len(offsets) // 2],
+                         offsets[len(offsets) // 2:])
+        # Without calling tell, more blocks are compressed at once
+        for threads in (1, 3):
+            with bgzf.BgzfWriter(self.temp_file, "wb", threads=threads) as h:
+                h.write(data * 5)
+            with open(self.temp_file, "rb") as h:
+                if threads == 1:
+                    expected = h.read()
+                else:
+                    self.assertEqual(expected, h.read())
+        self.assertRaises(ValueError, bgzf.BgzfWriter, self.temp_file,
+                          "wb", threads=0)
+
+    def test_threaded_read(self):
+        """Check reading with threads, both in order and with seeks"""
+        with gzip.open("SamBam/ex1.bam", "rb") as h:
+            data = h.read()
+        h = bgzf.BgzfReader("SamBam/ex1.bam", "rb", threads=4)
+        self.assertEqual(data, h.read(len(data) + 1))
+        h.close()
+
+        with open("SamBam/ex1.bam", "rb") as h:
+            blocks = list(bgzf.BgzfBlocks(h))
+        shuffle(blocks)
+        h = bgzf.open("SamBam/ex1.bam", "rb", threads=3)
+        for start, raw_len, data_start, data_len in blocks:
+            h.seek(bgzf.make_virtual_offset(start, 0))
+            self.assertEqual(data[data_start:data_start + data_len],
+                             h.read(data_len))
+        h.close()
+
+        h = bgzf.open("GenBank/cor6_6.gb.bgz", "r", threads=2)  # Text mode!
+        self.assertEqual(h.readline(), "LOCUS       ATCOR66M      513 bp    "
+                         "mRNA            PLN       02-MAR-1992\n")
+        h.close()
+
 
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity=2)
@@ -163,6 +163,362 @@ class TestScoreOnly(unittest.TestCase):
                                           -3, -1, score_only=True)
         self.assertEqual(aligns1[0][2], aligns2)
 
+    def test_score_only_end_gaps(self):
+        """Test ``score_only`` with and without end gap penalties"""
+        for local in (False, True):
+            for end_gaps in (True, False):
+                if local:
+                    function = pairwise2.align.localms
+                else:
+                    function = pairwise2.align.globalms
+                aligns1 = function("GACCGTTAC", "ACGTTTACC", 2, -1, -2, -0.5,
+                                   penalize_end_gaps=end_gaps)
+                aligns2 = function("GACCGTTAC", "ACGTTTACC", 2, -1, -2, -0.5,
+                                   penalize_end_gaps=end_gaps,
+                                   score_only=True)
+                self.assertEqual(aligns1[0][2], aligns2)
+
+
+class TestLinearMemory(unittest.TestCase):
+    """Test parameter ``linear_memory``"""
+
+    def setUp(self):
+        # Split the problem all the way down, rather than using the full
+        # matrices for small regions
+        self.max_cells = pairwise2._LinearSpaceAligner.max_cells
+        pairwise2._LinearSpaceAligner.max_cells = 0
+
+    def tearDown(self):
+        pairwise2._LinearSpaceAligner.max_cells = self.max_cells
+
+    def check_alignment(self, function, seqA, seqB, *args, **kwargs):
+        aligns = function(seqA, seqB, *args, **kwargs)
+        kwargs["linear_memory"] = True
+        linear = function(seqA, seqB, *args, **kwargs)
+        self.assertEqual(len(linear), 1)
+        ali_seqA, ali_seqB, score, begin, end = linear[0]
+        self.assertAlmostEqual(score, aligns[0][2])
+        self.assertEqual(ali_seqA.replace("-", ""), seqA)
+        self.assertEqual(ali_seqB.replace("-", ""), seqB)
+        self.assertIn(linear[0], aligns)
+
+    def test_global(self):
+        """Test ``linear_memory`` in global alignments"""
+        self.check_alignment(pairwise2.align.globalxx, "GAACT", "GAT")
+        self.check_alignment(pairwise2.align.globalms,
+                             "GACCGTTACGGATTACAGG", "ACGTTTACCGGTACAG",
+                             2, -1, -2, -0.5)
+        self.check_alignment(pairwise2.align.globalms,
+                             "GACCGTTACGGATTACAGG", "ACGTTTACCGGTACAG",
+                             2, -1, -2, -0.5, penalize_end_gaps=False)
+        self.check_alignment(pairwise2.align.globalds, "KEVLAHHMRWY",
+                             "EVLAMRWY", blosum62, -4, -1,
+                             penalize_extend_when_opening=True)
+
+    def test_local(self):
+        """Test ``linear_memory`` in local alignments"""
+        self.check_alignment(pairwise2.align.localms, "xxxABCDxxx",
+                             "zzzABzzCDz", 1, -0.5, -3, -1)
+        self.check_alignment(pairwise2.align.localds, "VKAHGKKV", "FQAHCAGV",
+                             blosum62, -4, -4)
+        self.check_alignment(pairwise2.align.localms,
+                             "TTTTGACCGTTACGGATTACAGG", "ACGTTTACCGGTACAGTTT",
+                             2, -1, -2, -0.5)
+        self.assertEqual(pairwise2.align.localxx("AAA", "CCC",
+                                                 linear_memory=True), [])
+
+    def test_lists(self):
+        """Test ``linear_memory`` with lists"""
+        aligns = pairwise2.align.globalxx(["ACG", "GGT", "AAA"],
+                                          ["ACG", "AAA"], gap_char=["-"],
+                                          linear_memory=True)
+        self.assertEqual(aligns, [(["ACG", "GGT", "AAA"], ["ACG", "-", "AAA"],
+                                   2, 0, 3)])
+
+    def test_gap_functions(self):
+        """Test ``linear_memory`` requires affine gap penalties"""
+        self.assertRaises(ValueError, pairwise2.align.globalxc, "ACCGT",
+                          "ACG", lambda x, y: -y, lambda x, y: -y,
+                          linear_memory=True)
+
+
+class TestQueryProfile(unittest.TestCase):
+    """Test parameter ``query_profile``"""
+
+    def check_alignments(self, function, seqA, seqB, *args, **kwargs):
+        for extra in ({}, {"score_only": True}):
+            extra.update(kwargs)
+            expected = function(seqA, seqB, *args, **extra)
+            extra["query_profile"] = True
+            self.assertEqual(function(seqA, seqB, *args, **extra), expected)
+            # The score only code swaps the sequences if A is shorter
+            extra["query_profile"] = False
+            expected = function(seqB, seqA, *args, **extra)
+            extra["query_profile"] = True
+            self.assertEqual(function(seqB, seqA, *args, **extra), expected)
+
+    def test_local(self):
+        """Test ``query_profile`` in local alignments"""
+        self.check_alignments(pairwise2.align.localds, "VKAHGKKV",
+                              "FQAHCAGV", blosum62, -4, -4)
+        self.check_alignments(pairwise2.align.localds, "KEVLAHHMRWY",
+                              "EVLAMRWY", blosum62, -10, -1)
+        self.check_alignments(pairwise2.align.localms, "xxxABCDxxx",
+                              "zzzABzzCDz", 2, -1, -3, -1)
+        self.check_alignments(pairwise2.align.localms, "GACCGTTACGGATTAC",
+                              "ACGTTTACCGGTAC", 2, -1, -2, -1,
+                              penalize_end_gaps=True)
+
+    def test_global(self):
+        """Test ``query_profile`` in global alignments"""
+        self.check_alignments(pairwise2.align.globalxx, "GAACT", "GAT")
+        self.check_alignments(pairwise2.align.globalms, "GACCGTTACGGATTAC",
+                              "ACGTTTACCGGTAC", 2, -1, -2, -1)
+        self.check_alignments(pairwise2.align.globalms, "GACCGTTACGGATTAC",
+                              "ACGTTTACCGGTAC", 2, -1, -2, -1,
+                              penalize_end_gaps=(True, False))
+        self.check_alignments(pairwise2.align.globalds, "KEVLAHHMRWY",
+                              "EVLAMRWY", blosum62, -4, -1,
+                              penalize_extend_when_opening=True)
+        self.check_alignments(pairwise2.align.globalxx, ["ACG", "GGT"],
+                              ["ACG"], gap_char=["-"])
+
+    def test_fall_back(self):
+        """Test ``query_profile`` with non-integer scores"""
+        self.check_alignments(pairwise2.align.localxs, "AxBx", "zABz",
+                              -0.1, 0)
+        self.check_alignments(pairwise2.align.globalms, "GACCGTTACG",
+                              "ACGTTTACCG", 1, -0.5, -2, -1)
+
+
+class TestAlignmentRecovery(unittest.TestCase):
+    """Test parameters ``max_alignments``, ``lazy`` and ``count_only``"""
+
+    def check_count(self, function, seqA, seqB, *args, **kwargs):
+        alignments = function(seqA, seqB, *args, max_alignments=None,
+                              **kwargs)
+        self.assertEqual(function(seqA, seqB, *args, count_only=True,
+                                  **kwargs), len(alignments))
+        return alignments
+
+    def test_lazy(self):
+        """Test recovering the alignments lazily"""
+        alignments = pairwise2.align.globalxx("GAACTTT", "GATT")
+        generator = pairwise2.align.globalxx("GAACTTT", "GATT", lazy=True)
+        self.assertEqual(next(generator), alignments[0])
+        self.assertEqual(list(generator), alignments[1:])
+        self.assertEqual(list(pairwise2.align.localms(
+            "ACGT", "ACGT", 2, -1, -2, -1, lazy=True, linear_memory=True)),
+            pairwise2.align.localms("ACGT", "ACGT", 2, -1, -2, -1))
+        self.assertEqual(list(pairwise2.align.globalxx("", "GATT",
+                                                       lazy=True)), [])
+
+    def test_max_alignments(self):
+        """Test the limit on the number of alignments"""
+        seqA, seqB = "ACGT" * 8, "AGT" * 10
+        alignments = pairwise2.align.globalxx(seqA, seqB)
+        self.assertEqual(len(alignments), pairwise2.MAX_ALIGNMENTS)
+        self.assertEqual(len(set(alignments)), len(alignments))
+        self.assertEqual(pairwise2.align.globalxx(seqA, seqB,
+                                                  max_alignments=5),
+                         alignments[:5])
+        self.assertEqual(pairwise2.align.globalxx(seqA, seqB,
+                                                  max_alignments=1),
+                         pairwise2.align.globalxx(seqA, seqB,
+                                                  one_alignment_only=True))
+        self.assertEqual(pairwise2.align.globalxx(seqA, seqB,
+                                                  count_only=True),
+                         1201)
+
+    def test_count(self):
+        """Test counting the alignments"""
+        alignments = self.check_count(pairwise2.align.globalxx, "ACCGT", "ACG")
+        self.assertEqual(len(alignments), 2)
+        alignments = self.check_count(pairwise2.align.globalxx, "AAATTT",
+                                      "ATATAT")
+        self.assertEqual(len(alignments), 22)
+        self.check_count(pairwise2.align.localxx, "ACCGTTAC", "CGTAC")
+        self.check_count(pairwise2.align.localms, "GATTACAT", "TACCAT",
+                         2, -1, -1.5, -0.5)
+        self.check_count(pairwise2.align.globalms, "GATTACAT", "TACCAT",
+                         1, -1, -1, -1, penalize_end_gaps=(True, False))
+        self.check_count(pairwise2.align.globalms, "GATTACAT", "TACCAT",
+                         1, 0, -1, 0, force_generic=True)
+        self.check_count(pairwise2.align.globalmc, "GATTACAT", "TACCAT",
+                         1, 0, lambda x, y: -y, lambda x, y: -y)
+        self.check_count(pairwise2.align.globalxx, list("GATTACAT"),
+                         list("TACCAT"), gap_char=["-"])
+        self.assertEqual(pairwise2.align.globalxx("", "ACG", count_only=True),
+                         0)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACCGT",
+                          "ACG", count_only=True, score_only=True)
+
+
+class TestBandedAlignment(unittest.TestCase):
+    """Test parameter ``band_width``"""
+
+    seqA = "GATTACAGATTACAGGCCTTAAGGCCTTAACCGGTTAACCGG"
+    seqB = "GATTACAGATTCAGGCCTTAAGGGCCTTAACCGATTAACCGG"
+
+    def check_alignments(self, function, seqA, seqB, *args, **kwargs):
+        for extra in ({}, {"score_only": True}):
+            extra.update(kwargs)
+            expected = function(seqA, seqB, *args, **extra)
+            for band_width in (2, 10, "auto"):
+                for force_generic in (False, True):
+                    self.assertEqual(function(seqA, seqB, *args,
+                                              band_width=band_width,
+                                              force_generic=force_generic,
+                                              **extra), expected)
+
+    def test_near_identical(self):
+        """Test ``band_width`` with sequences differing by a few indels"""
+        self.check_alignments(pairwise2.align.globalms, self.seqA, self.seqB,
+                              2, -1, -2, -0.5, one_alignment_only=True)
+        self.check_alignments(pairwise2.align.globalms, self.seqA, self.seqB,
+                              2, -1, -2, -0.5, penalize_end_gaps=False,
+                              one_alignment_only=True)
+        self.check_alignments(pairwise2.align.globalxs, self.seqA,
+                              self.seqB[5:], -2, -0.5,
+                              one_alignment_only=True)
+        self.check_alignments(pairwise2.align.globalxs, list(self.seqA),
+                              list(self.seqB), -2, -0.5, gap_char=["-"],
+                              one_alignment_only=True)
+
+    def test_narrow_band(self):
+        """Test ``band_width`` restricting the alignment"""
+        for force_generic in (False, True):
+            # With no band, one gap in each sequence is better:
+            alignments = pairwise2.align.globalms(
+                "ACGTTTTT", "CGTTTTTA", 2, -1, -2, -0.5,
+                force_generic=force_generic)
+            self.assertEqual(alignments, [("ACGTTTTT-", "-CGTTTTTA", 10.0,
+                                           0, 9)])
+            alignments = pairwise2.align.globalms(
+                "ACGTTTTT", "CGTTTTTA", 2, -1, -2, -0.5, band_width=0,
+                force_generic=force_generic)
+            self.assertEqual(alignments, [("ACGTTTTT", "CGTTTTTA", 4,
+                                           0, 8)])
+            score = pairwise2.align.globalms(
+                "ACGTTTTT", "CGTTTTTA", 2, -1, -2, -0.5, band_width=0,
+                force_generic=force_generic, score_only=True)
+            self.assertEqual(score, 4)
+            # Sequences of different length include the diagonals between
+            # the two corners:
+            alignments = pairwise2.align.globalms(
+                "ACGTTTTT", "ACGTT", 2, -1, -2, -0.5, band_width=0,
+                force_generic=force_generic)
+            self.assertEqual(alignments[0][2], 7.0)
+
+    def test_free_end_gaps(self):
+        """Test ``band_width`` with free end gaps outside the band"""
+        for force_generic in (False, True):
+            for penalize_end_gaps in (False, (True, False)):
+                args = ("TTG", "CTAACGAAA", 1, -2, -2, -1)
+                kwargs = {"band_width": 0, "force_generic": force_generic,
+                          "penalize_end_gaps": penalize_end_gaps}
+                score = pairwise2.align.globalms(*args, score_only=True,
+                                                 **kwargs)
+                alignments = pairwise2.align.globalms(*args, **kwargs)
+                count = pairwise2.align.globalms(*args, count_only=True,
+                                                 **kwargs)
+                self.assertTrue(alignments)
+                self.assertEqual(count, len(alignments))
+                for alignment in alignments:
+                    self.assertEqual(alignment[2], score)
+            # With all end gaps free, the best alignments leave the band
+            # along the first or last row and column:
+            alignments = pairwise2.align.globalms(
+                "TTG", "CTAACGAAA", 1, -2, -2, -1, band_width=0,
+                penalize_end_gaps=False, force_generic=force_generic)
+            self.assertEqual(alignments,
+                             [("TTG---------", "---CTAACGAAA", 0, 0, 12),
+                              ("---------TTG", "CTAACGAAA---", 0, 0, 12)])
+
+    def test_band(self):
+        """Test the band calculated from ``band_width``"""
+        self.assertEqual(pairwise2._find_band("ACGTTTTT", "CGTTTTTA", 1),
+                         (-1, 1))
+        self.assertEqual(pairwise2._find_band("ACGT", "CGTTTTTA", 1),
+                         (-1, 5))
+        self.assertEqual(pairwise2._find_band("ACGT", "CGTT", 4), None)
+        self.assertEqual(pairwise2._find_band("ACGT", "TTTT", "auto"), None)
+        # The shared 9-mers are on diagonals -1 and 0:
+        self.assertEqual(pairwise2._find_band(self.seqA, self.seqB, "auto"),
+                         (-10, 9))
+        # There are no unique k-mers in a repeated sequence:
+        self.assertEqual(pairwise2._find_band(self.seqA * 4, self.seqB * 4,
+                                              "auto"), None)
+
+    def test_errors(self):
+        """Test ``band_width`` with invalid values or options"""
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACGT",
+                          "ACT", band_width=-1)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACGT",
+                          "ACT", band_width="wide")
+        self.assertRaises(ValueError, pairwise2.align.localxx, "ACGT",
+                          "ACT", band_width=2)
+        self.assertRaises(ValueError, pairwise2.align.globalxx, "ACGT",
+                          "ACT", band_width=2, linear_memory=True)
+
+
+class TestAlignMany(unittest.TestCase):
+    """Test ``align_many``"""
+
+    targets = ["GAT", "GATTACA", "", "CCGTTAC", "TTT", "GACCGTTAC", "A"]
+
+    def check_scores(self, function, *args, **kwargs):
+        scores = pairwise2.align_many("GACCGTTAC", self.targets, function,
+                                      *args, score_only=True, **kwargs)
+        self.assertEqual(len(scores), len(self.targets))
+        for target, score in zip(self.targets, scores):
+            expected = getattr(pairwise2.align, function)(
+                "GACCGTTAC", target, *args, score_only=True, **kwargs)
+            self.assertEqual(score, expected)
+
+    def test_scores(self):
+        """Test ``align_many`` scores match single alignments"""
+        self.check_scores("globalxx")
+        self.check_scores("globalms", 2, -1, -2, -0.5)
+        self.check_scores("globalms", 2, -1, -2, -0.5,
+                          penalize_end_gaps=False)
+        self.check_scores("globalms", 2, -1, -2, -0.5,
+                          penalize_end_gaps=(True, False))
+        self.check_scores("localms", 2, -1, -2, -0.5)
+        self.check_scores("localms", 2, -1, -2, -0.5,
+                          penalize_extend_when_opening=True)
+        self.check_scores("globalds", blosum62, -4, -1)
+        self.check_scores("localds", blosum62, -4, -1)
+        # This uses the general gap function code
+        self.check_scores("localmc", 2, -1, lambda x, y: -y, lambda x, y: -y)
+
+    def test_alignments(self):
+        """Test ``align_many`` alignments match single alignments"""
+        results = pairwise2.align_many("GACCGTTAC", self.targets, "localms",
+                                       2, -1, -2, -0.5)
+        for target, alignments in zip(self.targets, results):
+            self.assertEqual(alignments, pairwise2.align.localms(
+                "GACCGTTAC", target, 2, -1, -2, -0.5))
+
+    def test_lists(self):
+        """Test ``align_many`` with lists"""
+        scores = pairwise2.align_many(["ACG", "GGT", "AAA"],
+                                      [["ACG", "AAA"], ["GGT"], []],
+                                      "globalxx", gap_char=["-"],
+                                      score_only=True)
+        self.assertEqual(scores, [2, 1, []])
+
+    def test_processes(self):
+        """Test ``align_many`` with worker processes"""
+        targets = self.targets * 5
+        scores = pairwise2.align_many("GACCGTTAC", targets, "localms",
+                                      2, -1, -2, -0.5, score_only=True)
+        self.assertEqual(scores, pairwise2.align_many(
+            "GACCGTTAC", targets, "localms", 2, -1, -2, -0.5,
+            score_only=True, processes=2))
+        self.assertRaises(ValueError, pairwise2.align_many, "GACCGTTAC",
+                          targets, "localxx", processes=0)
+
 
 class TestPairwiseOpenPenalty(unittest.TestCase):
 
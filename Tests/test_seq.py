@@ -5,6 +5,7 @@
 from __future__ import print_function
 import array
 import copy
+import string
 import sys
 import warnings
 
@@ -26,6 +27,7 @@ from Bio.Data.IUPACData import (ambiguous_dna_complement,
                                 ambiguous_rna_complement,
                                 ambiguous_dna_values, ambiguous_rna_values)
 from Bio.Data.CodonTable import TranslationError, standard_dna_table
+from Bio.Data.CodonTable import ambiguous_dna_by_id
 from Bio.Seq import MutableSeq
 
 
@@ -824,6 +826,59 @@ class TestUnknownSeq(unittest.TestCase):
         self.assertEqual("", seq.ungap("-"))
 
 
+class TestBufferSeq(unittest.TestCase):
+    def setUp(self):
+        self.data = b"NNNNACGTAAAAACGTTTGACCCCTAGNNNN"
+        self.s = Seq.BufferSeq(self.data, IUPAC.ambiguous_dna, 4, -4)
+        self.expected = str(self.data[4:-4].decode())
+
+    def test_construction(self):
+        self.assertEqual(self.expected, str(self.s))
+        self.assertEqual(len(self.expected), len(self.s))
+        self.assertEqual(self.expected,
+                         str(Seq.BufferSeq(bytearray(self.data))[4:-4]))
+        with self.assertRaises(TypeError):
+            Seq.BufferSeq(u"ACGT")
+
+    def test_slicing_shares_buffer(self):
+        sub = self.s[2:-3]
+        self.assertIsInstance(sub, Seq.BufferSeq)
+        self.assertIs(sub._buffer, self.data)
+        self.assertEqual(self.expected[2:-3], str(sub))
+        self.assertEqual(self.expected[2:-3][1:4], str(sub[1:4]))
+        self.assertEqual("", str(self.s[10:2]))
+        self.assertEqual(self.expected[::-2], str(self.s[::-2]))
+
+    def test_single_letters(self):
+        self.assertEqual(self.expected[0], self.s[0])
+        self.assertEqual(self.expected[-1], self.s[-1])
+        with self.assertRaises(IndexError):
+            self.s[len(self.expected)]
+
+    def test_searching(self):
+        for sub in ["ACG", "TAG", "N", "", Seq.Seq("AAA")]:
+            for args in [(), (3,), (-10,), (2, 12), (50, 60), (5, 2)]:
+                self.assertEqual(self.expected.count(str(sub), *args),
+                                 self.s.count(sub, *args))
+                self.assertEqual(self.expected.find(str(sub), *args),
+                                 self.s.find(sub, *args))
+                self.assertEqual(self.expected.rfind(str(sub), *args),
+                                 self.s.rfind(sub, *args))
+        self.assertIn("TTTGA", self.s)
+        self.assertNotIn("NNN", self.s)
+        with self.assertRaises(TypeError):
+            self.s.find(Seq.Seq("AUG", Alphabet.generic_rna))
+
+    def test_biological_methods(self):
+        dna = Seq.Seq(self.expected, IUPAC.ambiguous_dna)
+        self.assertEqual(dna, self.s)
+        self.assertEqual(str(dna.complement()), str(self.s.complement()))
+        self.assertEqual(str(dna.reverse_complement()),
+                         str(self.s.reverse_complement()))
+        self.assertEqual(str(dna.translate()), str(self.s.translate()))
+        self.assertEqual(str(dna.transcribe()), str(self.s.transcribe()))
+
+
 class TestAmbiguousComplements(unittest.TestCase):
     def test_ambiguous_values(self):
         """Test that other tests do not introduce characters to our values"""
@@ -1275,6 +1330,56 @@ class TestTranslating(unittest.TestCase):
         with self.assertRaises(TranslationError):
             Seq.translate(seq, table=2, cds=True)
 
+    def test_translation_to_stop_before_invalid_codon(self):
+        seq = "GTGGCCTAGTA?"
+        self.assertEqual("VA", Seq.translate(seq, to_stop=True))
+        with self.assertRaises(TranslationError):
+            Seq.translate(seq)
+
+    def test_translation_with_stop_symbol_and_possible_stops(self):
+        seq = "ATGTAANNNTANTGA"
+        self.assertEqual("M@XX@", Seq.translate(seq, stop_symbol="@"))
+        table = ambiguous_dna_by_id[1]
+        self.assertEqual("M@??@", Seq._translate_str(seq, table,
+                                                     stop_symbol="@",
+                                                     pos_stop="?"))
+
+    def test_translate_many(self):
+        seqs = ["GTGGCCATTGTAATGGGCCGCTGAAAGGGTGCCCGATAG",
+                "GTG---GCCATT", "ATGTAA", ""]
+        self.assertEqual([Seq.translate(s, gap="-") for s in seqs],
+                         Seq.translate_many(seqs, gap="-"))
+        self.assertEqual([Seq.translate(s, table=2, to_stop=True)
+                          for s in seqs[:1]],
+                         Seq.translate_many(seqs[:1], table=2, to_stop=True))
+        self.assertEqual(["MAIVMGRWKGAR", "M"],
+                         Seq.translate_many([seqs[0], seqs[2]],
+                                            table=2, cds=True))
+        dna = Seq.Seq(seqs[0], IUPAC.unambiguous_dna)
+        self.assertEqual([dna.translate(table=standard_dna_table)],
+                         Seq.translate_many([dna], table=standard_dna_table))
+        proteins = Seq.translate_many([Seq.Seq(seqs[1]),
+                                       Seq.MutableSeq(seqs[1])], gap="-")
+        self.assertEqual(["V-AI", "V-AI"], [str(p) for p in proteins])
+        protein = Seq.translate_many([dna], table=2)[0]
+        self.assertEqual(str(dna.translate(table=2)), str(protein))
+        self.assertEqual(repr(dna.translate(table=2).alphabet),
+                         repr(protein.alphabet))
+        with self.assertRaises(ValueError):
+            Seq.translate_many(seqs, table=dict())
+        with self.assertRaises(TranslationError):
+            Seq.translate_many(seqs[1:2])
+
+    def test_codon_lookup_cache(self):
+        table = ambiguous_dna_by_id[1]
+        lookup = Seq._get_codon_lookup(table)
+        self.assertIs(lookup, Seq._get_codon_lookup(table))
+        # Many different gap characters don't fill up the cache
+        for gap in string.digits + string.punctuation:
+            self.assertEqual("K", Seq._translate_str("AAA", table, gap=gap))
+        self.assertEqual(Seq._max_codon_lookups, len(Seq._codon_lookups))
+        self.assertEqual("K", Seq._translate_str("AAA", table))
+
 
 class TestStopCodons(unittest.TestCase):
     def setUp(self):